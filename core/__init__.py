@@ -16,8 +16,19 @@ __all__ = [
     "tenhou_validator",
     "models",
     "rules",
+    "shanten",
+    "shanten_table",
     "shanten_quiz",
     "exceptions",
     "actions",
     "engine_manager",
+    "session",
+    "event_bus",
+    "event_log",
+    "state_delta",
+    "serialization",
+    "ai_driver",
+    "journal",
+    "game_store",
+    "id_allocator",
 ]
@@ -11,29 +11,19 @@ in the future.
 from __future__ import annotations
 
 import json
-from dataclasses import asdict
 from typing import Any
 
+from . import serialization
 from .models import GameAction, GameEvent, GameState, Tile, Meld, Hand
 from .player import Player
 from .wall import Wall
 from .ai_runner import ExternalAI
 
 
-def _encode(obj: Any) -> Any:
-    """Recursively convert dataclasses for JSON serialization."""
-
-    if hasattr(obj, "__dataclass_fields__"):
-        return {k: _encode(v) for k, v in asdict(obj).items()}
-    if isinstance(obj, list):
-        return [_encode(v) for v in obj]
-    return obj
-
-
 def game_state_to_json(state: GameState) -> str:
     """Return a JSON string representation of the game state."""
 
-    return json.dumps(_encode(state))
+    return serialization.dumps(state)
 
 
 def send_state_to_ai(state: GameState, ai: ExternalAI) -> None:
@@ -70,6 +60,7 @@ def json_to_game_state(message: str) -> GameState:
             hand=decode_hand(d.get("hand", {})),
             score=d.get("score", 25000),
             river=[decode_tile(t) for t in d.get("river", [])],
+            discards=[decode_tile(t) for t in d.get("discards", d.get("river", []))],
             riichi=d.get("riichi", False),
             seat_wind=d.get("seat_wind", "east"),
         )
@@ -108,7 +99,7 @@ def event_to_json(event: GameEvent) -> str:
 
     payload = {"type": event.name}
     payload.update(event.payload)
-    return json.dumps(payload)
+    return serialization.dumps(payload)
 
 
 def json_to_event(message: str) -> GameEvent:
@@ -130,7 +121,7 @@ def send_event_to_ai(event: GameEvent, ai: ExternalAI) -> None:
 def action_to_json(action: GameAction) -> str:
     """Serialize a :class:`GameAction` for sending to the AI."""
 
-    return json.dumps(_encode(action))
+    return serialization.dumps(action)
 
 
 def json_to_action(message: str) -> GameAction:
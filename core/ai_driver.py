@@ -0,0 +1,136 @@
+"""Play a game's AI seats on the server from an asyncio task.
+
+An :class:`AIDriver` owns the AI seats of one game managed by an
+:class:`~core.engine_manager.EngineManager`. It sleeps until the manager
+reports that the game's state changed, then moves every AI seat that can
+act: claims or skips a discard with :func:`core.simple_ai.claim_meld`, or
+plays a turn with the strategy from :data:`core.ai.AI_REGISTRY`. Each move
+runs under the game's lock in a worker thread, exactly like a request, so
+the game's event bus publishes it to connected clients as usual.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from .ai import AI_REGISTRY
+from .exceptions import InvalidActionError, NotYourTurnError
+from .session import GameSession
+from .simple_ai import claim_meld
+
+if TYPE_CHECKING:
+    from .engine_manager import EngineManager
+
+logger = logging.getLogger(__name__)
+
+
+class AIDriver:
+    """Advance the AI ``seats`` of ``game_id`` as soon as it is their turn.
+
+    ``delay`` seconds are waited after every AI move so humans can follow
+    the table; the default plays at engine speed.
+    """
+
+    def __init__(
+        self,
+        manager: EngineManager,
+        game_id: int,
+        seats: Iterable[int],
+        *,
+        ai_type: str = "simple",
+        delay: float = 0.0,
+    ) -> None:
+        if ai_type not in AI_REGISTRY:
+            raise ValueError(f"Unknown ai_type: {ai_type}")
+        self.manager = manager
+        self.game_id = game_id
+        self.seats = frozenset(seats)
+        self.ai_type = ai_type
+        self.delay = delay
+        self.task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake = asyncio.Event()
+        # state version at the last failed move
+        self._failed_version: int | None = None
+
+    def start(self) -> asyncio.Task[None]:
+        """Start driving the seats in the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self.task = self._loop.create_task(self.run())
+        return self.task
+
+    def stop(self) -> None:
+        """Cancel the driving task from any thread."""
+        if self.task is not None:
+            self._call_soon(self.task.cancel)
+
+    def notify(self) -> None:
+        """Wake the driver from any thread after the game changed."""
+        self._call_soon(self._wake.set)
+
+    def _call_soon(self, callback: Callable[[], object]) -> None:
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # the loop has shut down
+            pass
+
+    async def run(self) -> None:
+        """Move AI seats until the game ends or is removed."""
+        while True:
+            self._wake.clear()
+            moved = await asyncio.to_thread(self.step)
+            if moved is None:
+                return
+            if moved:
+                await asyncio.sleep(self.delay)
+                continue
+            await self._wake.wait()
+
+    def step(self) -> bool | None:
+        """Make at most one AI move.
+
+        Returns ``True`` after a move, ``False`` when no AI seat can act and
+        ``None`` once the game is over or no longer managed. A move that
+        fails is reported as an ``error`` event and counts as no move. It is
+        not retried until the state changes again, so a move that keeps
+        failing is reported once instead of waking the driver forever.
+        """
+        try:
+            with self.manager.use_engine(self.game_id) as session:
+                engine = session.engine
+                if session.is_game_over():
+                    return None
+                if engine.state_version == self._failed_version:
+                    # nothing happened since the move failed
+                    return False
+                try:
+                    return self._move(session)
+                except (InvalidActionError, NotYourTurnError) as err:
+                    # leave the seat alone until the next change of state
+                    message = str(err)
+                except Exception as err:
+                    logger.exception("AI move failed in game %s", self.game_id)
+                    message = f"AI move failed: {err!r}"
+                self.manager.record_error(self.game_id, message)
+                self._failed_version = engine.state_version
+                return False
+        except KeyError:
+            return None
+
+    def _move(self, session: GameSession) -> bool:
+        engine = session.engine
+        state = engine.state
+        claimants = [p for p in state.waiting_for_claims if p in self.seats]
+        if claimants:
+            seat = claimants[0]
+            if not (self.ai_type == "simple" and claim_meld(engine, seat)):
+                engine.skip(seat)
+            return True
+        if state.waiting_for_claims or state.current_player not in self.seats:
+            return False
+        AI_REGISTRY[self.ai_type](engine, state.current_player)
+        return True
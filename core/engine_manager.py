@@ -1,71 +1,479 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
 from contextlib import contextmanager
-from typing import Dict, Iterator, Tuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Tuple
 
+from .ai_driver import AIDriver
+from .game_store import GameStore
 from .mahjong_engine import MahjongEngine
+from .event_bus import EventBus, Subscription
 from .models import GameEvent, GameState
+from .session import GameSession
+from .state_delta import StateCache
 from . import api
 
 
 class EngineManager:
-    """Manage multiple MahjongEngine instances keyed by game id."""
+    """Manage multiple MahjongEngine instances keyed by game id.
 
-    def __init__(self) -> None:
+    Each game has its own re-entrant lock so requests for one game are
+    serialized while different games proceed in parallel. Games whose AI
+    seats are played by the server have an :class:`AIDriver`, which is woken
+    whenever a locked section changes the game's state.
+
+    Games are kept until they are removed. :meth:`sweep` removes games that
+    were not used for ``idle_ttl`` seconds while nobody was subscribed,
+    finished games after ``finished_ttl`` seconds, and the least recently
+    used games beyond ``max_games``, which is also enforced whenever a game
+    is created. Games with subscribers are never evicted for being idle or
+    beyond ``max_games``. ``None`` disables a limit. With ``archive_dir`` the MJAI log
+    of every removed game is written there first.
+
+    With a ``store`` every game is journaled to disk as it is played and
+    :meth:`recover` brings the stored games back after a restart.
+
+    Game ids count up from 1 unless ``allocate_id`` is given, which returns
+    the id of each new game, for instance from a shared
+    :class:`~core.id_allocator.IdAllocator`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_games: int | None = None,
+        idle_ttl: float | None = None,
+        finished_ttl: float | None = None,
+        archive_dir: str | os.PathLike[str] | None = None,
+        store: GameStore | None = None,
+        allocate_id: Callable[[], int] | None = None,
+    ) -> None:
         self._engines: Dict[int, MahjongEngine] = {}
+        self._sessions: Dict[int, GameSession] = {}
+        self._state_caches: Dict[int, StateCache] = {}
+        self._locks: Dict[int, threading.RLock] = {}
+        self._drivers: Dict[int, AIDriver] = {}
+        self._last_used: Dict[int, float] = {}
+        # journal lines written and covered by the latest snapshot per game
+        self._journal_seq: Dict[int, int] = {}
+        self._snapshot_seq: Dict[int, int] = {}
         self._next_id: int = 1
+        self._id_lock = threading.Lock()
+        # guards adding and removing games so sweeps see a consistent set
+        self._games_lock = threading.Lock()
+        self.max_games = max_games
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.archive_dir = Path(archive_dir) if archive_dir is not None else None
+        self.counters: Counter[str] = Counter()
+        self.store = store
+        self.allocate_id = allocate_id
+
+    def create_game(
+        self, players: list[str], *, max_rounds: int = 8, game_id: int | None = None
+    ) -> Tuple[int, GameState]:
+        """Create a new game and return its id and initial state.
 
-    def create_game(self, players: list[str], *, max_rounds: int = 8) -> Tuple[int, GameState]:
-        """Create a new game and return its id and initial state."""
-        engine = MahjongEngine(max_rounds=max_rounds)
-        for i, name in enumerate(players):
-            if i < len(engine.state.players):
-                engine.state.players[i].name = name
-        game_id = self._next_id
-        self._next_id += 1
-        self._engines[game_id] = engine
-        api._engine = engine
+        ``game_id`` is an id allocated elsewhere; a ``ValueError`` is raised
+        if a game with that id is already managed.
+        """
+        if game_id is None:
+            if self.allocate_id is not None:
+                game_id = self.allocate_id()
+            else:
+                with self._id_lock:
+                    game_id = self._next_id
+                    self._next_id += 1
+        else:
+            with self._id_lock:
+                # never hand out an id that was given explicitly
+                self._next_id = max(self._next_id, game_id + 1)
+        if game_id in self._engines:
+            raise ValueError(f"Game {game_id} already exists")
+        session = GameSession.start(players, max_rounds=max_rounds)
+        engine = session.engine
+        engine.event_bus = EventBus(engine.event_log)
+        # checks the id again, atomically with the insert
+        self._install(game_id, session)
+        if self.store is not None:
+            self.store.add_game(game_id, players, max_rounds, engine.seed)
+        self.counters["created"] += 1
+        if self.max_games is not None:
+            self._evict_lru(self.max_games, keep=game_id)
         return game_id, engine.state
 
+    def _install(self, game_id: int, session: GameSession, seq: int = 0, snapshot_seq: int = 0) -> None:
+        """Start managing ``session`` as ``game_id``.
+
+        Raises ``ValueError`` if the id is taken, so that two creations
+        racing for one id never replace each other.
+        """
+        engine = session.engine
+        with self._games_lock:
+            if game_id in self._engines:
+                raise ValueError(f"Game {game_id} already exists")
+            if self.store is not None:
+                engine.journal = []
+                self._journal_seq[game_id] = seq
+                self._snapshot_seq[game_id] = snapshot_seq
+            self._locks[game_id] = threading.RLock()
+            self._sessions[game_id] = session
+            self._last_used[game_id] = time.monotonic()
+            self._engines[game_id] = engine
+
+    def recover(self) -> list[int]:
+        """Load the games of ``store`` and return their ids.
+
+        Each game is rebuilt from its latest snapshot and the journal after
+        it. Server-played seats resume when called from a running event
+        loop. New games are numbered after the highest stored id.
+        """
+        if self.store is None:
+            return []
+        try:
+            asyncio.get_running_loop()
+            running = True
+        except RuntimeError:
+            running = False
+        recovered: list[int] = []
+        for stored in self.store.load():
+            engine = stored.engine
+            engine.event_bus = EventBus(engine.event_log)
+            self._install(stored.game_id, GameSession(engine), stored.seq, stored.snapshot_seq)
+            if stored.ai is not None and running:
+                self.start_ai(stored.game_id, **stored.ai)
+            recovered.append(stored.game_id)
+        with self._id_lock:
+            self._next_id = max(self._next_id, self.store.last_id() + 1)
+        self.counters["recovered"] += len(recovered)
+        return recovered
+
     def get_engine(self, game_id: int) -> MahjongEngine:
         return self._engines[game_id]
 
+    def get_session(self, game_id: int) -> GameSession:
+        """Return the :class:`GameSession` driving ``game_id``."""
+        engine = self.get_engine(game_id)
+        session = self._sessions.get(game_id)
+        if session is None or session.engine is not engine:
+            session = self._sessions[game_id] = GameSession(engine)
+        return session
+
+    def get_state_cache(self, game_id: int) -> StateCache:
+        """Return the serialized-state cache of ``game_id``."""
+        engine = self.get_engine(game_id)
+        cache = self._state_caches.get(game_id)
+        if cache is None or cache.engine is not engine:
+            cache = self._state_caches[game_id] = StateCache(engine)
+        return cache
+
+    def get_bus(self, game_id: int) -> EventBus:
+        """Return the event bus of ``game_id``, attaching one if needed."""
+        engine = self.get_engine(game_id)
+        if engine.event_bus is None or engine.event_bus.log is not engine.event_log:
+            engine.event_bus = EventBus(engine.event_log)
+        return engine.event_bus
+
+    async def subscribe(
+        self, game_id: int, last_seq: int | None = None, *, tile_format: str = "object"
+    ) -> Subscription:
+        """Subscribe the running event loop to the events of ``game_id``.
+
+        ``last_seq`` resumes after the last event a reconnecting client saw;
+        ``tile_format`` selects how tiles are encoded in its messages. The
+        game's lock is taken and the replay encoded in a worker thread, so a
+        busy game does not stall the event loop. The subscriber joins the
+        room under that lock, so no event falls between the replay and the
+        live stream.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.to_thread(
+            self._subscribe, game_id, last_seq, tile_format, loop
+        )
+
+    def _subscribe(
+        self,
+        game_id: int,
+        last_seq: int | None,
+        tile_format: str,
+        loop: asyncio.AbstractEventLoop,
+    ) -> Subscription:
+        with self.get_lock(game_id):
+            self._last_used[game_id] = time.monotonic()
+            return self.get_bus(game_id).subscribe(
+                self.get_session(game_id), last_seq, tile_format=tile_format, loop=loop
+            )
+
+    def broadcast(self, game_id: int, message: dict) -> None:
+        """Send ``message`` to every subscriber of ``game_id``."""
+        with self.get_lock(game_id):
+            self.get_bus(game_id).publish([message])
+
+    def start_ai(
+        self,
+        game_id: int,
+        seats: Iterable[int],
+        *,
+        ai_type: str = "simple",
+        delay: float = 0.0,
+    ) -> AIDriver:
+        """Let the server play ``seats`` of ``game_id`` in the running loop.
+
+        Any driver already running for the game is replaced.
+        """
+        self.get_engine(game_id)
+        driver = AIDriver(self, game_id, seats, ai_type=ai_type, delay=delay)
+        previous = self._drivers.get(game_id)
+        if previous is not None:
+            previous.stop()
+        self._drivers[game_id] = driver
+        if self.store is not None:
+            self.store.set_ai(
+                game_id,
+                {"seats": sorted(driver.seats), "ai_type": ai_type, "delay": delay},
+            )
+        driver.start()
+        return driver
+
+    def get_driver(self, game_id: int) -> AIDriver | None:
+        """Return the AI driver of ``game_id`` if its seats are server-played."""
+        return self._drivers.get(game_id)
+
+    def _persist(self, game_id: int, engine: MahjongEngine) -> None:
+        # hand the actions journaled under the lock to the store, taking a
+        # snapshot every ``snapshot_every`` actions
+        store = self.store
+        if store is None or not engine.journal:
+            return
+        lines = engine.journal[:]
+        engine.journal.clear()
+        seq = self._journal_seq.get(game_id, 0)
+        store.append(game_id, seq + 1, lines)
+        seq = self._journal_seq[game_id] = seq + len(lines)
+        if seq - self._snapshot_seq.get(game_id, 0) >= store.snapshot_every:
+            store.save_snapshot(game_id, seq, engine)
+            self._snapshot_seq[game_id] = seq
+
+    async def run_store_flusher(self, interval: float) -> None:
+        """Commit the store's queued writes every ``interval`` seconds."""
+        if self.store is None:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.store.flush)
+
+    def _flush(self, game_id: int) -> None:
+        bus = self.get_engine(game_id).event_bus
+        if bus is not None:
+            bus.flush(self.get_session(game_id))
+
+    def get_lock(self, game_id: int) -> threading.RLock:
+        """Return the lock guarding ``game_id``."""
+        self.get_engine(game_id)
+        return self._locks.setdefault(game_id, threading.RLock())
+
     def get_state(self, game_id: int) -> GameState:
         return self.get_engine(game_id).state
 
     def pop_events(self, game_id: int) -> list[GameEvent]:
         engine = self.get_engine(game_id)
-        events = engine.events[:]
-        engine.events.clear()
-        return events
+        with self.get_lock(game_id):
+            return engine.pop_events()
 
     @contextmanager
-    def use_engine(self, game_id: int) -> Iterator[None]:
-        engine = self.get_engine(game_id)
-        prev = api._engine
-        api._engine = engine
-        try:
-            yield
-        finally:
-            api._engine = prev
+    def use_engine(self, game_id: int) -> Iterator[GameSession]:
+        """Hold the lock for ``game_id`` and bind its session to ``core.api``.
+
+        The binding is local to the calling thread or task; the engine of
+        ``core.api``'s single-game mode is left untouched.
+        """
+        session = self.get_session(game_id)
+        with self.get_lock(game_id), api.bind_session(session):
+            if self._engines.get(game_id) is not session.engine:
+                # removed while waiting for the lock
+                raise KeyError(game_id)
+            self._last_used[game_id] = time.monotonic()
+            version = session.engine.state_version
+            try:
+                yield session
+            finally:
+                self._persist(game_id, session.engine)
+                self._flush(game_id)
+                driver = self._drivers.get(game_id)
+                if driver is not None and session.engine.state_version != version:
+                    driver.notify()
 
     def record_next_actions(self, game_id: int, player_index: int, actions: list[str]) -> None:
         engine = self.get_engine(game_id)
         payload = {"player_index": player_index, "actions": actions}
-        last = engine.event_history[-1] if engine.event_history else None
-        if (
-            last is None
-            or last.name != "next_actions"
-            or last.payload.get("player_index") != player_index
-            or last.payload.get("actions") != actions
-        ):
-            evt = GameEvent(name="next_actions", payload=payload)
-            engine.events.append(evt)
-            engine.event_history.append(evt)
+        with self.get_lock(game_id):
+            last = engine.event_history[-1] if engine.event_history else None
+            if (
+                last is None
+                or last.name != "next_actions"
+                or last.payload.get("player_index") != player_index
+                or last.payload.get("actions") != actions
+            ):
+                evt = GameEvent(name="next_actions", payload=payload)
+                self._append_event(game_id, engine, evt)
 
     def record_error(self, game_id: int, message: str) -> None:
         """Record an error event for ``game_id``."""
         engine = self.get_engine(game_id)
         evt = GameEvent(name="error", payload={"message": message})
-        engine.events.append(evt)
-        engine.event_history.append(evt)
+        with self.get_lock(game_id):
+            self._append_event(game_id, engine, evt)
+
+    def _append_event(self, game_id: int, engine: MahjongEngine, evt: GameEvent) -> None:
+        engine.append_event(evt)
+        self._flush(game_id)
+
+    def remove_game(self, game_id: int) -> bool:
+        """Stop and forget ``game_id``, archiving it first if configured.
+
+        Its AI driver is stopped and its subscribers are closed. Returns
+        ``False`` if the game is not managed.
+        """
+        try:
+            lock = self.get_lock(game_id)
+        except KeyError:
+            return False
+        with lock:
+            engine = self._engines.get(game_id)
+            if engine is None:
+                return False
+            if self.archive_dir is not None:
+                try:
+                    self.archive_game(game_id)
+                except OSError:
+                    # losing the archive beats keeping every game in memory
+                    self.counters["archive_errors"] += 1
+            if self.store is not None:
+                self.store.remove_game(game_id)
+            with self._games_lock:
+                self._engines.pop(game_id, None)
+                self._last_used.pop(game_id, None)
+            for table in (
+                self._sessions,
+                self._state_caches,
+                self._journal_seq,
+                self._snapshot_seq,
+            ):
+                table.pop(game_id, None)
+            driver = self._drivers.pop(game_id, None)
+            if driver is not None:
+                driver.stop()
+            if engine.event_bus is not None:
+                engine.event_bus.close()
+            self._locks.pop(game_id, None)
+        self.counters["removed"] += 1
+        return True
+
+    def archive_game(self, game_id: int) -> Path:
+        """Write the MJAI log of ``game_id`` to ``archive_dir``.
+
+        Files are named after the game id and the time of archiving, so
+        games of earlier server runs are never overwritten.
+        """
+        if self.archive_dir is None:
+            raise ValueError("No archive_dir configured")
+        with self.get_lock(game_id):
+            text = self.get_session(game_id).get_mjai_log()
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        path = self.archive_dir / f"game-{game_id}-{stamp}.mjai.jsonl"
+        path.write_text(text + "\n", encoding="utf-8")
+        self.counters["archived"] += 1
+        return path
+
+    def sweep(self, now: float | None = None) -> list[int]:
+        """Remove finished, idle and surplus games and return their ids.
+
+        ``now`` is a :func:`time.monotonic` timestamp, the current time by
+        default.
+        """
+        if now is None:
+            now = time.monotonic()
+        removed: list[int] = []
+        for game_id, engine, last_used in self._games():
+            idle = now - last_used
+            if engine.is_game_over:
+                reason = "finished" if _expired(idle, self.finished_ttl) else None
+            elif _expired(idle, self.idle_ttl) and not _watched(engine):
+                reason = "idle"
+            else:
+                reason = None
+            if reason is not None and self.remove_game(game_id):
+                self.counters[f"evicted_{reason}"] += 1
+                removed.append(game_id)
+        if self.max_games is not None:
+            removed.extend(self._evict_lru(self.max_games))
+        return removed
+
+    async def run_sweeper(self, interval: float) -> None:
+        """Call :meth:`sweep` every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.sweep)
+
+    def stats(self) -> dict[str, int | float | None]:
+        """Return the number of live games, the limits and the counters."""
+        return {
+            "live": len(self._engines),
+            "max_games": self.max_games,
+            "idle_ttl": self.idle_ttl,
+            "finished_ttl": self.finished_ttl,
+            **{
+                key: self.counters[key]
+                for key in (
+                    "created",
+                    "removed",
+                    "evicted_idle",
+                    "evicted_finished",
+                    "evicted_lru",
+                    "archived",
+                    "archive_errors",
+                    "recovered",
+                )
+            },
+        }
+
+    def _games(self) -> list[tuple[int, MahjongEngine, float]]:
+        # (id, engine, last use) of every game, taken under the games lock
+        with self._games_lock:
+            return [
+                (game_id, engine, self._last_used.get(game_id, 0.0))
+                for game_id, engine in self._engines.items()
+            ]
+
+    def _evict_lru(self, limit: int, keep: int | None = None) -> list[int]:
+        # watched games are never evicted, so the cap may be exceeded while
+        # every game beyond it has a subscriber
+        games = self._games()
+        excess = len(games) - limit
+        if excess <= 0:
+            return []
+        candidates = sorted(
+            (last_used, game_id)
+            for game_id, engine, last_used in games
+            if game_id != keep and not _watched(engine)
+        )
+        removed: list[int] = []
+        for _, game_id in candidates[:excess]:
+            if self.remove_game(game_id):
+                self.counters["evicted_lru"] += 1
+                removed.append(game_id)
+        return removed
+
+
+def _expired(idle: float, ttl: float | None) -> bool:
+    return ttl is not None and idle >= ttl
+
+
+def _watched(engine: MahjongEngine) -> bool:
+    return engine.event_bus is not None and len(engine.event_bus) > 0
@@ -0,0 +1,242 @@
+"""Per-game publish/subscribe bus delivering engine events to asyncio tasks.
+
+The bus follows the engine's :class:`~core.event_log.EventLog` through its
+own cursor while it has subscribers. Whoever holds the game's lock calls
+:meth:`EventBus.flush` once the action has finished, which reads the new
+events, turns them into messages, derives the claim
+and allowed-action updates once for all subscribers and hands the batch to
+each subscriber's queue. The subscribers of a bus form the game's room:
+every message is encoded to JSON text once with
+:func:`core.serialization.dumps` and the same string is queued for each of
+them. Subscribers asking for a compact tile format share one encoding per
+format.
+
+Flushing may happen on any thread; messages are delivered through
+``loop.call_soon_threadsafe`` so subscribers simply await
+:meth:`Subscription.get` in their own event loop. Each subscriber has its
+own queue, so a slow client only delays itself; one that falls more than
+``max_pending`` messages behind is closed.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any
+
+from . import serialization
+from .event_log import EventCursor, EventLog
+
+if TYPE_CHECKING:
+    from .session import GameSession
+
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_REPLAY = 256
+
+
+class Subscription:
+    """Queue of messages for one subscriber of an :class:`EventBus`."""
+
+    def __init__(
+        self,
+        bus: EventBus,
+        loop: asyncio.AbstractEventLoop,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        tile_format: str = "object",
+    ) -> None:
+        self._bus = bus
+        self._loop = loop
+        self.tile_format = tile_format
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue()
+        self._max_pending = max_pending
+        self.closed = False
+
+    def put(self, messages: list[str]) -> None:
+        """Queue encoded ``messages`` from any thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._extend, messages)
+        except RuntimeError:
+            # the subscriber's loop has shut down
+            self.close()
+
+    def _extend(self, messages: list[str]) -> None:
+        if self.closed:
+            return
+        if self._queue.qsize() + len(messages) > self._max_pending:
+            # the client cannot keep up; drop it rather than buffer forever
+            self.close()
+            return
+        for message in messages:
+            self._queue.put_nowait(message)
+
+    async def get(self) -> str | None:
+        """Return the next encoded message, or ``None`` once closed."""
+        if self.closed and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+    def close(self) -> None:
+        """Stop receiving messages and wake a pending :meth:`get`."""
+        if self.closed:
+            return
+        self.closed = True
+        self._bus._remove(self)
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        except RuntimeError:
+            pass
+
+
+class EventBus:
+    """Fan out one game's events to its subscribers.
+
+    The bus reads ``log`` only while someone is subscribed. A subscriber
+    joining an idle bus first receives the retained events the bus has not
+    published yet, so the first client still sees the events emitted before
+    it connected. A reconnecting client instead names the last sequence
+    number it saw and receives only what it missed, or a single ``snapshot``
+    message when more than ``max_replay`` events are missing or no longer
+    retained.
+    """
+
+    def __init__(
+        self,
+        log: EventLog,
+        *,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_replay: int = DEFAULT_MAX_REPLAY,
+    ) -> None:
+        self.log = log
+        self.max_pending = max_pending
+        self.max_replay = max_replay
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+        self._cursor: EventCursor | None = None
+        self._published = 0
+        self._last_actions: list[list[str]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self,
+        session: GameSession,
+        last_seq: int | None = None,
+        *,
+        tile_format: str = "object",
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> Subscription:
+        """Attach a subscriber running in ``loop``, by default the current one.
+
+        The subscriber first receives the allowed actions of every player,
+        followed by the events after ``last_seq``. Without ``last_seq`` these
+        are the events the bus has not published yet. Its messages are
+        encoded with ``tile_format``. Call with the game's lock held; pass
+        ``loop`` when calling from another thread so the loop is not blocked
+        while the replay is built.
+        """
+        if tile_format not in serialization.TILE_FORMATS:
+            raise ValueError(f"Unknown tile format: {tile_format}")
+        # bring existing subscribers up to date so the replay below ends
+        # exactly where their stream continues
+        self.flush(session)
+        log = self.log
+        start = self._published if last_seq is None else last_seq
+        actions = session.get_all_allowed_actions()
+        self._last_actions = actions
+        messages: list[Any] = [_message("allowed_actions", {"actions": actions})]
+        if (
+            start < log.first_seq - 1
+            or start > log.last_seq
+            or log.last_seq - start > self.max_replay
+        ):
+            messages.append(
+                _message(
+                    "snapshot",
+                    {"seq": log.last_seq, "state": session.get_state()},
+                )
+            )
+        else:
+            messages.extend(log.since(start))
+        subscription = Subscription(
+            self, loop or asyncio.get_running_loop(), self.max_pending, tile_format
+        )
+        subscription.put(
+            [serialization.dumps(m, tile_format=tile_format) for m in messages]
+        )
+        with self._lock:
+            self._subscribers.append(subscription)
+            if self._cursor is None:
+                self._cursor = log.cursor()
+        self._published = log.last_seq
+        return subscription
+
+    def _remove(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if not self._subscribers and self._cursor is not None:
+                # stop holding events back while nobody is listening
+                self._cursor.close()
+                self._cursor = None
+
+    def close(self) -> None:
+        """Close every subscription, ending their streams."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.close()
+
+    def publish(self, messages: list[Any]) -> None:
+        """Encode ``messages`` once and queue them for every subscriber."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        _fan_out(subscribers, messages)
+
+    def flush(self, session: GameSession) -> None:
+        """Publish staged events and the updates derived from them.
+
+        After a ``discard`` the claim options and allowed actions of every
+        player are sent; after the batch the allowed actions are sent again
+        if they changed. Call with the game's lock held.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+            if self._cursor is None:
+                return
+            events = self._cursor.read()
+            self._published = self._cursor.position
+        if not events:
+            return
+        messages: list[Any] = []
+        for event in events:
+            messages.append(event)
+            if event.name == "round_end":
+                self._last_actions = None
+            elif event.name == "discard":
+                claims = session.get_claim_options()
+                actions = session.get_all_allowed_actions()
+                messages.append(_message("claims", {"claims": claims}))
+                messages.append(_message("allowed_actions", {"actions": actions}))
+                self._last_actions = actions
+        actions = session.get_all_allowed_actions()
+        if actions != self._last_actions:
+            self._last_actions = actions
+            messages.append(_message("allowed_actions", {"actions": actions}))
+        _fan_out(subscribers, messages)
+
+
+def _fan_out(subscribers: list[Subscription], messages: list[Any]) -> None:
+    # encode once per tile format rather than once per subscriber
+    encoded: dict[str, list[str]] = {}
+    for subscription in subscribers:
+        tile_format = subscription.tile_format
+        batch = encoded.get(tile_format)
+        if batch is None:
+            batch = encoded[tile_format] = [
+                serialization.dumps(m, tile_format=tile_format) for m in messages
+            ]
+        subscription.put(batch)
+
+
+def _message(name: str, payload: dict[str, Any]) -> dict[str, Any]:
+    return {"name": name, "payload": payload}
@@ -0,0 +1,116 @@
+"""Append-only, sequence-numbered event log with independent consumers.
+
+Every event emitted by the engine is appended with the next sequence number.
+Consumers never remove events; each one reads through its own
+:class:`EventCursor`, or asks for :meth:`EventLog.since` a sequence number it
+already has, so any number of sockets, watchers and recorders can follow a
+game without stealing each other's events.
+
+Events are retained until every open cursor has read them, and beyond that
+only the newest ``retain`` events are kept for :meth:`EventLog.since`
+readers. A game nobody is watching therefore holds a bounded number of
+events. Sequence numbers start at 1 and are never reused, even when an
+action is rolled back and its events are dropped.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+
+from .models import GameEvent
+
+DEFAULT_RETAIN = 512
+
+
+class EventCursor:
+    """Read position of one consumer in an :class:`EventLog`."""
+
+    def __init__(self, log: EventLog, position: int) -> None:
+        self._log = log
+        self.position = position
+        self.closed = False
+
+    def pending(self) -> list[GameEvent]:
+        """Return the events after the cursor without advancing it."""
+        return self._log.since(self.position)
+
+    def read(self) -> list[GameEvent]:
+        """Return the events after the cursor and advance past them."""
+        events = self._log.since(self.position)
+        self.position = self._log.last_seq
+        return events
+
+    def close(self) -> None:
+        """Release the cursor so its unread events may be trimmed."""
+        if not self.closed:
+            self.closed = True
+            self._log._cursors.remove(self)
+
+
+class EventLog:
+    """Sequence-numbered events shared by any number of consumers."""
+
+    def __init__(self, retain: int = DEFAULT_RETAIN) -> None:
+        self.retain = retain
+        self._events: list[GameEvent] = []
+        self._seqs: list[int] = []
+        self._cursors: list[EventCursor] = []
+        self.last_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained event."""
+        return self._seqs[0] if self._seqs else self.last_seq + 1
+
+    def append(self, event: GameEvent) -> int:
+        """Add ``event``, stamp its ``seq`` and return the sequence number."""
+        self.last_seq += 1
+        event.seq = self.last_seq
+        self._events.append(event)
+        self._seqs.append(self.last_seq)
+        if len(self._events) >= 2 * self.retain:
+            self._trim()
+        return self.last_seq
+
+    def since(self, seq: int) -> list[GameEvent]:
+        """Return the retained events numbered after ``seq``.
+
+        Callers can tell that older events were trimmed when ``seq`` is
+        below ``first_seq - 1``.
+        """
+        return self._events[bisect_right(self._seqs, seq):]
+
+    def truncate(self, seq: int) -> None:
+        """Drop the events numbered after ``seq``.
+
+        Used when an action is rolled back or undone. The dropped numbers
+        are not handed out again.
+        """
+        index = bisect_right(self._seqs, seq)
+        del self._events[index:]
+        del self._seqs[index:]
+
+    def cursor(self, position: int | None = None) -> EventCursor:
+        """Open a cursor after ``position``, defaulting to the newest event."""
+        cursor = EventCursor(self, self.last_seq if position is None else position)
+        self._cursors.append(cursor)
+        return cursor
+
+    def copy(self) -> EventLog:
+        """Return a log with the same events and numbering but no cursors."""
+        log = EventLog(self.retain)
+        log._events = self._events.copy()
+        log._seqs = self._seqs.copy()
+        log.last_seq = self.last_seq
+        return log
+
+    def _trim(self) -> None:
+        keep_from = len(self._events) - self.retain
+        if self._cursors:
+            slowest = min(c.position for c in self._cursors)
+            keep_from = min(keep_from, bisect_right(self._seqs, slowest))
+        if keep_from > 0:
+            del self._events[:keep_from]
+            del self._seqs[:keep_from]
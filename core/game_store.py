@@ -0,0 +1,230 @@
+"""Durable storage of managed games in a local SQLite database.
+
+A game is stored as the arguments that created it, including the seed of
+its walls, followed by the journal of its actions (see :mod:`core.journal`).
+Every ``snapshot_every`` actions a pickled copy of the engine replaces the
+previous snapshot and the journal lines it covers are deleted, so rebuilding
+a game never replays more than that many actions.
+
+Writes are queued in memory and committed together: :meth:`GameStore.flush`
+runs once ``batch_size`` writes are waiting and whenever the owner calls it,
+for instance from a timer. The database runs in WAL mode with full
+synchronisation, so each commit is a single fsync. Writes still queued when
+the process dies are lost; everything committed is recovered.
+
+Snapshots are pickles of the engine, so a database must only be opened by
+the code that wrote it, and only if it is trusted.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from . import journal
+from .mahjong_engine import MahjongEngine
+from .session import GameSession
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_SNAPSHOT_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    players TEXT NOT NULL,
+    max_rounds INTEGER NOT NULL,
+    seed TEXT NOT NULL,
+    ai TEXT
+);
+CREATE TABLE IF NOT EXISTS actions (
+    game_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    call TEXT NOT NULL,
+    PRIMARY KEY (game_id, seq)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    engine BLOB NOT NULL
+);
+"""
+
+
+@dataclass
+class StoredGame:
+    """A game rebuilt from the store.
+
+    ``seq`` is the number of journal lines applied to ``engine`` and ``ai``
+    the keyword arguments of :meth:`EngineManager.start_ai`, if any.
+    """
+
+    game_id: int
+    engine: MahjongEngine
+    seq: int
+    snapshot_seq: int
+    ai: dict[str, Any] | None = None
+
+
+class GameStore:
+    """Journal and snapshots of games in the SQLite database at ``path``.
+
+    The store may be shared by threads; its methods serialize themselves.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        # _lock guards the queue, _db_lock the connection, so actions can
+        # be queued while a batch is being committed
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending: list[tuple[str, tuple[Any, ...]]] = []
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def add_game(
+        self, game_id: int, players: list[str], max_rounds: int, seed: int
+    ) -> None:
+        """Queue a new game created with these arguments."""
+        # seeds are 64-bit and SQLite integers signed, so store the text
+        self._queue(
+            "INSERT OR REPLACE INTO games (id, players, max_rounds, seed) VALUES (?, ?, ?, ?)",
+            (game_id, json.dumps(players, ensure_ascii=False), max_rounds, str(seed)),
+        )
+        # remembered beyond the removal of the game so ids are never reused
+        self._queue(
+            "INSERT INTO meta (key, value) VALUES ('last_id', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (game_id,),
+        )
+
+    def set_ai(self, game_id: int, ai: dict[str, Any] | None) -> None:
+        """Queue the server-played seats of ``game_id``."""
+        self._queue(
+            "UPDATE games SET ai = ? WHERE id = ?",
+            (json.dumps(ai) if ai is not None else None, game_id),
+        )
+
+    def append(self, game_id: int, seq: int, lines: list[str]) -> None:
+        """Queue journal ``lines`` numbered from ``seq`` onwards."""
+        for offset, line in enumerate(lines):
+            self._queue(
+                "INSERT OR REPLACE INTO actions (game_id, seq, call) VALUES (?, ?, ?)",
+                (game_id, seq + offset, line),
+            )
+
+    def save_snapshot(self, game_id: int, seq: int, engine: MahjongEngine) -> None:
+        """Queue a snapshot of ``engine`` after journal line ``seq``.
+
+        Call with the game's lock held; the engine is pickled right away.
+        """
+        blob = zlib.compress(pickle.dumps(engine, pickle.HIGHEST_PROTOCOL))
+        self._queue(
+            "INSERT OR REPLACE INTO snapshots (game_id, seq, engine) VALUES (?, ?, ?)",
+            (game_id, seq, blob),
+        )
+        self._queue("DELETE FROM actions WHERE game_id = ? AND seq <= ?", (game_id, seq))
+
+    def remove_game(self, game_id: int) -> None:
+        """Queue the removal of everything stored for ``game_id``."""
+        for table, column in (("games", "id"), ("actions", "game_id"), ("snapshots", "game_id")):
+            self._queue(f"DELETE FROM {table} WHERE {column} = ?", (game_id,))
+
+    def flush(self) -> int:
+        """Commit the queued writes in one transaction; return their number."""
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            self._db.execute("BEGIN")
+            try:
+                for sql, params in pending:
+                    self._db.execute(sql, params)
+                self._db.execute("COMMIT")
+            except BaseException:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                with self._lock:
+                    self._pending[:0] = pending
+                raise
+        return len(pending)
+
+    def close(self) -> None:
+        """Flush the queued writes and close the database."""
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def last_id(self) -> int:
+        """Return the highest game id ever stored, or 0."""
+        self.flush()
+        with self._db_lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_id'").fetchone()
+        return row[0] if row is not None else 0
+
+    def load(self) -> Iterator[StoredGame]:
+        """Rebuild every stored game from its snapshot and journal.
+
+        Games without a snapshot are replayed from the start.
+        """
+        self.flush()
+        with self._db_lock:
+            games = self._db.execute(
+                "SELECT id, players, max_rounds, seed, ai FROM games ORDER BY id"
+            ).fetchall()
+        for game_id, players, max_rounds, seed, ai in games:
+            yield self._load_game(game_id, json.loads(players), max_rounds, int(seed), ai)
+
+    def _load_game(
+        self, game_id: int, players: list[str], max_rounds: int, seed: int, ai: str | None
+    ) -> StoredGame:
+        with self._db_lock:
+            snapshot = self._db.execute(
+                "SELECT seq, engine FROM snapshots WHERE game_id = ?", (game_id,)
+            ).fetchone()
+            start = snapshot[0] if snapshot is not None else 0
+            lines = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT call FROM actions WHERE game_id = ? AND seq > ? ORDER BY seq",
+                    (game_id, start),
+                )
+            ]
+        if snapshot is not None:
+            engine = pickle.loads(zlib.decompress(snapshot[1]))
+        else:
+            engine = GameSession.start(players, max_rounds=max_rounds, seed=seed).engine
+        count = journal.replay(engine, lines)
+        return StoredGame(
+            game_id,
+            engine,
+            start + count,
+            start,
+            json.loads(ai) if ai is not None else None,
+        )
+
+    def _queue(self, sql: str, params: tuple[Any, ...]) -> None:
+        with self._lock:
+            self._pending.append((sql, params))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
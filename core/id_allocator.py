@@ -0,0 +1,78 @@
+"""Game ids shared by several processes through a local SQLite file.
+
+When games are spread over worker processes, each worker owns the ids of
+one shard: game ``n`` belongs to shard :func:`shard_of` ``(n, shards)``, so
+anyone can tell the owner of a game from its id alone. :class:`IdAllocator`
+hands out the next unused id of a shard. Every process opening the same
+file shares the counters, so a router and the workers may allocate ids
+concurrently and ids are never reused, also across restarts.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def shard_of(game_id: int, shards: int) -> int:
+    """Return the shard owning ``game_id`` out of ``shards``."""
+    return (game_id - 1) % shards
+
+
+class IdAllocator:
+    """Allocate game ids for ``shards`` shards from the database at ``path``.
+
+    The number of shards is stored with the counters; opening the file with
+    a different number raises ``ValueError``, since the ids already handed
+    out would move to other shards.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], shards: int = 1) -> None:
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.path = path
+        self.shards = shards
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('shards', ?)", (shards,)
+        )
+        (stored,) = self._db.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()
+        if stored != shards:
+            self._db.close()
+            raise ValueError(f"{path} allocates ids for {stored} shards, not {shards}")
+
+    def allocate(self, shard: int = 0) -> int:
+        """Return the next id owned by ``shard``."""
+        if not 0 <= shard < self.shards:
+            raise ValueError(f"Shard out of range: {shard}")
+        with self._lock:
+            # the first id of a shard is shard + 1, then every shards-th id;
+            # fetching every row ends the statement and its transaction
+            [(game_id,)] = self._db.execute(
+                "INSERT INTO shards (shard, last_id) VALUES (?, ?) "
+                "ON CONFLICT (shard) DO UPDATE SET last_id = last_id + ? "
+                "RETURNING last_id",
+                (shard, shard + 1, self.shards),
+            ).fetchall()
+        return game_id
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,109 @@
+"""Record the actions applied to an engine so they can be replayed.
+
+While :attr:`MahjongEngine.journal` is a list, every successful call of a
+public engine action is appended to it as a line of JSON naming the method
+and its arguments. Together with the engine's ``seed`` and a copy of the
+engine taken at any point, the lines rebuild the game exactly:
+:func:`replay` applies them to the copy in order.
+
+Actions called by other actions, such as the ``start_kyoku`` run by
+``advance_hand``, are not recorded since replaying the outer call repeats
+them. A call that raises is not recorded either, and an
+:meth:`~core.mahjong_engine.MahjongEngine.atomic` block that is rolled back
+drops the lines of its actions.
+
+Tile arguments that are objects of the engine's state are recorded by
+their position, because the engine tells tiles apart by identity, for
+example when the riichi player discards the drawn tile. Other tiles are
+recorded by suit, value and id.
+"""
+from __future__ import annotations
+
+import json
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Iterable, TypeVar
+
+from .models import Tile
+
+if TYPE_CHECKING:
+    from .mahjong_engine import MahjongEngine
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def journaled(method: F) -> F:
+    """Record successful outermost calls of an engine method."""
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        journal: list[str] | None = self.journal
+        if journal is None or self._journal_depth:
+            return method(self, *args, **kwargs)
+        # encode first: tile positions refer to the state before the call
+        line = encode_call(self, name, args, kwargs)
+        self._journal_depth += 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._journal_depth -= 1
+        journal.append(line)
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+def encode_call(engine: MahjongEngine, name: str, args: Iterable[Any], kwargs: dict[str, Any]) -> str:
+    """Return the journal line for ``engine.name(*args, **kwargs)``."""
+    call: dict[str, Any] = {"m": name, "a": [_encode(engine, a) for a in args]}
+    if kwargs:
+        call["k"] = {k: _encode(engine, v) for k, v in kwargs.items()}
+    return json.dumps(call, separators=(",", ":"), ensure_ascii=False)
+
+
+def apply_call(engine: MahjongEngine, line: str) -> Any:
+    """Apply the journal ``line`` to ``engine`` and return the result."""
+    call = json.loads(line)
+    args = [_decode(engine, a) for a in call["a"]]
+    kwargs = {k: _decode(engine, v) for k, v in call.get("k", {}).items()}
+    return getattr(engine, call["m"])(*args, **kwargs)
+
+
+def replay(engine: MahjongEngine, lines: Iterable[str]) -> int:
+    """Apply every journal line to ``engine`` and return how many there were."""
+    count = 0
+    for line in lines:
+        apply_call(engine, line)
+        count += 1
+    return count
+
+
+def _encode(engine: MahjongEngine, value: Any) -> Any:
+    if isinstance(value, Tile):
+        state = engine.state
+        if value is state.last_discard:
+            return {"ref": ["last_discard"]}
+        for seat, player in enumerate(state.players):
+            for index, tile in enumerate(player.hand.tiles):
+                if tile is value:
+                    return {"ref": ["hand", seat, index]}
+        return {"tile": [value.suit, value.value, value.tile_id]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(engine, v) for v in value]
+    return value
+
+
+def _decode(engine: MahjongEngine, value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(engine, v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "tile" in value:
+        suit, number, tile_id = value["tile"]
+        tile = Tile(suit, number)
+        tile.tile_id = tile_id
+        return tile
+    ref = value["ref"]
+    if ref[0] == "last_discard":
+        return engine.state.last_discard
+    return engine.state.players[ref[1]].hand.tiles[ref[2]]
@@ -1,17 +1,22 @@
 """Mahjong game engine wrapper."""
 from __future__ import annotations
 
-from copy import deepcopy
-from .models import GameState, Tile, Meld, GameEvent
+import copy
+import random
+from .models import GameState, Tile, Meld, GameEvent, SUITED
 from .player import Player
 from .actions import CHI, PON, KAN, RIICHI, TSUMO, RON, SKIP
 from .wall import Wall
 from .rules import RuleSet, StandardRuleSet, _tile_to_index
 from .exceptions import InvalidActionError, NotYourTurnError
+from .undo import Transaction, UndoLog, atomic, undoable
+from .event_bus import EventBus
+from .event_log import EventLog
+from .journal import journaled
 from mahjong.shanten import Shanten
 from mahjong.hand_calculating.hand_response import HandResponse
 from dataclasses import asdict
-from typing import Any
+from typing import Any, ContextManager
 
 
 def _hand_response_dict(resp: HandResponse) -> dict[str, Any]:
@@ -37,9 +42,15 @@ def _round_wind(round_number: int) -> str:
 class MahjongEngine:
     """Simplified engine that wraps the `mahjong` library."""
 
-    def __init__(self, ruleset: RuleSet | None = None, *, max_rounds: int = 8) -> None:
+    def __init__(
+        self, ruleset: RuleSet | None = None, *, max_rounds: int = 8, seed: int | None = None
+    ) -> None:
         self.ruleset: RuleSet = ruleset or StandardRuleSet()
-        self.state = GameState(wall=Wall())
+        # every wall of the game is shuffled by ``rng``, so the seed and the
+        # journal of actions are enough to replay the game
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.state = GameState(wall=Wall(rng=self.rng))
         wall = self.state.wall
         assert wall is not None
         self.state.dora_indicators = wall.dora_indicators.copy()
@@ -48,18 +59,68 @@ class MahjongEngine:
         self.state.max_rounds = max_rounds
         self.state.players = [Player(name=f"Player {i}") for i in range(4)]
         self.state.current_player = 0
-        self.events: list[GameEvent] = []
+        self.event_log = EventLog()
         self.event_history: list[GameEvent] = []
-        self._cached_allowed_actions: list[list[str]] | None = None
+        self._record_events = True
+        # bumped on every change to ``state``, see ``touch``
+        self.state_version = 0
+        # last seq returned by ``pop_events``; unlike a cursor it never keeps
+        # events from being trimmed
+        self._popped_seq: int | None = None
+        # set by EngineManager so events reach WebSocket subscribers
+        self.event_bus: EventBus | None = None
+        # set by EngineManager to record actions, see ``core.journal``
+        self.journal: list[str] | None = None
+        self._journal_depth = 0
+        self._undo = UndoLog()
+        # per-seat (key, actions) pairs, see ``_allowed_actions_key``
+        self._allowed_actions_cache: list[tuple[tuple, list[str]] | None] = []
         self._claims_open = False
         self.game_over = False
         self._final_state: GameState | None = None
-        self._emit("start_game", {"state": deepcopy(self.state)})
+        self._emit("start_game", {"state": self.state.snapshot()})
         self.start_kyoku(dealer=0, round_number=1)
 
     def _invalidate_cache(self) -> None:
-        """Clear cached allowed actions."""
-        self._cached_allowed_actions = None
+        """Clear cached allowed actions for every seat."""
+        self._allowed_actions_cache = [None] * len(self.state.players)
+
+    def fork(self, *, with_events: bool = True) -> MahjongEngine:
+        """Return an independent engine continuing from the current state.
+
+        Hands, melds, rivers and the wall are copied as new containers that
+        share the immutable :class:`Tile` objects, and the ruleset is shared,
+        so forking is much cheaper than ``copy.deepcopy``. With
+        ``with_events=False`` the fork starts with no events and records none,
+        which suits throwaway search trees.
+        """
+        engine = copy.copy(self)
+        engine.state = self.state.snapshot()
+        if self._final_state is not None:
+            engine._final_state = self._final_state.snapshot()
+        if with_events:
+            engine.event_log = self.event_log.copy()
+            engine.event_history = self.event_history.copy()
+        else:
+            engine._popped_seq = None
+            engine.event_log = EventLog()
+            engine.event_history = []
+            engine._record_events = False
+        engine.event_bus = None
+        engine.journal = None
+        engine.rng = random.Random()
+        engine.rng.setstate(self.rng.getstate())
+        engine._undo = UndoLog()
+        engine._invalidate_cache()
+        return engine
+
+    def __getstate__(self) -> dict[str, Any]:
+        # pickled engines keep their undo log but not their consumers
+        state = self.__dict__.copy()
+        state["event_log"] = self.event_log.copy()
+        state["event_bus"] = None
+        state["journal"] = None
+        return state
 
     def _draw_replacement_tile(self, player: Player, player_index: int) -> None:
         """Draw a replacement tile from the dead wall and reveal new dora.
@@ -70,8 +131,9 @@ class MahjongEngine:
         assert self.state.wall is not None
         if not self.state.wall.dead_wall:
             return
-        tile = self.state.wall.dead_wall.pop(0)
+        tile = self._undo.pop(self.state.wall.dead_wall, 0)
         player.draw(tile)
+        self._undo.appended(player.hand.tiles)
         try:
             player_index = next(i for i, p in enumerate(self.state.players) if p is player)
         except StopIteration:  # pragma: no cover - should not happen
@@ -81,26 +143,28 @@ class MahjongEngine:
             {"player_index": player_index, "tile": tile, "source": "dead_wall", "from_dead_wall": True},
         )
         if self.state.dead_wall:
-            self.state.dead_wall.pop(0)
+            self._undo.pop(self.state.dead_wall, 0)
         # Reveal next dora indicator if available
         if len(self.state.wall.dead_wall) >= 5 + len(self.state.dora_indicators):
             new_dora = self.state.wall.dead_wall[
                 -(5 + len(self.state.dora_indicators))
             ]
             self.state.wall.dora_indicators.append(new_dora)
+            self._undo.appended(self.state.wall.dora_indicators)
             self.state.dora_indicators.append(new_dora)
+            self._undo.appended(self.state.dora_indicators)
         if len(self.state.wall.dead_wall) >= len(self.state.ura_dora_indicators) + 1:
             ura_tile = self.state.wall.dead_wall[-(len(self.state.ura_dora_indicators) + 1)]
             if hasattr(self.state.wall, "ura_dora_indicators"):
                 self.state.wall.ura_dora_indicators.append(ura_tile)
+                self._undo.appended(self.state.wall.ura_dora_indicators)
             self.state.ura_dora_indicators.append(ura_tile)
+            self._undo.appended(self.state.ura_dora_indicators)
 
     def _check_nine_terminals(self, player: Player) -> None:
         """Detect nine terminals/honors and end the hand."""
         unique = set(
-            (t.suit, t.value)
-            for t in player.hand.tiles
-            if t.is_terminal_or_honor()
+            t.kind for t in player.hand.tiles if t.is_terminal_or_honor()
         )
         if len(unique) >= 9:
             self._resolve_ryukyoku("nine_terminals")
@@ -113,21 +177,75 @@ class MahjongEngine:
         tiles = [r[0] for r in rivers]
         if not all(t.suit == "wind" for t in tiles):
             return
-        first_val = tiles[0].value
-        if all(t.value == first_val for t in tiles):
+        first_kind = tiles[0].kind
+        if all(t.kind == first_kind for t in tiles):
             self._resolve_ryukyoku("four_winds")
 
+    def touch(self) -> None:
+        """Mark the state as changed by bumping :attr:`state_version`.
+
+        Engine actions call this themselves; code that edits ``state``
+        directly should call it so cached serializations are refreshed.
+        """
+        self.state_version += 1
+
     def _emit(self, name: str, payload: dict) -> None:
-        evt = GameEvent(name=name, payload=payload)
-        self.events.append(evt)
+        self.state_version += 1
+        if not self._record_events:
+            return
+        self.append_event(GameEvent(name=name, payload=payload))
+
+    def append_event(self, evt: GameEvent) -> int:
+        """Record ``evt`` in the event log and history; return its sequence number."""
         self.event_history.append(evt)
+        return self.event_log.append(evt)
 
     def _close_claims(self) -> None:
         """Emit ``claims_closed`` if a discard claim window was open."""
         if self._claims_open:
-            self._claims_open = False
+            self._undo.set(self, "_claims_open", False)
             self._emit("claims_closed", {})
 
+    def _clear_discard(self) -> None:
+        """Forget the last discard once it has been claimed."""
+        self._undo.remember(
+            self.state, "last_discard", "last_discard_player", "waiting_for_claims"
+        )
+        self.state.last_discard = None
+        self.state.last_discard_player = None
+        self.state.waiting_for_claims = []
+
+    def _truncate_events(self, marks: tuple[int, int]) -> None:
+        """Drop events emitted after ``marks`` (log sequence, history length)."""
+        self.event_log.truncate(marks[0])
+        del self.event_history[marks[1]:]
+
+    @property
+    def can_undo(self) -> bool:
+        """``True`` if there is an action in the current hand to undo."""
+        return len(self._undo) > 0
+
+    def atomic(self) -> ContextManager[Transaction]:
+        """Group the actions run in a ``with`` block into one undo step.
+
+        See :func:`core.undo.atomic`; a failing block leaves the state as it
+        was before the block.
+        """
+        return atomic(self)
+
+    @journaled
+    def undo(self) -> None:
+        """Revert the most recent draw, discard, call, riichi or skip.
+
+        Only actions of the current hand can be undone; starting a new hand
+        or ending the game clears the log. Events emitted by the reverted
+        action are removed and an ``undo`` event is emitted instead.
+        """
+        if not self._undo:
+            raise InvalidActionError("Nothing to undo")
+        self._truncate_events(self._undo.undo())
+        self._emit("undo", {})
+
     def _is_tenpai(self, player: Player) -> bool:
         """Return True if ``player`` is in tenpai."""
         from .shanten_quiz import is_tenpai
@@ -154,19 +272,40 @@ class MahjongEngine:
         )
         self.advance_hand(None)
 
+    @property
+    def events(self) -> list[GameEvent]:
+        """Events not yet returned by :meth:`pop_events`."""
+        if self._popped_seq is None:
+            return self.event_log.since(self.event_log.first_seq - 1)
+        return self.event_log.since(self._popped_seq)
+
     def pop_events(self) -> list[GameEvent]:
-        events = self.events[:]
-        self.events.clear()
+        """Return the retained events emitted since the previous call.
+
+        The first call returns every retained event. Other consumers of
+        :attr:`event_log` are unaffected, and the log is trimmed as if this
+        method were never called: events trimmed between two calls are not
+        returned.
+        """
+        events = self.events
+        self._popped_seq = self.event_log.last_seq
         return events
 
+    def events_since(self, seq: int) -> list[GameEvent]:
+        """Return the retained events numbered after ``seq``."""
+        return self.event_log.since(seq)
+
     def get_event_history(self) -> list[GameEvent]:
         """Return all events emitted since the engine was created."""
         return self.event_history[:]
 
+    @journaled
     def start_kyoku(self, dealer: int, round_number: int) -> None:
         """Begin a new hand with fresh tiles."""
         self._invalidate_cache()
-        self.state.wall = Wall()
+        # actions of the previous hand can no longer be undone
+        self._undo.clear()
+        self.state.wall = Wall(rng=self.rng)
         wall = self.state.wall
         assert wall is not None
         self.state.dora_indicators = wall.dora_indicators.copy()
@@ -176,6 +315,7 @@ class MahjongEngine:
             p.hand.tiles.clear()
             p.hand.melds.clear()
             p.river.clear()
+            p.discards.clear()
             p.riichi = False
             p.must_tsumogiri = False
             p.ippatsu_available = False
@@ -196,7 +336,7 @@ class MahjongEngine:
         self.deal_initial_hands()
         self._emit(
             "start_kyoku",
-            {"dealer": dealer, "round": round_number, "state": deepcopy(self.state)},
+            {"dealer": dealer, "round": round_number, "state": self.state.snapshot()},
         )
         self._check_nine_terminals(self.state.players[dealer])
 
@@ -224,9 +364,10 @@ class MahjongEngine:
         assert self.state.wall is not None
         return self.state.wall.remaining_yama_tiles
 
+    @journaled
+    @undoable
     def draw_tile(self, player_index: int) -> Tile:
         """Draw a tile for the specified player."""
-        self._invalidate_cache()
         if self.state.waiting_for_claims:
             raise InvalidActionError("Waiting for other players to claim discard")
         if player_index != self.state.current_player:
@@ -237,11 +378,12 @@ class MahjongEngine:
         if len(player.hand.tiles) % 3 != 1:
             raise InvalidActionError("Cannot draw before discarding")
         if player.ippatsu_available:
-            player.ippatsu_available = False
+            self._undo.set(player, "ippatsu_available", False)
         self._check_four_winds()
         assert self.state.wall is not None
-        tile = self.state.wall.draw_tile()
+        tile = self._undo.pop(self.state.wall.tiles)
         player.draw(tile)
+        self._undo.appended(player.hand.tiles)
         self._emit("draw_tile", {"player_index": player_index, "tile": tile})
         if len(player.river) == 0 and not player.hand.melds:
             self._check_nine_terminals(player)
@@ -250,9 +392,10 @@ class MahjongEngine:
         # current_player will advance after the player discards
         return tile
 
+    @journaled
+    @undoable
     def discard_tile(self, player_index: int, tile: Tile) -> None:
         """Discard a tile from the specified player's hand."""
-        self._invalidate_cache()
         if self.state.waiting_for_claims:
             raise InvalidActionError("Waiting for other players to claim discard")
         if player_index != self.state.current_player:
@@ -264,23 +407,35 @@ class MahjongEngine:
             raise InvalidActionError(
                 "Must discard the drawn tile after declaring riichi"
             )
+        self._undo.save(player.hand.tiles)
         try:
             player.discard(tile)
         except ValueError:
             raise InvalidActionError("Tile not in hand")
-        player.must_tsumogiri = False
+        self._undo.appended(player.river)
+        self._undo.appended(player.discards)
+        self._undo.set(player, "must_tsumogiri", False)
         self._emit("discard", {"player_index": player_index, "tile": tile})
-        self.state.current_player = (player_index + 1) % len(self.state.players)
-        self.state.waiting_for_claims = [
-            i for i in range(len(self.state.players)) if i != player_index
+        state = self.state
+        self._undo.remember(
+            state,
+            "current_player",
+            "waiting_for_claims",
+            "last_discard",
+            "last_discard_player",
+        )
+        self._undo.set(self, "_claims_open", True)
+        state.current_player = (player_index + 1) % len(state.players)
+        state.waiting_for_claims = [
+            i for i in range(len(state.players)) if i != player_index
         ]
-        self._claims_open = True
-        self.state.last_discard = tile
-        self.state.last_discard_player = player_index
+        state.last_discard = tile
+        state.last_discard_player = player_index
 
+    @journaled
+    @undoable
     def declare_riichi(self, player_index: int) -> None:
         """Declare riichi for the given player."""
-        self._invalidate_cache()
         from .shanten_quiz import is_tenpai
 
         player = self.state.players[player_index]
@@ -288,8 +443,11 @@ class MahjongEngine:
             raise InvalidActionError("Cannot declare riichi with open melds")
         if not is_tenpai(player.hand.tiles, player.hand.melds):
             raise InvalidActionError("Cannot declare riichi when not in tenpai")
+        self._undo.remember(
+            player, "score", "riichi", "must_tsumogiri", "ippatsu_available"
+        )
         player.declare_riichi()
-        self.state.riichi_sticks += 1
+        self._undo.set(self.state, "riichi_sticks", self.state.riichi_sticks + 1)
         self._emit(
             "riichi",
             {
@@ -317,11 +475,12 @@ class MahjongEngine:
             round_wind=_round_wind(self.state.round_number),
         )
 
+    @journaled
+    @undoable
     def call_chi(self, player_index: int, tiles: list[Tile]) -> None:
         """Form a chi meld using the given tiles."""
-        self._invalidate_cache()
         for p in self.state.players:
-            p.ippatsu_available = False
+            self._undo.set(p, "ippatsu_available", False)
         if len(tiles) != 3:
             raise InvalidActionError("Chi requires three tiles")
 
@@ -337,8 +496,8 @@ class MahjongEngine:
         suit = tiles[0].suit
         if not all(t.suit == suit for t in tiles):
             raise InvalidActionError("Chi tiles must have the same suit")
-        values = sorted(t.value for t in tiles)
-        if not (values[1] == values[0] + 1 and values[2] == values[0] + 2):
+        kinds = sorted(t.kind for t in tiles)
+        if not (kinds[1] == kinds[0] + 1 and kinds[2] == kinds[0] + 2):
             raise InvalidActionError("Chi tiles must be sequential")
 
         player = self.state.players[player_index]
@@ -349,12 +508,12 @@ class MahjongEngine:
                 raise InvalidActionError("Player missing required tiles for chi")
         for tile in needed:
             idx = next(i for i, t in enumerate(player.hand.tiles) if t == tile)
-            player.hand.tiles.pop(idx)
+            self._undo.pop(player.hand.tiles, idx)
 
         discarder = self.state.players[last_player]
         if not discarder.river or discarder.river[-1] != last_tile:
             raise InvalidActionError("Discard mismatch")
-        discarder.river.pop()
+        self._undo.pop(discarder.river)
 
         called_index = None
         called_from = None
@@ -368,18 +527,18 @@ class MahjongEngine:
             called_from=called_from,
         )
         player.hand.melds.append(meld)
-        self.state.last_discard = None
-        self.state.last_discard_player = None
-        self.state.waiting_for_claims = []
+        self._undo.appended(player.hand.melds)
+        self._clear_discard()
         self._close_claims()
-        self.state.current_player = player_index
+        self._undo.set(self.state, "current_player", player_index)
         self._emit("meld", {"player_index": player_index, "meld": meld})
 
+    @journaled
+    @undoable
     def call_pon(self, player_index: int, tiles: list[Tile]) -> None:
         """Form a pon meld using the given tiles."""
-        self._invalidate_cache()
         for p in self.state.players:
-            p.ippatsu_available = False
+            self._undo.set(p, "ippatsu_available", False)
         if len(tiles) != 3:
             raise InvalidActionError("Pon requires three tiles")
 
@@ -389,28 +548,19 @@ class MahjongEngine:
             raise InvalidActionError("No discard available for pon")
         if player_index == last_player:
             raise InvalidActionError("Cannot pon your own discard")
-        if not all(
-            t.suit == tiles[0].suit and t.value == tiles[0].value for t in tiles
-        ):
+        kind = tiles[0].kind
+        if not all(t.kind == kind for t in tiles):
             raise InvalidActionError("Pon tiles must be identical")
-        if last_tile.suit != tiles[0].suit or last_tile.value != tiles[0].value:
+        if last_tile.kind != kind:
             raise InvalidActionError("Discarded tile must match meld tiles")
 
         player = self.state.players[player_index]
-        count = sum(
-            1
-            for t in player.hand.tiles
-            if t.suit == tiles[0].suit and t.value == tiles[0].value
-        )
-        if count < 2:
+        if kind < 0 or player.hand.counts[kind] < 2:
             raise InvalidActionError("Player missing tiles for pon")
         removed = 0
         for i in range(len(player.hand.tiles) - 1, -1, -1):
-            if (
-                player.hand.tiles[i].suit == tiles[0].suit
-                and player.hand.tiles[i].value == tiles[0].value
-            ):
-                player.hand.tiles.pop(i)
+            if player.hand.tiles[i].kind == kind:
+                self._undo.pop(player.hand.tiles, i)
                 removed += 1
                 if removed == 2:
                     break
@@ -418,7 +568,7 @@ class MahjongEngine:
         discarder = self.state.players[last_player]
         if not discarder.river or discarder.river[-1] != last_tile:
             raise InvalidActionError("Discard mismatch")
-        discarder.river.pop()
+        self._undo.pop(discarder.river)
 
         called_index = None
         called_from = None
@@ -432,24 +582,23 @@ class MahjongEngine:
             called_from=called_from,
         )
         player.hand.melds.append(meld)
-        self.state.last_discard = None
-        self.state.last_discard_player = None
-        self.state.waiting_for_claims = []
+        self._undo.appended(player.hand.melds)
+        self._clear_discard()
         self._close_claims()
-        self.state.current_player = player_index
+        self._undo.set(self.state, "current_player", player_index)
         self._emit("meld", {"player_index": player_index, "meld": meld})
 
+    @journaled
+    @undoable
     def call_kan(self, player_index: int, tiles: list[Tile]) -> None:
         """Form a kan meld. Supports open, closed and added kan."""
-        self._invalidate_cache()
         for p in self.state.players:
-            p.ippatsu_available = False
+            self._undo.set(p, "ippatsu_available", False)
         if len(tiles) != 4:
             raise InvalidActionError("Kan requires four tiles")
 
-        suit = tiles[0].suit
-        value = tiles[0].value
-        if not all(t.suit == suit and t.value == value for t in tiles):
+        kind = tiles[0].kind
+        if not all(t.kind == kind for t in tiles):
             raise InvalidActionError("Kan tiles must be identical")
 
         player = self.state.players[player_index]
@@ -460,28 +609,22 @@ class MahjongEngine:
         if last_tile is not None and last_player is not None:
             if player_index == last_player:
                 raise InvalidActionError("Cannot kan your own discard")
-            if last_tile.suit != suit or last_tile.value != value:
+            if last_tile.kind != kind:
                 raise InvalidActionError("Discarded tile must match meld tiles")
-            count = sum(
-                1
-                for t in player.hand.tiles
-                if t.suit == suit and t.value == value
-            )
-            if count < 3:
+            if kind < 0 or player.hand.counts[kind] < 3:
                 raise InvalidActionError("Player missing tiles for kan")
             meld_tiles: list[Tile] = [last_tile]
             removed = 0
             for i in range(len(player.hand.tiles) - 1, -1, -1):
-                tile_obj = player.hand.tiles[i]
-                if tile_obj.suit == suit and tile_obj.value == value:
-                    meld_tiles.append(player.hand.tiles.pop(i))
+                if player.hand.tiles[i].kind == kind:
+                    meld_tiles.append(self._undo.pop(player.hand.tiles, i))
                     removed += 1
                     if removed == 3:
                         break
             discarder = self.state.players[last_player]
             if not discarder.river or discarder.river[-1] != last_tile:
                 raise InvalidActionError("Discard mismatch")
-            discarder.river.pop()
+            self._undo.pop(discarder.river)
             called_index = 0
             called_from = (player_index - last_player) % len(self.state.players)
             meld = Meld(
@@ -491,75 +634,68 @@ class MahjongEngine:
                 called_from=called_from,
             )
             player.hand.melds.append(meld)
-            self.state.last_discard = None
-            self.state.last_discard_player = None
-            self.state.waiting_for_claims = []
+            self._undo.appended(player.hand.melds)
+            self._clear_discard()
             self._close_claims()
             # TODO: support chankan (槍槓) before drawing replacement tile
             self._draw_replacement_tile(player, player_index)
-            self.state.current_player = player_index
+            self._undo.set(self.state, "current_player", player_index)
             self._emit("meld", {"player_index": player_index, "meld": meld})
-            self.state.kan_count += 1
+            self._undo.set(self.state, "kan_count", self.state.kan_count + 1)
             if self.state.kan_count >= 4:
                 self._resolve_ryukyoku("four_kans")
             return
 
         # Added kan upgrade from an existing pon
         for meld in player.hand.melds:
-            if meld.type == PON and all(
-                t.suit == suit and t.value == value for t in meld.tiles
-            ):
+            if meld.type == PON and all(t.kind == kind for t in meld.tiles):
                 idx = next(
-                    (
-                        i
-                        for i, t in enumerate(player.hand.tiles)
-                        if t.suit == suit and t.value == value
-                    ),
+                    (i for i, t in enumerate(player.hand.tiles) if t.kind == kind),
                     None,
                 )
                 if idx is None:
                     raise InvalidActionError("Player missing tile for added kan")
-                meld.tiles.append(player.hand.tiles.pop(idx))
-                meld.type = "added_kan"
-                self.state.waiting_for_claims = []
+                meld.tiles.append(self._undo.pop(player.hand.tiles, idx))
+                self._undo.appended(meld.tiles)
+                self._undo.set(meld, "type", "added_kan")
+                self._undo.set(self.state, "waiting_for_claims", [])
                 self._close_claims()
                 # TODO: support chankan (槍槓) before drawing replacement tile
                 self._draw_replacement_tile(player, player_index)
-                self.state.current_player = player_index
+                self._undo.set(self.state, "current_player", player_index)
                 self._emit("meld", {"player_index": player_index, "meld": meld})
-                self.state.kan_count += 1
+                self._undo.set(self.state, "kan_count", self.state.kan_count + 1)
                 if self.state.kan_count >= 4:
                     self._resolve_ryukyoku("four_kans")
                 return
 
         # Closed kan from hand
-        count = sum(1 for t in player.hand.tiles if t.suit == suit and t.value == value)
-        if count < 4:
+        if kind < 0 or player.hand.counts[kind] < 4:
             raise InvalidActionError("Player missing tiles for kan")
         meld_tiles = []
         removed = 0
         for i in range(len(player.hand.tiles) - 1, -1, -1):
-            tile_obj = player.hand.tiles[i]
-            if tile_obj.suit == suit and tile_obj.value == value:
-                meld_tiles.append(player.hand.tiles.pop(i))
+            if player.hand.tiles[i].kind == kind:
+                meld_tiles.append(self._undo.pop(player.hand.tiles, i))
                 removed += 1
                 if removed == 4:
                     break
         meld = Meld(tiles=meld_tiles, type="closed_kan")
         player.hand.melds.append(meld)
-        self.state.waiting_for_claims = []
+        self._undo.appended(player.hand.melds)
+        self._undo.set(self.state, "waiting_for_claims", [])
         self._close_claims()
         # TODO: support chankan (槍槓) before drawing replacement tile
         self._draw_replacement_tile(player, player_index)
-        self.state.current_player = player_index
+        self._undo.set(self.state, "current_player", player_index)
         self._emit("meld", {"player_index": player_index, "meld": meld})
-        self.state.kan_count += 1
+        self._undo.set(self.state, "kan_count", self.state.kan_count + 1)
         if self.state.kan_count >= 4:
             self._resolve_ryukyoku("four_kans")
 
+    @journaled
     def declare_tsumo(self, player_index: int, win_tile: Tile) -> HandResponse:
         """Declare a self-drawn win and return scoring info."""
-        self._invalidate_cache()
         result = self.calculate_score(player_index, win_tile, is_tsumo=True)
         player = self.state.players[player_index]
         ippatsu = player.riichi and player.ippatsu_available
@@ -590,9 +726,9 @@ class MahjongEngine:
         self.advance_hand(player_index)
         return result
 
+    @journaled
     def declare_ron(self, player_index: int, win_tile: Tile) -> HandResponse:
         """Declare a win on another player's discard."""
-        self._invalidate_cache()
         result = self.calculate_score(player_index, win_tile, is_tsumo=False)
         player = self.state.players[player_index]
         ippatsu = player.riichi and player.ippatsu_available
@@ -623,12 +759,14 @@ class MahjongEngine:
         self.advance_hand(player_index)
         return result
 
+    @journaled
+    @undoable
     def skip(self, player_index: int) -> None:
         """Skip action for the specified player."""
-        self._invalidate_cache()
         # Waiting for claims from other players
         if self.state.waiting_for_claims:
             if player_index in self.state.waiting_for_claims:
+                self._undo.save(self.state.waiting_for_claims)
                 self.state.waiting_for_claims.remove(player_index)
                 self._emit("skip", {"player_index": player_index})
                 if not self.state.waiting_for_claims:
@@ -639,15 +777,18 @@ class MahjongEngine:
             return
         if player_index != self.state.current_player:
             return
-        self.state.current_player = (self.state.current_player + 1) % len(
-            self.state.players
+        self._undo.set(
+            self.state,
+            "current_player",
+            (self.state.current_player + 1) % len(self.state.players),
         )
         self._emit("skip", {"player_index": player_index})
         new_player = self.state.current_player
         self.draw_tile(new_player)
         # draw_tile advances current_player; reset to drawer
-        self.state.current_player = new_player
+        self._undo.set(self.state, "current_player", new_player)
 
+    @journaled
     def advance_hand(self, winner_index: int | None = None) -> None:
         """Move to the next hand and handle dealer rotation.
 
@@ -679,6 +820,7 @@ class MahjongEngine:
             )
             self.start_kyoku(self.state.dealer, self.state.round_number)
 
+    @journaled
     def end_game(self, *, reason: str | None = None) -> GameState:
         """Reset the engine and return the final state.
 
@@ -693,6 +835,7 @@ class MahjongEngine:
             return self._final_state
 
         self._invalidate_cache()
+        self._undo.clear()
         final_state = self.state
         scores = [p.score for p in final_state.players]
         payload: dict[str, Any] = {"scores": scores}
@@ -701,7 +844,7 @@ class MahjongEngine:
         self._emit("end_game", payload)
         self.game_over = True
         self._final_state = final_state
-        self.state = GameState(wall=Wall())
+        self.state = GameState(wall=Wall(rng=self.rng))
         wall = self.state.wall
         assert wall is not None
         self.state.dora_indicators = wall.dora_indicators.copy()
@@ -723,7 +866,7 @@ class MahjongEngine:
 
         state = self.state
         player = state.players[player_index]
-        tiles = player.hand.tiles
+        counts = player.hand.counts
 
         actions: set[str] = set()
 
@@ -741,17 +884,19 @@ class MahjongEngine:
             and last_player is not None
             and last_player != player_index
         ):
-            same = [t for t in tiles if t.suit == last.suit and t.value == last.value]
-            if len(same) >= 2:
+            same = counts[last.kind] if last.kind >= 0 else 0
+            if same >= 2:
                 actions.add(PON)
-            if len(same) >= 3:
+            if same >= 3:
                 actions.add(KAN)
             if (
                 (last_player + 1) % len(state.players) == player_index
-                and last.suit in {"man", "pin", "sou"}
+                and last.suit in SUITED
             ):
+                suit_mask = player.hand.suit_mask(last.suit)
+
                 def has(v: int) -> bool:
-                    return any(t.suit == last.suit and t.value == v for t in tiles)
+                    return 1 <= v <= 9 and bool(suit_mask >> (v - 1) & 1)
 
                 if has(last.value - 2) and has(last.value - 1):
                     actions.add(CHI)
@@ -760,30 +905,17 @@ class MahjongEngine:
                 if has(last.value + 1) and has(last.value + 2):
                     actions.add(CHI)
 
-            # Ron check - temporarily add discard to hand and evaluate
-            player.hand.tiles.append(last)
-            try:
-                result = self.calculate_score(
-                    player_index,
-                    last,
-                    is_tsumo=False,
-                )
-            except Exception:
-                result = None
-            finally:
-                player.hand.tiles.pop()
-            if result and (
-                (result.cost and result.cost.get("total", 0) > 0) or
-                (result.han is not None and result.han > 0)
+            # Ron check - only discards in the cached wait set are scored
+            waits = player.waits(self.ruleset)
+            if (
+                (waits is None or last.kind in waits)
+                and not player.is_furiten(self.ruleset)
+                and self._scores_ron(player_index, last)
             ):
                 actions.add(RON)
 
-        counts: dict[tuple[str, int], int] = {}
-        for t in tiles:
-            key = (t.suit, t.value)
-            counts[key] = counts.get(key, 0) + 1
-            if counts[key] >= 4:
-                actions.add(KAN)
+        if any(c >= 4 for c in counts):
+            actions.add(KAN)
 
         if (
             not self._claims_open
@@ -801,7 +933,11 @@ class MahjongEngine:
         ):
             win_tile = player.hand.tiles[-1]
             try:
-                result = self.calculate_score(player_index, win_tile)
+                result = None
+                if self.ruleset.is_winning_shape(
+                    player.hand.tiles, player.hand.melds
+                ):
+                    result = self.calculate_score(player_index, win_tile)
             except Exception:
                 result = None
             if result and (
@@ -812,16 +948,75 @@ class MahjongEngine:
 
         return sorted(actions)
 
+    def _scores_ron(self, player_index: int, tile: Tile) -> bool:
+        """Return ``True`` if claiming ``tile`` would produce a scoring hand."""
+        player = self.state.players[player_index]
+        # temporarily add the discard to the hand and evaluate
+        player.hand.tiles.append(tile)
+        try:
+            result = None
+            if self.ruleset.is_winning_shape(player.hand.tiles, player.hand.melds):
+                result = self.calculate_score(player_index, tile, is_tsumo=False)
+        except Exception:
+            result = None
+        finally:
+            player.hand.tiles.pop()
+        if result is None:
+            return False
+        return bool(
+            (result.cost and result.cost.get("total", 0) > 0)
+            or (result.han is not None and result.han > 0)
+        )
+
+    def _allowed_actions_key(self, player_index: int) -> tuple:
+        """Return everything ``_compute_allowed_actions`` reads for a seat.
+
+        A cached entry stays valid while this key is unchanged, so a discard
+        only recomputes the seats whose claim window or wait check it
+        affects, and asking about one seat never computes the others.
+        """
+        state = self.state
+        player = state.players[player_index]
+        hand = player.hand
+        tiles = hand.tiles
+        return (
+            tiles,
+            getattr(tiles, "version", None),
+            hand.melds,
+            len(hand.melds),
+            player.river,
+            len(player.river),
+            player.discards,
+            len(player.discards),
+            player.riichi,
+            player.seat_wind,
+            state.round_number,
+            state.current_player,
+            state.last_discard,
+            state.last_discard_player,
+            self._claims_open,
+            player_index in state.waiting_for_claims,
+            self.ruleset,
+        )
+
     def get_allowed_actions(self, player_index: int) -> list[str]:
         """Return cached allowed actions for ``player_index``."""
 
         if player_index < 0 or player_index >= len(self.state.players):
             raise IndexError("Invalid player index")
 
-        if self._cached_allowed_actions is None or len(self._cached_allowed_actions) != len(self.state.players):
-            self._cached_allowed_actions = [self._compute_allowed_actions(i) for i in range(len(self.state.players))]
+        cache = self._allowed_actions_cache
+        if len(cache) != len(self.state.players):
+            self._invalidate_cache()
+            cache = self._allowed_actions_cache
 
-        return self._cached_allowed_actions[player_index]
+        key = self._allowed_actions_key(player_index)
+        entry = cache[player_index]
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        actions = self._compute_allowed_actions(player_index)
+        cache[player_index] = (key, actions)
+        return actions
 
     def get_chi_options(self, player_index: int) -> list[list[Tile]]:
         """Return possible chi tile pairs for ``player_index``."""
@@ -832,7 +1027,7 @@ class MahjongEngine:
             last_tile is None
             or last_player is None
             or (last_player + 1) % len(self.state.players) != player_index
-            or last_tile.suit not in {"man", "pin", "sou"}
+            or last_tile.suit not in SUITED
         ):
             return []
 
@@ -840,10 +1035,11 @@ class MahjongEngine:
         options: list[list[Tile]] = []
 
         def find(value: int, used: set[int]) -> tuple[int, Tile] | None:
+            kind = last_tile.kind + value - last_tile.value
             for idx, t in enumerate(tiles):
                 if idx in used:
                     continue
-                if t.suit == last_tile.suit and t.value == value:
+                if t.kind == kind:
                     return idx, t
             return None
 
@@ -861,7 +1057,7 @@ class MahjongEngine:
             if t2 is None:
                 continue
             pair = sorted([t1[1], t2[1]], key=lambda t: t.value)
-            if not any(all(p.suit == q.suit and p.value == q.value for p, q in zip(pair, o)) for o in options):
+            if not any(all(p.kind == q.kind for p, q in zip(pair, o)) for o in options):
                 options.append(pair)
 
         return options
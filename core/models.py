@@ -1,27 +1,90 @@
 """Data models used by the core engine."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, List, Optional, TYPE_CHECKING
+import copy
+from dataclasses import dataclass, field, fields
+from typing import Any, Iterable, List, Optional, SupportsIndex, TYPE_CHECKING
 
 if TYPE_CHECKING:  # pragma: no cover - used for type checking
     from .player import Player
     from .wall import Wall
 
 
+SUITS = ("man", "pin", "sou", "wind", "dragon")
+SUITED = frozenset({"man", "pin", "sou"})
+# First 34-kind index and number of values for each suit
+_SUIT_BASE = {"man": 0, "pin": 9, "sou": 18, "wind": 27, "dragon": 31}
+_SUIT_SIZE = {"man": 9, "pin": 9, "sou": 9, "wind": 4, "dragon": 3}
+KIND_COUNT = 34
+TILE_COUNT = 136
+
+# (suit, value) for each of the 34 tile kinds
+_KIND_SUIT_VALUE: tuple[tuple[str, int], ...] = tuple(
+    (suit, value)
+    for suit in SUITS
+    for value in range(1, _SUIT_SIZE[suit] + 1)
+)
+_TERMINAL_OR_HONOR_KINDS = frozenset({0, 8, 9, 17, 18, 26, *range(27, 34)})
+
+
+def _kind_of(suit: str, value: int) -> int:
+    """Return the 0-33 kind for ``suit``/``value`` or ``-1`` if invalid."""
+    base = _SUIT_BASE.get(suit)
+    if base is None or not 1 <= value <= _SUIT_SIZE[suit]:
+        return -1
+    return base + value - 1
+
+
 @dataclass
 class Tile:
-    """Represents a single Mahjong tile."""
+    """Represents a single Mahjong tile.
+
+    Besides ``suit`` and ``value`` every tile carries two derived integers
+    that the engine uses internally: ``kind`` is the 0-33 tile type index
+    (``-1`` for unknown tiles) and ``tile_id`` the 0-135 physical id assigned
+    by the wall (``-1`` for tiles created elsewhere). Both live in slots
+    rather than dataclass fields, so ``asdict``, ``__dict__`` and the JSON
+    views still only contain ``suit`` and ``value``.
+    """
+
+    __slots__ = ("kind", "tile_id", "__dict__")
+
     suit: str
     value: int
 
+    def __post_init__(self) -> None:
+        self.kind = _kind_of(self.suit, self.value)
+        self.tile_id = -1
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Tile):
+            return NotImplemented
+        if self.kind >= 0:
+            return self.kind == other.kind
+        return self.suit == other.suit and self.value == other.value
+
     def is_terminal_or_honor(self) -> bool:
         """Return True if the tile is a terminal or honor."""
+        if self.kind >= 0:
+            return self.kind in _TERMINAL_OR_HONOR_KINDS
         if self.suit in {"wind", "dragon"}:
             return True
         return self.value in {1, 9}
 
 
+def tile_from_kind(kind: int) -> Tile:
+    """Return a new tile of the given 0-33 ``kind``."""
+    suit, value = _KIND_SUIT_VALUE[kind]
+    return Tile(suit, value)
+
+
+def tile_from_id(tile_id: int) -> Tile:
+    """Return a new tile for the physical 0-135 ``tile_id``."""
+    tile = tile_from_kind(tile_id // 4)
+    tile.tile_id = tile_id
+    return tile
+
+
 @dataclass
 class Meld:
     """Collection of tiles forming a meld (chi, pon, kan)."""
@@ -31,12 +94,157 @@ class Meld:
     called_from: int | None = None
 
 
+class TileList(List[Tile]):
+    """List of tiles that keeps a 34-kind count vector in sync.
+
+    Every mutating list method updates ``counts`` and ``mask`` in O(1) per
+    tile added or removed and bumps ``version``, which callers use to
+    validate values derived from the tiles. Bit ``k`` of ``mask`` is set while at least one
+    tile of kind ``k`` is present; :meth:`suit_mask` extracts the 9-bit (or
+    smaller) slice for a single suit. Items without a valid ``kind`` are
+    stored but not counted so ``asdict`` can rebuild the list from dicts.
+    """
+
+    __slots__ = ("counts", "mask", "version")
+
+    def __init__(self, tiles: Iterable[Tile] = ()) -> None:
+        super().__init__(tiles)
+        self.version = 0
+        self._recount()
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (TileList, (list(self),))
+
+    def _recount(self) -> None:
+        self.version += 1
+        self.counts = [0] * KIND_COUNT
+        self.mask = 0
+        for tile in self:
+            self._add(tile)
+
+    def _add(self, tile: Tile) -> None:
+        self.version += 1
+        kind = getattr(tile, "kind", -1)
+        if kind < 0:
+            return
+        count = self.counts[kind]
+        self.counts[kind] = count + 1
+        if count == 0:
+            self.mask |= 1 << kind
+
+    def _remove(self, tile: Tile) -> None:
+        self.version += 1
+        kind = getattr(tile, "kind", -1)
+        if kind < 0:
+            return
+        count = self.counts[kind] - 1
+        self.counts[kind] = count
+        if count == 0:
+            self.mask &= ~(1 << kind)
+
+    def suit_mask(self, suit: str) -> int:
+        """Return the presence bitmask of ``suit`` with value 1 in bit 0."""
+        return (self.mask >> _SUIT_BASE[suit]) & ((1 << _SUIT_SIZE[suit]) - 1)
+
+    def append(self, tile: Tile) -> None:
+        super().append(tile)
+        self._add(tile)
+
+    def extend(self, tiles: Iterable[Tile]) -> None:
+        for tile in tiles:
+            self.append(tile)
+
+    def __iadd__(self, tiles: Iterable[Tile]) -> TileList:  # type: ignore[override, misc]
+        self.extend(tiles)
+        return self
+
+    def insert(self, index: SupportsIndex, tile: Tile) -> None:
+        super().insert(index, tile)
+        self._add(tile)
+
+    def pop(self, index: SupportsIndex = -1) -> Tile:
+        tile = super().pop(index)
+        self._remove(tile)
+        return tile
+
+    def remove(self, tile: Tile) -> None:
+        idx = self.index(tile)
+        self._remove(super().pop(idx))
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+        self.counts = [0] * KIND_COUNT
+        self.mask = 0
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            super().__setitem__(index, value)
+            self._recount()
+            return
+        self._remove(self[index])
+        super().__setitem__(index, value)
+        self._add(value)
+
+    def __delitem__(self, index: Any) -> None:
+        if isinstance(index, slice):
+            super().__delitem__(index)
+            self._recount()
+            return
+        self._remove(self[index])
+        super().__delitem__(index)
+
+    def __imul__(self, n: SupportsIndex) -> TileList:  # type: ignore[override, misc]
+        super().__imul__(n)
+        self._recount()
+        return self
+
+
+def tile_counts(tiles: Iterable[Tile]) -> list[int]:
+    """Return a fresh 34-kind count vector for ``tiles``.
+
+    The maintained vector of a :class:`TileList` is copied instead of
+    rescanning the tiles.
+    """
+    if isinstance(tiles, TileList):
+        return tiles.counts[:]
+    counts = [0] * KIND_COUNT
+    for tile in tiles:
+        kind = tile.kind
+        if kind < 0:
+            raise ValueError(f"Unknown tile: {tile.suit} {tile.value}")
+        counts[kind] += 1
+    return counts
+
+
 @dataclass
 class Hand:
-    """Player hand consisting of tiles and melds."""
+    """Player hand consisting of tiles and melds.
+
+    ``tiles`` is always a :class:`TileList`; plain lists assigned to it are
+    wrapped so ``counts`` never has to be rebuilt by scanning the hand.
+    """
     tiles: List[Tile] = field(default_factory=list)
     melds: List[Meld] = field(default_factory=list)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "tiles" and not isinstance(value, TileList):
+            value = TileList(value)
+        object.__setattr__(self, name, value)
+
+    @property
+    def counts(self) -> list[int]:
+        """Live 34-kind count vector of the concealed tiles (do not mutate)."""
+        tiles = self.tiles
+        assert isinstance(tiles, TileList)
+        return tiles.counts
+
+    def suit_mask(self, suit: str) -> int:
+        """Return the presence bitmask of ``suit`` in the concealed tiles."""
+        tiles = self.tiles
+        assert isinstance(tiles, TileList)
+        return tiles.suit_mask(suit)
+
 
 @dataclass
 class GameState:
@@ -59,13 +267,38 @@ class GameState:
     last_discard_player: int | None = None
     waiting_for_claims: list[int] = field(default_factory=list)
 
+    def snapshot(self) -> GameState:
+        """Return an independent copy of the state for event payloads.
+
+        Only containers are copied; :class:`Tile` objects are never mutated
+        by the engine, so the snapshot shares them with the live state
+        instead of deep copying the wall and every hand. Fields holding
+        plain values or lists need no special case here.
+        """
+        state = copy.copy(self)
+        # every field is carried over; only the containers need new copies
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, list):
+                setattr(state, f.name, value.copy())
+        state.players = [p.snapshot() for p in self.players]
+        if self.wall is not None:
+            state.wall = self.wall.snapshot()
+        return state
+
 
 @dataclass
 class GameEvent:
-    """Generic event emitted by the Mahjong engine."""
+    """Generic event emitted by the Mahjong engine.
+
+    ``seq`` is assigned by :class:`~core.event_log.EventLog` when the event is
+    recorded and increases monotonically within a game; ``0`` means the event
+    was never logged.
+    """
 
     name: str
     payload: dict[str, Any]
+    seq: int = 0
 
 
 @dataclass
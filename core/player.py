@@ -1,20 +1,31 @@
 """Player representation for MyMahjong."""
 from __future__ import annotations
 
+import copy
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 from .actions import CHI, PON, KAN
-from .models import Hand, Tile
+from .models import Hand, Meld, Tile
+
+if TYPE_CHECKING:  # pragma: no cover - used for type checking
+    from .rules import RuleSet
 
 
 @dataclass
 class Player:
-    """Represents a seat at the table."""
+    """Represents a seat at the table.
+
+    ``river`` holds the player's discards still on the table, while
+    ``discards`` keeps every tile the player discarded this hand, including
+    those claimed by others; furiten is decided by ``discards``.
+    """
 
     name: str
     hand: Hand = field(default_factory=Hand)
     score: int = 25000
     river: list[Tile] = field(default_factory=list)
+    discards: list[Tile] = field(default_factory=list)
     riichi: bool = False
     seat_wind: str = "east"
     must_tsumogiri: bool = False
@@ -35,6 +46,58 @@ class Player:
             # fall back to equality-based removal for backward compatibility
             self.hand.tiles.remove(tile)
         self.river.append(tile)
+        self.discards.append(tile)
+
+    def snapshot(self) -> Player:
+        """Return a copy with fresh containers that share the tiles."""
+        player = copy.copy(self)
+        player.__dict__.pop("_waits", None)
+        player.hand = Hand(
+            tiles=list(self.hand.tiles),
+            melds=[
+                Meld(m.tiles.copy(), m.type, m.called_index, m.called_from)
+                for m in self.hand.melds
+            ],
+        )
+        player.river = self.river.copy()
+        player.discards = self.discards.copy()
+        return player
+
+    def waits(self, ruleset: RuleSet) -> frozenset[int] | None:
+        """Return the tile kinds that complete the hand under ``ruleset``.
+
+        The result is cached on the player and only recomputed after the
+        concealed tiles or melds change; discards by other players leave it
+        untouched. ``None`` means ``ruleset`` cannot enumerate waits.
+        """
+        tiles = self.hand.tiles
+        version = getattr(tiles, "version", None)
+        melds = len(self.hand.melds)
+        cached = self.__dict__.get("_waits")
+        if (
+            cached is not None
+            and cached[0] is ruleset
+            and cached[1] is tiles
+            and cached[2] == version
+            and cached[3] == melds
+        ):
+            return cached[4]
+        waits = ruleset.winning_kinds(tiles, self.hand.melds)
+        # kept out of the dataclass fields so it never reaches asdict()
+        self.__dict__["_waits"] = (ruleset, tiles, version, melds, waits)
+        return waits
+
+    def is_furiten(self, ruleset: RuleSet) -> bool:
+        """Return ``True`` if the player already discarded a winning kind.
+
+        Discards claimed by other players count as well. Only this
+        permanent furiten is checked; missing a winning discard does not
+        make the player furiten.
+        """
+        waits = self.waits(ruleset)
+        if not waits:
+            return False
+        return any(t.kind in waits for t in self.discards)
 
     def has_open_melds(self) -> bool:
         """Return ``True`` if the player has chi, pon or open kan melds."""
@@ -5,12 +5,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 import random
 
-from mahjong.shanten import Shanten
-
 from .rules import _tile_to_index
+from .shanten import calculate_shanten
 
 from .mahjong_engine import MahjongEngine
-from .models import Tile
+from .models import Tile, tile_counts
 from .ai_adapter import send_state_to_ai, receive_action
 from .ai_runner import ExternalAI
 
@@ -39,15 +38,6 @@ def generate_problem() -> PracticeProblem:
     return PracticeProblem(hand=hand, dora_indicator=dora, seat_wind=seat_wind)
 
 
-def _hand_counts(hand: list[Tile]) -> list[int]:
-    """Return 34-tile count representation of ``hand``."""
-
-    counts = [0] * 34
-    for tile in hand:
-        counts[_tile_to_index(tile)] += 1
-    return counts
-
-
 def suggest_discard(hand: list[Tile], use_ai: bool = False) -> Tile:
     """Return the AI suggested discard.
 
@@ -70,15 +60,14 @@ def suggest_discard(hand: list[Tile], use_ai: bool = False) -> Tile:
         finally:
             ai.stop()
 
-    counts = _hand_counts(hand)
-    shanten = Shanten()
+    counts = tile_counts(hand)
     best_tiles: list[Tile] = []
     best_value = 8  # higher than any real shanten number
 
     for tile in hand:
         idx = _tile_to_index(tile)
         counts[idx] -= 1
-        value = shanten.calculate_shanten(counts)
+        value = calculate_shanten(counts)
         counts[idx] += 1
         if value < best_value:
             best_value = value
@@ -10,21 +10,15 @@ from mahjong.hand_calculating.hand_response import HandResponse
 from mahjong.tile import TilesConverter
 from mahjong.constants import EAST, SOUTH, WEST, NORTH
 
-from .models import Tile, Meld
+from .models import Tile, Meld, tile_counts
+from . import shanten
 
 
 def _tile_to_index(tile: Tile) -> int:
-    if tile.suit == "man":
-        return tile.value - 1
-    if tile.suit == "pin":
-        return 9 + tile.value - 1
-    if tile.suit == "sou":
-        return 18 + tile.value - 1
-    if tile.suit == "wind":
-        return 27 + tile.value - 1
-    if tile.suit == "dragon":
-        return 31 + tile.value - 1
-    raise ValueError(f"Unknown suit: {tile.suit}")
+    kind = tile.kind
+    if kind < 0:
+        raise ValueError(f"Unknown tile: {tile.suit} {tile.value}")
+    return kind
 
 
 class RuleSet:
@@ -45,6 +39,25 @@ class RuleSet:
         """Return scoring for the given hand."""
         raise NotImplementedError
 
+    def is_winning_shape(self, hand_tiles: list[Tile], melds: list[Meld]) -> bool:
+        """Return ``False`` if ``hand_tiles`` can never score as a win.
+
+        The engine calls this before :meth:`calculate_score` when listing
+        allowed actions so obviously non-winning hands skip the full yaku
+        evaluation. The default accepts every hand.
+        """
+        return True
+
+    def winning_kinds(
+        self, hand_tiles: list[Tile], melds: list[Meld]
+    ) -> frozenset[int] | None:
+        """Return the tile kinds that could complete ``hand_tiles``.
+
+        ``None`` means the rule set cannot tell without scoring, in which case
+        the engine evaluates every discard. The default returns ``None``.
+        """
+        return None
+
 
 @dataclass
 class StandardRuleSet(RuleSet):
@@ -52,6 +65,29 @@ class StandardRuleSet(RuleSet):
 
     calculator: HandCalculator = HandCalculator()
 
+    def is_winning_shape(self, hand_tiles: list[Tile], melds: list[Meld]) -> bool:
+        """Return ``True`` if the concealed tiles form a complete hand.
+
+        Only the concealed tiles are scored (see :meth:`calculate_score`),
+        so a hand is winnable only when their shanten number is ``-1``.
+        Hands the shanten tables cannot represent are passed through.
+        """
+        counts = tile_counts(hand_tiles)
+        total = sum(counts)
+        if total != len(hand_tiles) or total > 14:
+            return True
+        return shanten.calculate_shanten(counts) == -1
+
+    def winning_kinds(
+        self, hand_tiles: list[Tile], melds: list[Meld]
+    ) -> frozenset[int] | None:
+        """Return the kinds whose addition completes the concealed tiles."""
+        counts = tile_counts(hand_tiles)
+        total = sum(counts)
+        if total != len(hand_tiles) or total % 3 != 1 or max(counts) > 4:
+            return None
+        return shanten.wait_kinds(counts)
+
     def calculate_score(
         self,
         hand_tiles: list[Tile],
@@ -64,12 +100,8 @@ class StandardRuleSet(RuleSet):
         seat_wind: str | None = None,
         round_wind: str | None = None,
     ) -> HandResponse:
-        counts = [0] * 34
-        for t in hand_tiles:
-            counts[_tile_to_index(t)] += 1
-        for meld in melds:
-            for t in meld.tiles:
-                counts[_tile_to_index(t)] += 0  # meld tiles already removed
+        # meld tiles are already removed from ``hand_tiles``
+        counts = tile_counts(hand_tiles)
         tiles_136 = TilesConverter.to_136_array(counts)
         win_tile_136 = TilesConverter.find_34_tile_in_136_array(
             _tile_to_index(win_tile), tiles_136
@@ -0,0 +1,218 @@
+"""Schema-aware JSON encoding of the core models.
+
+``json.dumps(asdict(state))`` first deep-copies every nested dataclass into
+new dicts and lists and then walks that copy a second time to write it.
+:func:`dumps` writes the models straight to JSON text instead: the fields of
+each dataclass are looked up once per class and turned into ready-made key
+fragments, and the text of each of the 34 tile kinds is built once, so a
+tile costs a single list append.
+
+The result is exactly what ``json.dumps(asdict(obj), separators=(",", ":"),
+ensure_ascii=False)`` returns, which is also how Starlette encodes JSON
+responses and WebSocket messages. Objects that are neither dataclasses nor
+JSON types, such as the ``HandResponse`` of a win, are written from their
+``__dict__`` the way FastAPI's encoder handles them.
+
+Tiles are written in one of the :data:`TILE_FORMATS`: ``"object"`` is the
+``{"suit", "value"}`` object, ``"code"`` the tenhou.net/6 integer code (see
+:func:`core.tenhou_log.tile_to_code`) and ``"id"`` the 0-135 physical id
+the wall assigned. :func:`load_tile` reads any of them back.
+"""
+from __future__ import annotations
+
+from dataclasses import fields, is_dataclass
+from json.encoder import encode_basestring
+from typing import Any, Literal, get_args
+
+from .models import KIND_COUNT, TILE_COUNT, Tile, TileList, tile_from_id, tile_from_kind
+from .tenhou_log import tile_from_code, tile_to_code
+
+TileFormat = Literal["object", "code", "id"]
+TILE_FORMATS: tuple[str, ...] = get_args(TileFormat)
+
+_INFINITY = float("inf")
+
+
+def _tile_object(tile: Tile) -> str:
+    return '{"suit":%s,"value":%d}' % (encode_basestring(tile.suit), tile.value)
+
+
+# encoded text of each tile per format, indexed by kind, or by tile_id for
+# the "id" format
+_TILE_TEXT: dict[str, tuple[str, ...]] = {
+    "object": tuple(_tile_object(tile_from_kind(k)) for k in range(KIND_COUNT)),
+    "code": tuple(str(tile_to_code(tile_from_kind(k))) for k in range(KIND_COUNT)),
+    "id": tuple(str(i) for i in range(TILE_COUNT)),
+}
+_ID_TEXT = _TILE_TEXT["id"]
+
+# (key fragment, attribute) pairs of each dataclass seen so far
+_SCHEMAS: dict[type, tuple[tuple[str, str], ...]] = {}
+
+
+def dumps(obj: Any, *, tile_format: str = "object") -> str:
+    """Return ``obj`` encoded as compact JSON text.
+
+    ``obj`` may be any mix of dataclasses, tiles, dicts, lists, tuples and
+    JSON scalars. ``tile_format`` is one of :data:`TILE_FORMATS`.
+    """
+    try:
+        tiles = _TILE_TEXT[tile_format]
+    except KeyError:
+        raise ValueError(f"Unknown tile format: {tile_format}") from None
+    out: list[str] = []
+    _write(obj, out, tiles)
+    return "".join(out)
+
+
+def load_tile(value: Any, tile_format: str = "object") -> Tile:
+    """Return the tile encoded as ``value``.
+
+    ``{"suit", "value"}`` objects are accepted in every format; integers are
+    read as codes or ids according to ``tile_format``. Raises ``ValueError``
+    for anything else.
+    """
+    if isinstance(value, dict):
+        try:
+            return Tile(**value)
+        except TypeError:
+            raise ValueError(f"Invalid tile: {value!r}") from None
+    if isinstance(value, int) and not isinstance(value, bool):
+        if tile_format == "code":
+            return tile_from_code(value)
+        if tile_format == "id" and 0 <= value < TILE_COUNT:
+            return tile_from_id(value)
+    raise ValueError(f"Invalid {tile_format} tile: {value!r}")
+
+
+def fields_of(obj: Any) -> dict[str, Any]:
+    """Return the fields of dataclass ``obj`` as a shallow dict.
+
+    Unlike ``asdict`` the values are not copied, so the dict is cheap to
+    build and extend before passing it to :func:`dumps`.
+    """
+    return {name: getattr(obj, name) for _, name in _schema(type(obj))}
+
+
+def _schema(cls: type) -> tuple[tuple[str, str], ...]:
+    schema = _SCHEMAS.get(cls)
+    if schema is None:
+        schema = tuple(
+            (("," if i else "{") + encode_basestring(f.name) + ":", f.name)
+            for i, f in enumerate(fields(cls))
+        )
+        _SCHEMAS[cls] = schema
+    return schema
+
+
+def _write(obj: Any, out: list[str], tiles: tuple[str, ...]) -> None:
+    cls = obj.__class__
+    if cls is str:
+        out.append(encode_basestring(obj))
+    elif cls is Tile and obj.kind >= 0:
+        out.append(tiles[obj.kind] if tiles is not _ID_TEXT else _tile_id(obj))
+    elif cls is list or cls is TileList or cls is tuple:
+        if not obj:
+            out.append("[]")
+            return
+        out.append("[")
+        by_kind = tiles is not _ID_TEXT
+        for item in obj:
+            if item.__class__ is Tile and item.kind >= 0:
+                out.append(tiles[item.kind] if by_kind else _tile_id(item))
+            else:
+                _write(item, out, tiles)
+            out.append(",")
+        out[-1] = "]"
+    elif cls is int:
+        out.append(int.__repr__(obj))
+    elif obj is None:
+        out.append("null")
+    elif obj is True:
+        out.append("true")
+    elif obj is False:
+        out.append("false")
+    elif cls is dict:
+        _write_dict(obj, out, tiles)
+    elif cls is Tile:
+        # a tile built from an invalid suit or value has no kind or code
+        _write_fields(obj, _schema(cls), out, tiles)
+    elif cls is float:
+        out.append(_float(obj))
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        _write_fields(obj, _schema(cls), out, tiles)
+    else:
+        _write_other(obj, out, tiles)
+
+
+def _write_fields(
+    obj: Any, schema: tuple[tuple[str, str], ...], out: list[str], tiles: tuple[str, ...]
+) -> None:
+    if not schema:
+        out.append("{}")
+        return
+    for key, name in schema:
+        out.append(key)
+        _write(getattr(obj, name), out, tiles)
+    out.append("}")
+
+
+def _write_dict(obj: dict, out: list[str], tiles: tuple[str, ...]) -> None:
+    if not obj:
+        out.append("{}")
+        return
+    sep = "{"
+    for key, value in obj.items():
+        out.append(sep)
+        out.append(encode_basestring(key) if key.__class__ is str else _key(key))
+        out.append(":")
+        _write(value, out, tiles)
+        sep = ","
+    out.append("}")
+
+
+def _write_other(obj: Any, out: list[str], tiles: tuple[str, ...]) -> None:
+    # subclasses of the JSON types are written like their base, as json does
+    if isinstance(obj, str):
+        out.append(encode_basestring(obj))
+    elif isinstance(obj, int):
+        out.append(int.__repr__(obj))
+    elif isinstance(obj, float):
+        out.append(_float(obj))
+    elif isinstance(obj, (list, tuple)):
+        _write(list(obj), out, tiles)
+    elif isinstance(obj, dict):
+        _write_dict(obj, out, tiles)
+    elif hasattr(obj, "__dict__"):
+        _write_dict(vars(obj), out, tiles)
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _tile_id(tile: Tile) -> str:
+    # tiles created outside the wall have no id; use the first of their kind
+    tile_id = tile.tile_id
+    return _ID_TEXT[tile_id if tile_id >= 0 else tile.kind * 4]
+
+
+def _float(value: float) -> str:
+    if value != value or value in (_INFINITY, -_INFINITY):
+        raise ValueError("Out of range float values are not JSON compliant")
+    return float.__repr__(value)
+
+
+def _key(key: Any) -> str:
+    # dict keys are converted to strings the same way json.dumps does
+    if isinstance(key, str):
+        return encode_basestring(key)
+    if key is True:
+        return '"true"'
+    if key is False:
+        return '"false"'
+    if key is None:
+        return '"null"'
+    if isinstance(key, int):
+        return '"%s"' % int.__repr__(key)
+    if isinstance(key, float):
+        return '"%s"' % _float(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
@@ -0,0 +1,411 @@
+"""Game session object exposing the core API for a single engine."""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+from mahjong.hand_calculating.hand_response import HandResponse
+
+from . import exceptions, serialization
+from .actions import (CHI, PON, KAN, RIICHI, TSUMO, RON, SKIP, DRAW, DISCARD, START_KYOKU, ADVANCE_HAND, END_GAME)
+from .ai import AI_REGISTRY
+from .mahjong_engine import MahjongEngine
+from .models import GameState, Tile, GameEvent, GameAction
+
+# sections returned by GameSession.get_snapshot
+SNAPSHOT_FIELDS = ("state", "allowed_actions", "claims", "chi_options", "next_actor")
+
+
+class GameSession:
+    """Drive one :class:`MahjongEngine` through the core API.
+
+    Every engine-bound function of :mod:`core.api` is available as a method
+    here. Holding a session per game lets simulators and servers run many
+    games in one process without going through the module level engine.
+    """
+
+    __slots__ = ("engine",)
+
+    def __init__(self, engine: MahjongEngine) -> None:
+        self.engine = engine
+
+    @classmethod
+    def start(
+        cls, player_names: list[str], *, max_rounds: int = 8, seed: int | None = None
+    ) -> GameSession:
+        """Create a session for a new game with ``player_names``.
+
+        The walls are shuffled from ``seed``, a random one by default.
+        """
+        engine = MahjongEngine(max_rounds=max_rounds, seed=seed)
+        for i, name in enumerate(player_names):
+            if i < len(engine.state.players):
+                engine.state.players[i].name = name
+        engine.touch()
+        return cls(engine)
+
+    @property
+    def state(self) -> GameState:
+        """The current game state."""
+        return self.engine.state
+
+    def start_kyoku(self, dealer: int, round_number: int) -> GameState:
+        """Begin a new hand and return the updated state."""
+        self.engine.start_kyoku(dealer, round_number)
+        return self.engine.state
+
+    def draw_tile(self, player_index: int) -> Tile:
+        """Draw a tile for the given player."""
+        return self.engine.draw_tile(player_index)
+
+    def discard_tile(self, player_index: int, tile: Tile) -> None:
+        """Discard a tile from the player's hand."""
+        self.engine.discard_tile(player_index, tile)
+
+    def declare_riichi(self, player_index: int) -> None:
+        """Declare riichi for the specified player."""
+        self.engine.declare_riichi(player_index)
+
+    def get_state(self) -> GameState:
+        """Return the current game state."""
+        return self.engine.state
+
+    def call_chi(self, player_index: int, tiles: list[Tile]) -> None:
+        """Public wrapper for MahjongEngine.call_chi.
+
+        ``tiles`` may contain either the full meld including the discarded
+        tile or just the two tiles from the caller's hand. When only two tiles
+        are provided the current discard is automatically inserted to form the
+        meld.
+        """
+        engine = self.engine
+        last_tile = engine.state.last_discard
+        last_player = engine.state.last_discard_player
+        if last_tile is None or last_player is None:
+            raise exceptions.InvalidActionError("No discard available for chi")
+
+        # Remove any discard representation so the engine instance is used.
+        hand_tiles = [
+            t
+            for t in tiles
+            if t.kind != last_tile.kind
+        ]
+        if len(hand_tiles) != 2:
+            raise exceptions.InvalidActionError("Chi requires exactly two tiles from hand")
+
+        hand_tiles = sorted(hand_tiles, key=lambda t: t.value)
+        called_from = (player_index - last_player) % len(engine.state.players)
+
+        if called_from == 1:
+            meld_tiles = [last_tile, *hand_tiles]
+        elif called_from == 3:
+            meld_tiles = [*hand_tiles, last_tile]
+        else:
+            meld_tiles = sorted([*hand_tiles, last_tile], key=lambda t: t.value)
+
+        engine.call_chi(player_index, meld_tiles)
+
+    def call_pon(self, player_index: int, tiles: list[Tile]) -> None:
+        """Public wrapper for MahjongEngine.call_pon."""
+        self.engine.call_pon(player_index, tiles)
+
+    def call_kan(self, player_index: int, tiles: list[Tile]) -> None:
+        """Public wrapper for MahjongEngine.call_kan.
+
+        ``tiles`` may contain either the full meld including the discarded
+        tile or just the three tiles from the caller's hand. When only three
+        tiles are provided the current discard is automatically inserted and
+        any matching tile in ``tiles`` is replaced with the engine instance so
+        object identity checks succeed.
+        """
+        engine = self.engine
+        meld_tiles = tiles
+        last_tile = engine.state.last_discard
+        last_player = engine.state.last_discard_player
+
+        if len(tiles) == 3:
+            if last_tile is None or last_player is None:
+                raise exceptions.InvalidActionError("No discard available for kan")
+            meld_tiles = [last_tile, *tiles]
+
+        if last_tile is not None:
+            meld_tiles = [
+                last_tile if t.kind == last_tile.kind else t
+                for t in meld_tiles
+            ]
+
+        engine.call_kan(player_index, meld_tiles)
+
+    def declare_tsumo(self, player_index: int, tile: Tile) -> HandResponse:
+        """Declare a self-drawn win."""
+        return self.engine.declare_tsumo(player_index, tile)
+
+    def declare_ron(self, player_index: int, tile: Tile) -> HandResponse:
+        """Declare a ron win on another player's discard."""
+        return self.engine.declare_ron(player_index, tile)
+
+    def skip(self, player_index: int) -> None:
+        """Skip action for the player."""
+        self.engine.skip(player_index)
+
+    def auto_play_turn(
+        self,
+        player_index: int | None = None,
+        ai_type: str = "simple",
+        *,
+        claim_players: list[int] | None = None,
+    ) -> Tile:
+        """Have the specified AI draw and discard for ``player_index``.
+
+        ``claim_players`` limits which players will automatically claim or skip
+        a discard when waiting for calls.  By default all players are processed
+        to preserve the original behaviour used by the CLI game loop.
+        """
+        engine = self.engine
+        ai = AI_REGISTRY.get(ai_type)
+        if ai is None:
+            raise ValueError(f"Unknown ai_type: {ai_type}")
+
+        claim_list = list(engine.state.waiting_for_claims)
+        if claim_players is not None:
+            claim_list = [p for p in claim_list if p in claim_players]
+
+        for p in claim_list:
+            if ai_type == "simple":
+                from .simple_ai import claim_meld
+
+                if claim_meld(engine, p):
+                    continue
+            engine.skip(p)
+        if engine.state.waiting_for_claims:
+            assert engine.state.last_discard is not None
+            return engine.state.last_discard
+
+        current = engine.state.current_player
+        if player_index is not None and current != player_index:
+            # Claims advanced the turn to another player; do not play for the
+            # original index. Return the drawn tile for the next player instead.
+            player = engine.state.players[current]
+            return player.hand.tiles[-1]
+
+        return ai(engine, current)
+
+    def advance_hand(self, winner_index: int | None = None) -> GameState:
+        """Advance to the next hand and return the updated state."""
+        self.engine.advance_hand(winner_index)
+        return self.engine.state
+
+    def undo(self) -> GameState:
+        """Revert the most recent action of the current hand and return the state."""
+        self.engine.undo()
+        return self.engine.state
+
+    def end_game(self) -> GameState:
+        """End the current game and reset the engine."""
+        return self.engine.end_game()
+
+    def is_game_over(self) -> bool:
+        """Return True if the current game has ended."""
+        return self.engine.is_game_over
+
+    def pop_events(self) -> list[GameEvent]:
+        """Retrieve and clear pending engine events."""
+        return self.engine.pop_events()
+
+    def get_tenhou_log(self) -> str:
+        """Return the accumulated event log in Tenhou JSON format."""
+        from .tenhou_log import events_to_tenhou_json
+
+        return events_to_tenhou_json(self.engine.get_event_history())
+
+    def get_mjai_log(self) -> str:
+        """Return the accumulated event log in MJAI JSON format.
+
+        Lines keep ``json.dumps``'s default ``", "`` and ``": "`` separators,
+        which consumers of exported logs already rely on.
+        """
+        return "\n".join(
+            json.dumps(
+                json.loads(serialization.dumps({"type": e.name, **e.payload})),
+                ensure_ascii=False,
+            )
+            for e in self.engine.get_event_history()
+        )
+
+    def get_event_history(self) -> list[GameEvent]:
+        """Return the full event history."""
+        return self.engine.get_event_history()
+
+    def get_events_since(self, seq: int) -> list[GameEvent]:
+        """Return the retained events numbered after ``seq``."""
+        return self.engine.events_since(seq)
+
+    def get_allowed_actions(self, player_index: int) -> list[str]:
+        """Return allowed actions for ``player_index`` in the current game."""
+        return self._player_actions(player_index)
+
+    def get_chi_options(self, player_index: int) -> list[list[Tile]]:
+        """Return chi tile pairs available to ``player_index``."""
+        return self.engine.get_chi_options(player_index)
+
+    def get_all_allowed_actions(self) -> list[list[str]]:
+        """Return allowed actions for all players."""
+        return [
+            self._player_actions(i) for i in range(len(self.engine.state.players))
+        ]
+
+    def get_claim_options(self) -> list[list[str]]:
+        """Return claim options for every player.
+
+        Each list contains actions like ``chi`` or ``ron`` if the player can
+        claim the most recent discard. Players not able to act have an empty
+        list.
+        """
+        engine = self.engine
+        state = engine.state
+        opts: list[list[str]] = []
+        for i in range(len(state.players)):
+            if i in state.waiting_for_claims:
+                actions = [
+                    a
+                    for a in engine.get_allowed_actions(i)
+                    if a in {CHI, PON, KAN, RON, SKIP}
+                ]
+                opts.append(actions)
+            else:
+                opts.append([])
+        return opts
+
+    def _player_actions(self, player_index: int) -> list[str]:
+        """Return full action list for ``player_index`` including draw/discard."""
+        engine = self.engine
+        actions = set(engine.get_allowed_actions(player_index))
+        state = engine.state
+        if not state.waiting_for_claims and player_index == state.current_player:
+            player = state.players[player_index]
+            if len(player.hand.tiles) % 3 == 1:
+                actions.add(DRAW)
+            else:
+                actions.add(DISCARD)
+        return sorted(actions)
+
+    def get_next_actions(self) -> tuple[int, list[str]]:
+        """Return the next actor and their allowed actions.
+
+        If the only available action is ``draw`` it is performed automatically
+        and the next actor is returned instead.
+        """
+        while True:
+            idx, actions = self.peek_next_actions()
+            if actions == [DRAW]:
+                self.engine.draw_tile(idx)
+                continue
+            return idx, actions
+
+    def peek_next_actions(self) -> tuple[int, list[str]]:
+        """Return the next actor and their allowed actions without drawing.
+
+        Unlike :meth:`get_next_actions` a pending draw is reported as
+        ``["draw"]`` rather than performed.
+        """
+        state = self.engine.state
+        if state.waiting_for_claims:
+            return state.current_player, []
+        idx = state.current_player
+        return idx, self._player_actions(idx)
+
+    def get_snapshot(
+        self,
+        fields: Iterable[str] | None = None,
+        player_index: int | None = None,
+    ) -> dict[str, Any]:
+        """Return a consistent read-only view of the game.
+
+        The snapshot holds the :data:`SNAPSHOT_FIELDS` named in ``fields``,
+        all of them by default, together with the state version and the
+        last event sequence number. With ``player_index`` the per-seat
+        sections ``allowed_actions``, ``claims`` and ``chi_options`` only
+        hold that player's entry. Nothing is drawn or otherwise changed.
+        """
+        engine = self.engine
+        state = engine.state
+        names = SNAPSHOT_FIELDS if fields is None else tuple(fields)
+        unknown = set(names) - set(SNAPSHOT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown snapshot fields: {sorted(unknown)}")
+        if player_index is None:
+            seats = list(range(len(state.players)))
+        else:
+            if not 0 <= player_index < len(state.players):
+                raise IndexError(f"Player {player_index} not found")
+            seats = [player_index]
+
+        def per_seat(values: list) -> Any:
+            return values if player_index is None else values[0]
+
+        snapshot: dict[str, Any] = {
+            "version": engine.state_version,
+            "last_seq": engine.event_log.last_seq,
+        }
+        if "state" in names:
+            snapshot["state"] = state
+        if "allowed_actions" in names:
+            snapshot["allowed_actions"] = per_seat([self._player_actions(i) for i in seats])
+        if "claims" in names:
+            claims = self.get_claim_options()
+            snapshot["claims"] = per_seat([claims[i] for i in seats])
+        if "chi_options" in names:
+            snapshot["chi_options"] = per_seat([engine.get_chi_options(i) for i in seats])
+        if "next_actor" in names:
+            idx, actions = self.peek_next_actions()
+            snapshot["next_actor"] = {"player_index": idx, "actions": actions}
+        return snapshot
+
+    def apply_action(self, action: GameAction) -> object | None:
+        """Apply ``action`` to the engine and return any result."""
+        engine = self.engine
+
+        if action.type == DRAW:
+            assert action.player_index is not None
+            return engine.draw_tile(action.player_index)
+        if action.type == DISCARD and action.tile is not None:
+            assert action.player_index is not None
+            engine.discard_tile(action.player_index, action.tile)
+            return None
+        if action.type == CHI and action.tiles is not None:
+            assert action.player_index is not None
+            engine.call_chi(action.player_index, action.tiles)
+            return None
+        if action.type == PON and action.tiles is not None:
+            assert action.player_index is not None
+            engine.call_pon(action.player_index, action.tiles)
+            return None
+        if action.type == KAN and action.tiles is not None:
+            assert action.player_index is not None
+            engine.call_kan(action.player_index, action.tiles)
+            return None
+        if action.type == RIICHI:
+            assert action.player_index is not None
+            engine.declare_riichi(action.player_index)
+            return None
+        if action.type == TSUMO and action.tile is not None:
+            assert action.player_index is not None
+            return engine.declare_tsumo(action.player_index, action.tile)
+        if action.type == RON and action.tile is not None:
+            assert action.player_index is not None
+            return engine.declare_ron(action.player_index, action.tile)
+        if action.type == SKIP:
+            assert action.player_index is not None
+            engine.skip(action.player_index)
+            return None
+        if action.type == START_KYOKU:
+            assert action.dealer is not None and action.round_number is not None
+            engine.start_kyoku(action.dealer, action.round_number)
+            return None
+        if action.type == ADVANCE_HAND:
+            engine.advance_hand(action.player_index)
+            return None
+        if action.type == END_GAME:
+            return engine.end_game()
+
+        raise ValueError(f"Unknown action: {action.type}")
@@ -0,0 +1,175 @@
+"""Shared shanten calculation service with a bounded LRU cache.
+
+Every shanten and tenpai check in the core package goes through the module
+level :data:`service`. Results are memoized on the immutable 34-kind count
+vector so the AI, practice and quiz helpers and the engine's tenpai checks
+only pay for a hand shape once.
+
+Two interchangeable backends compute cache misses: ``"table"`` (the default,
+see :mod:`core.shanten_table`) and ``"library"``, the recursive search of the
+``mahjong`` package. Both return identical numbers; :func:`set_backend`
+switches between them.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from mahjong.shanten import Shanten
+
+from . import shanten_table
+
+DEFAULT_CACHE_SIZE = 65536
+DEFAULT_BACKEND = "table"
+
+
+def library_shanten(counts: Sequence[int]) -> int:
+    """Return the shanten number computed by the ``mahjong`` library."""
+    return Shanten().calculate_shanten(counts)
+
+
+BACKENDS: dict[str, Callable[[Sequence[int]], int]] = {
+    "library": library_shanten,
+    "table": shanten_table.calculate_shanten,
+}
+
+
+@dataclass
+class CacheInfo:
+    """Statistics describing the state of a :class:`ShantenService` cache."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ShantenService:
+    """Compute shanten numbers through a bounded LRU cache.
+
+    ``backend`` receives a 34-kind count vector and returns its shanten
+    number. ``maxsize`` limits the number of cached hand shapes; ``0``
+    disables caching.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        backend: Callable[[Sequence[int]], int] = BACKENDS[DEFAULT_BACKEND],
+    ) -> None:
+        self.backend = backend
+        self._maxsize = maxsize
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def calculate(self, counts: Sequence[int]) -> int:
+        """Return the shanten number for the 34-kind ``counts``."""
+        key = bytes(counts)
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = self.backend(counts)
+        if self._maxsize > 0:
+            with self._lock:
+                self._cache[key] = value
+                if len(self._cache) > self._maxsize:
+                    self._cache.popitem(last=False)
+        return value
+
+    def is_tenpai(self, counts: Sequence[int]) -> bool:
+        """Return ``True`` if ``counts`` is exactly one tile from winning."""
+        return self.calculate(counts) == 0
+
+    def wait_kinds(self, counts: Sequence[int]) -> frozenset[int]:
+        """Return the kinds that complete the 3n+1 tile ``counts``.
+
+        Kinds already held four times are never waits since no fifth copy
+        exists. Hands that are not tenpai return an empty set after a single
+        lookup.
+        """
+        if self.calculate(counts) != 0:
+            return frozenset()
+        probe = list(counts)
+        waits = []
+        for kind, held in enumerate(probe):
+            if held >= 4:
+                continue
+            probe[kind] = held + 1
+            if self.calculate(probe) == -1:
+                waits.append(kind)
+            probe[kind] = held
+        return frozenset(waits)
+
+    def cache_info(self) -> CacheInfo:
+        """Return hit/miss statistics and the current cache size."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self._maxsize, len(self._cache))
+
+    def resize(self, maxsize: int) -> None:
+        """Change the cache capacity, evicting the oldest entries if needed."""
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._cache) > max(maxsize, 0):
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results and reset the statistics."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def set_backend(self, backend: Callable[[Sequence[int]], int]) -> None:
+        """Use ``backend`` for future misses and drop cached results."""
+        self.backend = backend
+        self.clear()
+
+
+# Process wide service used by the helpers below
+service = ShantenService()
+
+
+def calculate_shanten(counts: Sequence[int]) -> int:
+    """Return the shanten number for ``counts`` using the shared service."""
+    return service.calculate(counts)
+
+
+def is_tenpai(counts: Sequence[int]) -> bool:
+    """Return ``True`` if ``counts`` is tenpai according to the shared service."""
+    return service.is_tenpai(counts)
+
+
+def wait_kinds(counts: Sequence[int]) -> frozenset[int]:
+    """Return the winning kinds for ``counts`` using the shared service."""
+    return service.wait_kinds(counts)
+
+
+def cache_info() -> CacheInfo:
+    """Return statistics for the shared service's cache."""
+    return service.cache_info()
+
+
+def set_cache_size(maxsize: int) -> None:
+    """Configure the capacity of the shared service's cache."""
+    service.resize(maxsize)
+
+
+def clear_cache() -> None:
+    """Clear the shared service's cache and statistics."""
+    service.clear()
+
+
+def set_backend(name: str) -> None:
+    """Select the backend used by the shared service by ``name``."""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown shanten backend: {name}")
+    service.set_backend(backend)
@@ -2,11 +2,10 @@ from __future__ import annotations
 
 """Helpers for a simple shanten count quiz."""
 
-from mahjong.shanten import Shanten
-
 from typing import Any, Type
 
-from .models import Meld, Tile
+from .models import Meld, Tile, tile_counts
+from . import shanten
 from .rules import _tile_to_index
 
 # Optional override used by tests to substitute a dummy engine
@@ -32,24 +31,14 @@ def generate_hand() -> list[Tile]:
     return hand
 
 
-def _hand_counts(hand: list[Tile]) -> list[int]:
-    counts = [0] * 34
-    for tile in hand:
-        counts[_tile_to_index(tile)] += 1
-    return counts
-
-
 def calculate_shanten(hand: list[Tile]) -> int:
     """Return the shanten number for ``hand``."""
-    counts = _hand_counts(hand)
-    return Shanten().calculate_shanten(counts)
+    return shanten.calculate_shanten(tile_counts(hand))
 
 
 def is_tenpai(hand_tiles: list[Tile], melds: list[Meld]) -> bool:
     """Return ``True`` if the combined tiles form a tenpai hand."""
-    counts = [0] * 34
-    for t in hand_tiles:
-        counts[_tile_to_index(t)] += 1
+    counts = tile_counts(hand_tiles)
     for meld in melds:
         for t in meld.tiles:
             counts[_tile_to_index(t)] += 1
@@ -58,4 +47,4 @@ def is_tenpai(hand_tiles: list[Tile], melds: list[Meld]) -> bool:
         excess = total - 14
         for _ in range(excess):
             counts[_tile_to_index(hand_tiles[-1])] -= 1
-    return Shanten().calculate_shanten(counts) == 0
+    return shanten.is_tenpai(counts)
@@ -0,0 +1,359 @@
+"""Table-driven shanten calculator.
+
+The regular-hand search of :class:`mahjong.shanten.Shanten` never looks
+across suit boundaries, so every decomposition it tries is a combination of
+independent per-suit decompositions. This module runs that search once per
+distinct 9-count suit shape, stores the resulting Pareto-optimal
+``(mentsu, taatsu, pairs, isolated)`` outcomes in a table, and combines the
+three suit entries with a closed-form honor summary. Chiitoitsu and kokushi
+use the library's formulas, so every result is identical to
+``Shanten().calculate_shanten``.
+
+Both tables are filled on first use of each shape. A hand of at most 14
+tiles has :data:`SUIT_SHAPES` possible suit shapes and :data:`HONOR_SHAPES`
+honor shapes. An honor entry is a closed-form summary taking tens of
+microseconds to build, so that table stays small even when full. A suit
+entry runs the search above, about 0.4 ms and 0.5-1 KB each, so filling the
+whole suit table would take minutes and hundreds of MB. Dealt hands reach
+far fewer shapes, about 10,000 after 100,000 random hands. The suit table
+is still capped at :data:`MAX_SUIT_ENTRIES` entries, around 60 MB; it is
+emptied when full and refills with the shapes in use.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+# Isolated-tile state of a decomposition. ``_ISO_ALL_FOUR`` means every
+# isolated tile is a kind held four times (it cannot become a pair), which
+# costs an extra step when the hand has no pair.
+_ISO_NONE = 0
+_ISO_ALL_FOUR = 1
+_ISO_OTHER = 2
+
+# Ranking used for dominance pruning: higher never gives a worse result
+_ISO_RANK = {_ISO_ALL_FOUR: 0, _ISO_NONE: 1, _ISO_OTHER: 2}
+
+Outcome = tuple[int, int, int, int]
+# (outcomes, tiles, pairs, kinds, terminal_kinds, has_terminal_pair): the
+# decompositions of one suit plus what chiitoitsu and kokushi need from it
+SuitEntry = tuple[tuple[Outcome, ...], int, int, int, int, bool]
+
+# shapes of 0-4 counts over 9 and 7 kinds holding at most 14 tiles
+SUIT_SHAPES = 405_350
+HONOR_SHAPES = 43_130
+MAX_SUIT_ENTRIES = 1 << 16
+
+_suit_table: dict[bytes, SuitEntry] = {}
+_honor_table: dict[bytes, SuitEntry] = {}
+
+
+def _search_suit(counts: list[int]) -> set[Outcome]:
+    """Return every leaf outcome of the library search over one suit."""
+    four_mask = 0
+    for i in range(9):
+        if counts[i] == 4:
+            four_mask |= 1 << i
+    leaves: set[Outcome] = set()
+    tiles = counts[:]
+
+    def run(depth: int, melds: int, tatsu: int, pairs: int, isolated: int) -> None:
+        while depth < 9 and not tiles[depth]:
+            depth += 1
+        if depth >= 9:
+            if not isolated:
+                iso = _ISO_NONE
+            elif isolated & ~four_mask:
+                iso = _ISO_OTHER
+            else:
+                iso = _ISO_ALL_FOUR
+            leaves.add((melds, tatsu, pairs, iso))
+            return
+
+        i = depth
+        count = tiles[i]
+        if count == 4:
+            tiles[i] -= 3
+            if i < 7 and tiles[i + 2]:
+                if tiles[i + 1]:
+                    _shuntsu(i, -1)
+                    run(i + 1, melds + 2, tatsu, pairs, isolated)
+                    _shuntsu(i, 1)
+                _kanchan(i, -1)
+                run(i + 1, melds + 1, tatsu + 1, pairs, isolated)
+                _kanchan(i, 1)
+            if i < 8 and tiles[i + 1]:
+                _ryanmen(i, -1)
+                run(i + 1, melds + 1, tatsu + 1, pairs, isolated)
+                _ryanmen(i, 1)
+            tiles[i] -= 1
+            run(i + 1, melds + 1, tatsu, pairs, isolated | (1 << i))
+            tiles[i] += 1
+            tiles[i] += 3
+
+            tiles[i] -= 2
+            if i < 7 and tiles[i + 2]:
+                if tiles[i + 1]:
+                    _shuntsu(i, -1)
+                    run(i, melds + 1, tatsu, pairs + 1, isolated)
+                    _shuntsu(i, 1)
+                _kanchan(i, -1)
+                run(i + 1, melds, tatsu + 1, pairs + 1, isolated)
+                _kanchan(i, 1)
+            if i < 8 and tiles[i + 1]:
+                _ryanmen(i, -1)
+                run(i + 1, melds, tatsu + 1, pairs + 1, isolated)
+                _ryanmen(i, 1)
+            tiles[i] += 2
+
+        elif count == 3:
+            tiles[i] -= 3
+            run(i + 1, melds + 1, tatsu, pairs, isolated)
+            tiles[i] += 3
+
+            tiles[i] -= 2
+            if i < 7 and tiles[i + 1] and tiles[i + 2]:
+                _shuntsu(i, -1)
+                run(i + 1, melds + 1, tatsu, pairs + 1, isolated)
+                _shuntsu(i, 1)
+            else:
+                if i < 7 and tiles[i + 2]:
+                    _kanchan(i, -1)
+                    run(i + 1, melds, tatsu + 1, pairs + 1, isolated)
+                    _kanchan(i, 1)
+                if i < 8 and tiles[i + 1]:
+                    _ryanmen(i, -1)
+                    run(i + 1, melds, tatsu + 1, pairs + 1, isolated)
+                    _ryanmen(i, 1)
+            tiles[i] += 2
+
+            if i < 7 and tiles[i + 2] >= 2 and tiles[i + 1] >= 2:
+                _shuntsu(i, -1)
+                _shuntsu(i, -1)
+                run(i, melds + 2, tatsu, pairs, isolated)
+                _shuntsu(i, 1)
+                _shuntsu(i, 1)
+
+        elif count == 2:
+            tiles[i] -= 2
+            run(i + 1, melds, tatsu, pairs + 1, isolated)
+            tiles[i] += 2
+            if i < 7 and tiles[i + 2] and tiles[i + 1]:
+                _shuntsu(i, -1)
+                run(i, melds + 1, tatsu, pairs, isolated)
+                _shuntsu(i, 1)
+
+        elif count == 1:
+            if i < 6 and tiles[i + 1] == 1 and tiles[i + 2] and tiles[i + 3] != 4:
+                _shuntsu(i, -1)
+                run(i + 2, melds + 1, tatsu, pairs, isolated)
+                _shuntsu(i, 1)
+            else:
+                tiles[i] -= 1
+                run(i + 1, melds, tatsu, pairs, isolated | (1 << i))
+                tiles[i] += 1
+                if i < 7 and tiles[i + 2]:
+                    if tiles[i + 1]:
+                        _shuntsu(i, -1)
+                        run(i + 1, melds + 1, tatsu, pairs, isolated)
+                        _shuntsu(i, 1)
+                    _kanchan(i, -1)
+                    run(i + 1, melds, tatsu + 1, pairs, isolated)
+                    _kanchan(i, 1)
+                if i < 8 and tiles[i + 1]:
+                    _ryanmen(i, -1)
+                    run(i + 1, melds, tatsu + 1, pairs, isolated)
+                    _ryanmen(i, 1)
+
+    def _shuntsu(i: int, d: int) -> None:
+        tiles[i] += d
+        tiles[i + 1] += d
+        tiles[i + 2] += d
+
+    def _kanchan(i: int, d: int) -> None:
+        tiles[i] += d
+        tiles[i + 2] += d
+
+    def _ryanmen(i: int, d: int) -> None:
+        tiles[i] += d
+        tiles[i + 1] += d
+
+    run(0, 0, 0, 0, 0)
+    return leaves
+
+
+def _dominates(a: Outcome, b: Outcome) -> bool:
+    return (
+        a[0] >= b[0]
+        and a[1] >= b[1]
+        and a[2] >= b[2]
+        and _ISO_RANK[a[3]] >= _ISO_RANK[b[3]]
+    )
+
+
+def _pareto(outcomes: set[Outcome]) -> tuple[Outcome, ...]:
+    """Drop outcomes that can never beat another outcome of the same suit."""
+    kept = [
+        o
+        for o in outcomes
+        if not any(p != o and _dominates(p, o) for p in outcomes)
+    ]
+    return tuple(sorted(kept, reverse=True))
+
+
+def _build_suit_entry(counts: Sequence[int]) -> SuitEntry:
+    outcomes = _pareto(_search_suit(list(counts)))
+    return _entry(outcomes, counts, (0, 8))
+
+
+def _entry(
+    outcomes: tuple[Outcome, ...], counts: Sequence[int], terminals: Sequence[int]
+) -> SuitEntry:
+    """Bundle decompositions with the per-suit statistics of the other forms."""
+    pairs = sum(1 for c in counts if c >= 2)
+    kinds = sum(1 for c in counts if c)
+    terminal_kinds = sum(1 for i in terminals if counts[i])
+    terminal_pair = any(counts[i] >= 2 for i in terminals)
+    return (outcomes, sum(counts), pairs, kinds, terminal_kinds, terminal_pair)
+
+
+def _suit_entry(counts: Sequence[int]) -> SuitEntry:
+    key = bytes(counts)
+    entry = _suit_table.get(key)
+    if entry is None:
+        entry = _build_suit_entry(counts)
+        if len(_suit_table) >= MAX_SUIT_ENTRIES:
+            # start over rather than track recency on every lookup
+            _suit_table.clear()
+        _suit_table[key] = entry
+    return entry
+
+
+def suit_outcomes(counts: Sequence[int]) -> tuple[Outcome, ...]:
+    """Return the decompositions stored in the table for one suit's counts."""
+    return _suit_entry(counts)[0]
+
+
+def _honor_entry(counts: Sequence[int]) -> SuitEntry:
+    """Return the closed-form honor summary for the 7 honor counts.
+
+    The first item is ``(melds, pairs, jidahai, iso_state)``; ``jidahai`` is
+    reduced by one at evaluation time when the hand needs a pair.
+    """
+    key = bytes(counts)
+    entry = _honor_table.get(key)
+    if entry is not None:
+        return entry
+    melds = pairs = jidahai = 0
+    fours = isolated = 0
+    for i, c in enumerate(counts):
+        if c == 4:
+            melds += 1
+            jidahai += 1
+            fours |= 1 << i
+            isolated |= 1 << i
+        elif c == 3:
+            melds += 1
+        elif c == 2:
+            pairs += 1
+        elif c == 1:
+            isolated |= 1 << i
+    if not isolated:
+        iso = _ISO_NONE
+    elif isolated & ~fours:
+        iso = _ISO_OTHER
+    else:
+        iso = _ISO_ALL_FOUR
+    entry = _entry(((melds, pairs, jidahai, iso),), counts, range(7))
+    _honor_table[key] = entry
+    return entry
+
+
+def _regular(
+    man: SuitEntry, pin: SuitEntry, sou: SuitEntry, honors: SuitEntry, total: int
+) -> int:
+    h_melds, h_pairs, jidahai, h_iso = honors[0][0]
+    if jidahai and total % 3 == 2:
+        jidahai -= 1
+    base_melds = h_melds + (14 - total) // 3
+    best = 8
+    for m1, t1, p1, i1 in man[0]:
+        for m2, t2, p2, i2 in pin[0]:
+            for m3, t3, p3, i3 in sou[0]:
+                melds = base_melds + m1 + m2 + m3
+                tatsu = t1 + t2 + t3
+                pairs = h_pairs + p1 + p2 + p3
+                result = 8 - melds * 2 - tatsu - pairs
+                candidates = melds + tatsu
+                if pairs:
+                    candidates += pairs - 1
+                elif max(h_iso, i1, i2, i3) == _ISO_ALL_FOUR:
+                    result += 1
+                if candidates > 4:
+                    result += candidates - 4
+                if result != -1 and result < jidahai:
+                    result = jidahai
+                if result < best:
+                    best = result
+                    if best == -1:
+                        return best
+    return best
+
+
+def _entries(
+    counts: Sequence[int],
+) -> tuple[SuitEntry, SuitEntry, SuitEntry, SuitEntry, int]:
+    man = _suit_entry(counts[0:9])
+    pin = _suit_entry(counts[9:18])
+    sou = _suit_entry(counts[18:27])
+    honors = _honor_entry(counts[27:34])
+    total = man[1] + pin[1] + sou[1] + honors[1]
+    assert total <= 14, f"Too many tiles = {total}"
+    return man, pin, sou, honors, total
+
+
+def regular_shanten(counts: Sequence[int]) -> int:
+    """Return the regular (4 sets + pair) shanten for a 34-kind count vector."""
+    return _regular(*_entries(counts))
+
+
+def chiitoitsu_shanten(counts: Sequence[int]) -> int:
+    """Return the seven pairs shanten using the library's formula."""
+    man, pin, sou, honors, _ = _entries(counts)
+    return _chiitoitsu(
+        man[2] + pin[2] + sou[2] + honors[2], man[3] + pin[3] + sou[3] + honors[3]
+    )
+
+
+def _chiitoitsu(pairs: int, kinds: int) -> int:
+    if pairs == 7:
+        return -1
+    return 6 - pairs + (7 - kinds if kinds < 7 else 0)
+
+
+def kokushi_shanten(counts: Sequence[int]) -> int:
+    """Return the thirteen orphans shanten using the library's formula."""
+    return _kokushi(*_entries(counts)[:4])
+
+
+def _kokushi(man: SuitEntry, pin: SuitEntry, sou: SuitEntry, honors: SuitEntry) -> int:
+    terminals = man[4] + pin[4] + sou[4] + honors[4]
+    completed = man[5] or pin[5] or sou[5] or honors[5]
+    return 13 - terminals - (1 if completed else 0)
+
+
+def calculate_shanten(counts: Sequence[int]) -> int:
+    """Return the minimum shanten over regular, chiitoitsu and kokushi forms."""
+    man, pin, sou, honors, total = _entries(counts)
+    best = _chiitoitsu(
+        man[2] + pin[2] + sou[2] + honors[2], man[3] + pin[3] + sou[3] + honors[3]
+    )
+    kokushi = _kokushi(man, pin, sou, honors)
+    if kokushi < best:
+        best = kokushi
+    regular = _regular(man, pin, sou, honors, total)
+    return regular if regular < best else best
+
+
+def table_size() -> int:
+    """Return the number of suit shapes currently stored in the table."""
+    return len(_suit_table)
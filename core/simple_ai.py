@@ -2,14 +2,12 @@
 from __future__ import annotations
 
 import random
-from typing import Iterable
-
-from mahjong.shanten import Shanten
 
 from .actions import CHI, PON
 from .mahjong_engine import MahjongEngine
-from .models import Tile
+from .models import SUITED, Tile, tile_counts
 from .rules import _tile_to_index
+from .shanten import calculate_shanten
 
 
 def tsumogiri_turn(engine: MahjongEngine, player_index: int) -> Tile:
@@ -29,25 +27,17 @@ def tsumogiri_turn(engine: MahjongEngine, player_index: int) -> Tile:
     return tile
 
 
-def _hand_counts(hand: Iterable[Tile]) -> list[int]:
-    counts = [0] * 34
-    for tile in hand:
-        counts[_tile_to_index(tile)] += 1
-    return counts
-
-
 def suggest_discard(hand: list[Tile]) -> Tile:
     """Return a discard that keeps the hand close to tenpai."""
 
-    counts = _hand_counts(hand)
-    shanten = Shanten()
+    counts = tile_counts(hand)
     best_tiles: list[Tile] = []
     best_value = 8  # higher than any real shanten number
 
     for tile in hand:
         idx = _tile_to_index(tile)
         counts[idx] -= 1
-        value = shanten.calculate_shanten(counts)
+        value = calculate_shanten(counts)
         counts[idx] += 1
         if value < best_value:
             best_value = value
@@ -71,60 +61,58 @@ def shanten_turn(engine: MahjongEngine, player_index: int) -> Tile:
     return tile
 
 
-def _calculate_shanten(tiles: Iterable[Tile]) -> int:
-    counts = _hand_counts(list(tiles))
-    return Shanten().calculate_shanten(counts)
-
-
 def claim_meld(engine: MahjongEngine, player_index: int) -> bool:
     """Claim pon/chi if it improves shanten. Return True if meld was called."""
 
     state = engine.state
     last_tile = state.last_discard
     last_player = state.last_discard_player
-    if last_tile is None or last_player is None:
+    if last_tile is None or last_player is None or last_tile.kind < 0:
         return False
 
     player = state.players[player_index]
-    current = _calculate_shanten(player.hand.tiles)
+    hand_tiles = player.hand.tiles
+    counts = tile_counts(hand_tiles)
+    current = calculate_shanten(counts)
     best_action: tuple[str, list[Tile]] | None = None
     best_value = current
 
     # Pon candidate
-    same = [t for t in player.hand.tiles if t.suit == last_tile.suit and t.value == last_tile.value]
-    if len(same) >= 2:
-        remaining = player.hand.tiles.copy()
-        remaining.remove(same[0])
-        remaining.remove(same[1])
-        value = _calculate_shanten(remaining)
+    kind = last_tile.kind
+    if counts[kind] >= 2:
+        same = [t for t in hand_tiles if t.kind == kind][:2]
+        counts[kind] -= 2
+        value = calculate_shanten(counts)
+        counts[kind] += 2
         if value < best_value:
             best_value = value
             best_action = (PON, [same[0], same[1], last_tile])
 
     # Chi candidate
-    if (last_player + 1) % len(state.players) == player_index and last_tile.suit in {"man", "pin", "sou"}:
+    if (last_player + 1) % len(state.players) == player_index and last_tile.suit in SUITED:
         for delta1, delta2 in [(-2, -1), (-1, 1), (1, 2)]:
             v1 = last_tile.value + delta1
             v2 = last_tile.value + delta2
             if not (1 <= v1 <= 9 and 1 <= v2 <= 9):
                 continue
-            needed: list[Tile] = []
-            for v in (v1, v2):
-                found = next((t for t in player.hand.tiles if t.suit == last_tile.suit and t.value == v and t not in needed), None)
-                if found is None:
-                    needed = []
-                    break
-                needed.append(found)
-            if len(needed) == 2:
-                remaining = player.hand.tiles.copy()
-                remaining.remove(needed[0])
-                remaining.remove(needed[1])
-                value = _calculate_shanten(remaining)
-                if value < best_value:
-                    best_value = value
-                    meld_tiles = [*needed, last_tile]
-                    meld_tiles.sort(key=lambda t: t.value)
-                    best_action = (CHI, meld_tiles)
+            k1 = kind + delta1
+            k2 = kind + delta2
+            if not (counts[k1] and counts[k2]):
+                continue
+            counts[k1] -= 1
+            counts[k2] -= 1
+            value = calculate_shanten(counts)
+            counts[k1] += 1
+            counts[k2] += 1
+            if value < best_value:
+                best_value = value
+                needed = [
+                    next(t for t in hand_tiles if t.kind == k1),
+                    next(t for t in hand_tiles if t.kind == k2),
+                ]
+                meld_tiles = [*needed, last_tile]
+                meld_tiles.sort(key=lambda t: t.value)
+                best_action = (CHI, meld_tiles)
 
     if best_action is None or best_value >= current:
         return False
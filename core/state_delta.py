@@ -0,0 +1,160 @@
+"""Versioned state serialization and JSON-patch style deltas.
+
+:class:`StateCache` keeps the JSON text of the last few state versions of
+one engine, so repeated reads of an unchanged state are served without
+serializing it again and a client that already holds an older version can
+be sent only :func:`diff` of the two. The parsed form a diff needs is only
+built for versions that are actually diffed.
+
+Deltas use the operations of RFC 6902 JSON Patch: ``replace`` and ``add``
+for changed values, ``add`` with a ``/-`` path for list appends and
+``remove`` for dropped list tails and keys. :func:`apply` applies them.
+"""
+from __future__ import annotations
+
+import copy
+import json
+from collections import OrderedDict
+from typing import Any
+
+from . import serialization
+from .mahjong_engine import MahjongEngine
+
+DEFAULT_CACHE_VERSIONS = 8
+
+
+def diff(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """Return patch operations turning ``old`` into ``new``."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[dict[str, Any]] = []
+        for key, value in new.items():
+            sub = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": sub, "value": value})
+            else:
+                ops.extend(diff(old[key], value, sub))
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        if old[:common] == new[:common]:
+            # a wall draw drops the tail, a discard appends to the river
+            if len(new) > common:
+                return [
+                    {"op": "add", "path": f"{path}/-", "value": value}
+                    for value in new[common:]
+                ]
+            return [
+                {"op": "remove", "path": f"{path}/{i}"}
+                for i in range(len(old) - 1, common - 1, -1)
+            ]
+        if len(old) == len(new):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                ops.extend(diff(a, b, f"{path}/{i}"))
+            return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply(doc: Any, ops: list[dict[str, Any]]) -> Any:
+    """Return a copy of ``doc`` with the patch ``ops`` applied."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        parts = [_unescape(p) for p in op["path"].split("/")[1:]]
+        if not parts:
+            doc = copy.deepcopy(op["value"])
+            continue
+        parent = doc
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        last = parts[-1]
+        if op["op"] == "remove":
+            if isinstance(parent, list):
+                del parent[int(last)]
+            else:
+                del parent[last]
+        elif isinstance(parent, list):
+            value = copy.deepcopy(op["value"])
+            if last == "-":
+                parent.append(value)
+            elif op["op"] == "add":
+                parent.insert(int(last), value)
+            else:
+                parent[int(last)] = value
+        else:
+            parent[last] = copy.deepcopy(op["value"])
+    return doc
+
+
+class StateCache:
+    """Serialized states of one engine keyed by ``state_version``."""
+
+    def __init__(self, engine: MahjongEngine, size: int = DEFAULT_CACHE_VERSIONS) -> None:
+        self.engine = engine
+        self._size = size
+        # version -> tile format -> JSON text
+        self._texts: OrderedDict[int, dict[str, str]] = OrderedDict()
+        self._parsed: dict[tuple[int, str], dict[str, Any]] = {}
+
+    def current_json(self, tile_format: str = "object") -> tuple[int, str]:
+        """Return the current version and its state encoded as JSON text."""
+        version = self.engine.state_version
+        texts = self._texts.get(version)
+        if texts is None:
+            texts = self._texts[version] = {}
+            if len(self._texts) > self._size:
+                dropped, old = self._texts.popitem(last=False)
+                for fmt in old:
+                    self._parsed.pop((dropped, fmt), None)
+        text = texts.get(tile_format)
+        if text is None:
+            text = texts[tile_format] = serialization.dumps(
+                self.engine.state, tile_format=tile_format
+            )
+        return version, text
+
+    def current(self, tile_format: str = "object") -> tuple[int, dict[str, Any]]:
+        """Return the current version and its serialized state.
+
+        The returned dict is shared with later callers and must not be
+        modified.
+        """
+        version, text = self.current_json(tile_format)
+        return version, self._data(version, tile_format, text)
+
+    def delta(
+        self, since_version: int, tile_format: str = "object"
+    ) -> list[dict[str, Any]] | None:
+        """Return the patch from ``since_version`` to the current state.
+
+        ``None`` means that version is no longer cached and the caller has to
+        send the full state instead.
+        """
+        version, text = self.current_json(tile_format)
+        old = self._texts.get(since_version, {}).get(tile_format)
+        if old is None:
+            return None
+        if since_version == version:
+            return []
+        return diff(
+            self._data(since_version, tile_format, old),
+            self._data(version, tile_format, text),
+        )
+
+    def _data(self, version: int, tile_format: str, text: str) -> dict[str, Any]:
+        data = self._parsed.get((version, tile_format))
+        if data is None:
+            data = self._parsed[version, tile_format] = json.loads(text)
+        return data
+
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(part: str) -> str:
+    return part.replace("~1", "/").replace("~0", "~")
@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from typing import Any, Iterable, List
 
-from .models import GameEvent, Tile, GameState, Meld
+from .models import KIND_COUNT, GameEvent, Tile, GameState, Meld, tile_from_kind
 
 
 _TILE_BASE = {
@@ -32,6 +32,22 @@ def tile_to_code(tile: Tile) -> int:
     return base + tile.value
 
 
+_CODE_KINDS = {tile_to_code(tile_from_kind(k)): k for k in range(KIND_COUNT)}
+
+
+def tile_from_code(code: int) -> Tile:
+    """Return a tile for the tenhou.net/6 ``code``.
+
+    The red five codes 51-53 are read as ordinary fives.
+    """
+    if code in (51, 52, 53):
+        code = 10 * (code - 50) + 5
+    kind = _CODE_KINDS.get(code)
+    if kind is None:
+        raise ValueError(f"Unknown tile code: {code}")
+    return tile_from_kind(kind)
+
+
 def meld_to_string(meld: Meld) -> str:
     """Return the Tenhou meld notation for ``meld``."""
     codes = [str(tile_to_code(t)) for t in meld.tiles]
@@ -0,0 +1,193 @@
+"""Grouped undo log used by :class:`~core.mahjong_engine.MahjongEngine`.
+
+Engine mutators record compact primitive entries while they change the
+state: the previous value of an attribute, a list append, a list pop with
+its index and item, or a saved copy of a short list such as a hand. Entries
+are grouped per public action so :meth:`UndoLog.undo` reverses exactly one
+draw, discard, call, riichi or skip by replaying its entries backwards.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator, TypeVar
+
+_SET = 0
+_APPEND = 1
+_POP = 2
+_RESTORE = 3
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class UndoLog:
+    """Stack of undo groups, each a list of primitive entries.
+
+    ``begin``/``commit`` bracket one action; nested ``begin`` calls join the
+    outer group. ``event_marks`` stores the engine's event positions at the
+    start of a group so undoing also drops the events it emitted.
+    """
+
+    def __init__(self) -> None:
+        self._groups: list[tuple[list[tuple], tuple[int, int]]] = []
+        self._current: list[tuple] | None = None
+        self._marks = (0, 0)
+        self._depth = 0
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    @property
+    def recording(self) -> bool:
+        """``True`` while an action group is collecting entries."""
+        return self._current is not None
+
+    def begin(self, event_marks: tuple[int, int]) -> None:
+        """Open a group, or join the group that is already open."""
+        self._depth += 1
+        if self._depth == 1:
+            self._current = []
+            self._marks = event_marks
+
+    def commit(self) -> None:
+        """Close the current group and push it if it recorded anything."""
+        self._depth -= 1
+        if self._depth:
+            return
+        if self._current:
+            self._groups.append((self._current, self._marks))
+        self._current = None
+
+    def rollback(self) -> tuple[int, int] | None:
+        """Revert the entries of the open group and discard it.
+
+        Returns the group's event marks, or ``None`` if nested or nothing was
+        recorded.
+        """
+        self._depth -= 1
+        if self._depth:
+            return None
+        entries, self._current = self._current, None
+        if entries is None:
+            return None
+        _revert(entries)
+        return self._marks
+
+    def undo(self) -> tuple[int, int]:
+        """Revert the most recent group and return its event marks."""
+        entries, marks = self._groups.pop()
+        _revert(entries)
+        return marks
+
+    def clear(self) -> None:
+        """Forget all groups, including the one being recorded."""
+        self._groups.clear()
+        self._current = None
+
+    def set(self, obj: Any, name: str, value: Any) -> None:
+        """Assign ``obj.name = value`` and record the previous value."""
+        if self._current is not None:
+            self._current.append((_SET, obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def remember(self, obj: Any, *names: str) -> None:
+        """Record the current values of ``names`` before ``obj`` changes them."""
+        if self._current is not None:
+            for name in names:
+                self._current.append((_SET, obj, name, getattr(obj, name)))
+
+    def appended(self, items: list) -> None:
+        """Record that one item was appended to ``items``."""
+        if self._current is not None:
+            self._current.append((_APPEND, items))
+
+    def pop(self, items: list, index: int = -1) -> Any:
+        """Pop ``items[index]`` and record where it came from."""
+        if index < 0:
+            index += len(items)
+        item = items.pop(index)
+        if self._current is not None:
+            self._current.append((_POP, items, index, item))
+        return item
+
+    def save(self, items: list) -> None:
+        """Record a copy of ``items`` before it is modified in place."""
+        if self._current is not None:
+            self._current.append((_RESTORE, items, list(items)))
+
+
+def _revert(entries: list[tuple]) -> None:
+    for entry in reversed(entries):
+        op = entry[0]
+        if op == _SET:
+            setattr(entry[1], entry[2], entry[3])
+        elif op == _APPEND:
+            entry[1].pop()
+        elif op == _POP:
+            entry[1].insert(entry[2], entry[3])
+        else:
+            entry[1][:] = entry[2]
+
+
+def undoable(method: F) -> F:
+    """Run an engine method inside an undo group.
+
+    If the method raises, every change it made is reverted before the
+    exception propagates, so failed actions leave the state untouched.
+    Successful calls bump the engine's state version.
+    """
+
+    @wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        log: UndoLog = self._undo
+        log.begin((self.event_log.last_seq, len(self.event_history)))
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException:
+            marks = log.rollback()
+            if marks is not None:
+                self._truncate_events(marks)
+            raise
+        log.commit()
+        self.touch()
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+class Transaction:
+    """Outcome of an :func:`atomic` block."""
+
+    __slots__ = ("reverted",)
+
+    def __init__(self) -> None:
+        self.reverted = False
+
+
+@contextmanager
+def atomic(engine: Any) -> Iterator[Transaction]:
+    """Run the block as a single undo group of ``engine``.
+
+    If the block raises, every change it made is reverted and ``reverted``
+    is set before the exception propagates. A block that finishes a hand
+    cannot be reverted, because starting the next hand clears the undo log;
+    ``reverted`` then stays ``False``.
+    """
+    log: UndoLog = engine._undo
+    transaction = Transaction()
+    journal: list | None = engine.journal
+    journaled = len(journal) if journal is not None else 0
+    log.begin((engine.event_log.last_seq, len(engine.event_history)))
+    try:
+        yield transaction
+    except BaseException:
+        marks = log.rollback()
+        if marks is not None:
+            engine._truncate_events(marks)
+            if journal is not None:
+                # the reverted actions must not be replayed
+                del journal[journaled:]
+            transaction.reverted = True
+        raise
+    log.commit()
+    engine.touch()
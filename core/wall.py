@@ -1,44 +1,54 @@
 """Tile wall management."""
 from __future__ import annotations
 
+import copy
 import random
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass, field
 from typing import List
 
-from .models import Tile
+from .models import TILE_COUNT, Tile, tile_from_id
 
 
-def create_standard_wall() -> list[Tile]:
-    """Return a shuffled list containing the full set of 136 tiles."""
-    tiles: list[Tile] = []
-    for suit in ("man", "pin", "sou"):
-        for value in range(1, 10):
-            tiles.extend([Tile(suit=suit, value=value) for _ in range(4)])
-    for value in range(1, 5):
-        tiles.extend([Tile(suit="wind", value=value) for _ in range(4)])
-    for value in range(1, 4):
-        tiles.extend([Tile(suit="dragon", value=value) for _ in range(4)])
-    random.shuffle(tiles)
+def create_standard_wall(rng: random.Random | None = None) -> list[Tile]:
+    """Return a shuffled list containing the full set of 136 tiles.
+
+    The tiles are shuffled with ``rng``, or the global generator by default.
+    """
+    tiles = [tile_from_id(i) for i in range(TILE_COUNT)]
+    (rng or random).shuffle(tiles)
     return tiles
 
 
 @dataclass
 class Wall:
-    """Represents the live wall plus dead wall, wanpai, and dora indicators."""
+    """Represents the live wall plus dead wall, wanpai, and dora indicators.
+
+    A wall created without ``tiles`` is shuffled with ``rng``.
+    """
 
     tiles: List[Tile] = field(default_factory=list)
     dead_wall: List[Tile] = field(default_factory=list)
     dora_indicators: List[Tile] = field(default_factory=list)
     ura_dora_indicators: List[Tile] = field(default_factory=list)
     wanpai_size: int = 14
+    rng: InitVar[random.Random | None] = None
 
-    def __post_init__(self) -> None:
+    def __post_init__(self, rng: random.Random | None) -> None:
         if not self.tiles:
-            self.reset()
+            self.reset(rng)
+
+    def snapshot(self) -> Wall:
+        """Return a copy with fresh lists that share the immutable tiles."""
+        wall = copy.copy(self)
+        wall.tiles = self.tiles.copy()
+        wall.dead_wall = self.dead_wall.copy()
+        wall.dora_indicators = self.dora_indicators.copy()
+        wall.ura_dora_indicators = self.ura_dora_indicators.copy()
+        return wall
 
-    def reset(self) -> None:
-        """Fill the wall with a freshly shuffled standard tile set."""
-        self.tiles = create_standard_wall()
+    def reset(self, rng: random.Random | None = None) -> None:
+        """Fill the wall with a standard tile set shuffled with ``rng``."""
+        self.tiles = create_standard_wall(rng)
         # Reserve the last 14 tiles as the dead wall
         self.dead_wall = [self.tiles.pop() for _ in range(14)]
         # Reveal the 5th tile from the end of the dead wall as the
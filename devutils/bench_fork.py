@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Compare engine forking strategies in forks per second.
+
+Usage: python devutils/bench_fork.py [--forks N] [--turns N]
+
+A game is advanced a few turns with the simple AI so hands, rivers and the
+event history are populated, then ``copy.deepcopy`` is timed against
+``MahjongEngine.fork`` with and without event history.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.mahjong_engine import MahjongEngine  # noqa: E402
+from core.simple_ai import shanten_turn  # noqa: E402
+
+
+def midgame_engine(turns: int, seed: int) -> MahjongEngine:
+    random.seed(seed)
+    engine = MahjongEngine()
+    for _ in range(turns):
+        if engine.state.waiting_for_claims:
+            for seat in list(engine.state.waiting_for_claims):
+                engine.skip(seat)
+            continue
+        shanten_turn(engine, engine.state.current_player)
+    return engine
+
+
+def bench(name: str, func, engine: MahjongEngine, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        func(engine)
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed
+    print(f"{name:>20}: {rate:10.0f} forks/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forks", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = midgame_engine(args.turns, args.seed)
+    print(f"{len(engine.event_history)} events in history")
+    deep = bench("deepcopy", copy.deepcopy, engine, max(args.forks // 20, 1))
+    bench("fork", lambda e: e.fork(), engine, args.forks)
+    light = bench("fork (no events)", lambda e: e.fork(with_events=False), engine, args.forks)
+    print(f"speedup: {light / deep:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
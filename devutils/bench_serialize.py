@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compare JSON encoding of game states and events per second.
+
+Usage: python devutils/bench_serialize.py [--n N] [--turns N]
+
+A game is advanced a few turns with the simple AI, then the previous path,
+``json.dumps(asdict(...))``, is timed against :func:`core.serialization.dumps`
+for the full state and for the event history. The payload size and parse
+rate of the state are then printed for every tile format.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import serialization  # noqa: E402
+from core.mahjong_engine import MahjongEngine  # noqa: E402
+from core.simple_ai import shanten_turn  # noqa: E402
+
+
+def midgame_engine(turns: int, seed: int) -> MahjongEngine:
+    random.seed(seed)
+    engine = MahjongEngine()
+    for _ in range(turns):
+        if engine.state.waiting_for_claims:
+            for seat in list(engine.state.waiting_for_claims):
+                engine.skip(seat)
+            continue
+        shanten_turn(engine, engine.state.current_player)
+    return engine
+
+
+def via_asdict(obj: Any) -> str:
+    return json.dumps(asdict(obj), separators=(",", ":"), ensure_ascii=False)
+
+
+def bench(name: str, func: Callable[[], Any], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed
+    print(f"{name:>24}: {rate:10.0f} per second")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = midgame_engine(args.turns, args.seed)
+    state = engine.state
+    events = engine.get_event_history()
+    assert serialization.dumps(state) == via_asdict(state)
+
+    print("state:")
+    old = bench("asdict + json.dumps", lambda: via_asdict(state), args.n)
+    new = bench("serialization.dumps", lambda: serialization.dumps(state), args.n)
+    print(f"speedup: {new / old:.1f}x")
+
+    print(f"{len(events)} events:")
+    old = bench(
+        "asdict + json.dumps", lambda: [via_asdict(e) for e in events], max(args.n // 10, 1)
+    )
+    new = bench(
+        "serialization.dumps",
+        lambda: [serialization.dumps(e) for e in events],
+        max(args.n // 10, 1),
+    )
+    print(f"speedup: {new / old:.1f}x")
+
+    for tile_format in serialization.TILE_FORMATS:
+        text = serialization.dumps(state, tile_format=tile_format)
+        print(f"state ({tile_format}): {len(text.encode())} bytes")
+        bench("json.loads", lambda: json.loads(text), args.n)
+
+
+if __name__ == "__main__":
+    main()
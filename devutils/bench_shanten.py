@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compare shanten backends in calls per second.
+
+Usage: python devutils/bench_shanten.py [--hands N] [--repeat N]
+
+Random 13 and 14 tile hands are drawn from a shuffled wall. Each backend is
+timed uncached over the same hands; the table backend is measured both cold
+(empty suit table) and warm.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import shanten_table  # noqa: E402
+from core.shanten import library_shanten  # noqa: E402
+
+
+def random_hands(n: int, seed: int) -> list[list[int]]:
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(n):
+        counts = [0] * 34
+        for tile_id in rng.sample(range(136), rng.choice([13, 14])):
+            counts[tile_id // 4] += 1
+        hands.append(counts)
+    return hands
+
+
+def bench(name: str, func, hands: list[list[int]], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for counts in hands:
+            func(counts)
+    elapsed = time.perf_counter() - start
+    rate = len(hands) * repeat / elapsed
+    print(f"{name:>14}: {rate:12.0f} calls/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    hands = random_hands(args.hands, args.seed)
+    mismatches = sum(
+        library_shanten(c) != shanten_table.calculate_shanten(c) for c in hands
+    )
+    print(f"{len(hands)} hands, {mismatches} mismatches between backends")
+    library = bench("library", library_shanten, hands, args.repeat)
+    shanten_table._suit_table.clear()
+    bench("table (cold)", shanten_table.calculate_shanten, hands, 1)
+    table = bench("table (warm)", shanten_table.calculate_shanten, hands, args.repeat)
+    print(f"speedup: {table / library:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import asyncio
+
+from core.ai import AI_REGISTRY
+from core.engine_manager import EngineManager
+
+
+def _human_to_act(state) -> bool:
+    if state.waiting_for_claims:
+        return 0 in state.waiting_for_claims
+    return state.current_player == 0
+
+
+def test_driver_plays_ai_seats_until_human_turn() -> None:
+    async def run() -> None:
+        manager = EngineManager()
+        game_id, state = manager.create_game(["A", "B", "C", "D"])
+        engine = manager.get_engine(game_id)
+        driver = manager.start_ai(game_id, [1, 2, 3])
+        await asyncio.sleep(0.05)
+        assert state.current_player == 0 and len(state.players[0].hand.tiles) == 14
+
+        with manager.use_engine(game_id) as session:
+            session.discard_tile(0, state.players[0].hand.tiles[0])
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if _human_to_act(state):
+                break
+        assert _human_to_act(state)
+        assert any(
+            e.name == "discard" and e.payload["player_index"] != 0
+            for e in engine.get_event_history()
+        )
+        version = engine.state_version
+        await asyncio.sleep(0.05)
+        assert engine.state_version == version
+        driver.stop()
+
+    asyncio.run(run())
+
+
+def test_driver_survives_a_failing_strategy(monkeypatch) -> None:
+    calls: list[int] = []
+
+    def broken(engine, seat):
+        calls.append(seat)
+        # a move failing halfway still moves the state version on
+        engine.touch()
+        raise IndexError("no tiles")
+
+    monkeypatch.setitem(AI_REGISTRY, "broken", broken)
+
+    async def run() -> None:
+        manager = EngineManager()
+        game_id, state = manager.create_game(["A", "B", "C", "D"])
+        engine = manager.get_engine(game_id)
+        with manager.use_engine(game_id) as session:
+            session.discard_tile(0, state.players[0].hand.tiles[0])
+            for seat in (1, 2, 3):
+                session.skip(seat)
+        driver = manager.start_ai(game_id, [1], ai_type="broken")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if calls:
+                break
+        await asyncio.sleep(0.05)
+        assert calls == [1]
+        assert driver.task is not None and not driver.task.done()
+        errors = [e for e in engine.get_event_history() if e.name == "error"]
+        assert len(errors) == 1
+        assert "IndexError" in errors[0].payload["message"]
+        driver.stop()
+
+    asyncio.run(run())
@@ -14,3 +14,25 @@ def test_allowed_actions_cache_invalidated_on_discard() -> None:
     actions = api.get_allowed_actions(1)
     assert CHI in actions and SKIP in actions
 
+
+
+def test_allowed_actions_cache_is_per_seat(monkeypatch) -> None:
+    api.start_game(["A", "B", "C", "D"])
+    engine = api._engine
+    assert engine is not None
+    computed: list[int] = []
+    original = engine._compute_allowed_actions
+
+    def spy(player_index: int) -> list[str]:
+        computed.append(player_index)
+        return original(player_index)
+
+    monkeypatch.setattr(engine, "_compute_allowed_actions", spy)
+    api.get_allowed_actions(2)
+    assert computed == [2]
+    api.get_allowed_actions(2)
+    assert computed == [2]
+
+    engine.state.players[2].hand.tiles.append(models.Tile("man", 5))
+    api.get_allowed_actions(2)
+    assert computed == [2, 2]
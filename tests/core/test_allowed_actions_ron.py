@@ -1,6 +1,6 @@
 from core.actions import RON
 from core.mahjong_engine import MahjongEngine
-from core.rules import RuleSet
+from core.rules import RuleSet, StandardRuleSet
 from core.models import Tile
 from mahjong.hand_calculating.hand_response import HandResponse
 
@@ -31,3 +31,47 @@ def test_allowed_actions_exclude_ron_when_not_winning() -> None:
     engine.state.players[1].hand.tiles = [Tile("pin", 1)] * 13
     actions = engine.get_allowed_actions(1)
     assert "ron" not in actions
+
+
+def _set_waiting_hand(engine: MahjongEngine) -> None:
+    engine.state.players[1].hand.tiles = [Tile("man", v) for v in range(1, 10)] + [
+        Tile("pin", 1), Tile("pin", 1), Tile("sou", 2), Tile("sou", 3),
+    ]
+
+
+def test_allowed_actions_ron_uses_wait_set() -> None:
+    engine = MahjongEngine(ruleset=StandardRuleSet())
+    _set_waiting_hand(engine)
+    tile = Tile("sou", 4)
+    engine.state.players[0].hand.tiles.append(tile)
+    engine.discard_tile(0, tile)
+    assert RON in engine.get_allowed_actions(1)
+
+
+def test_allowed_actions_exclude_ron_when_furiten() -> None:
+    engine = MahjongEngine(ruleset=StandardRuleSet())
+    _set_waiting_hand(engine)
+    engine.state.players[1].discards.append(Tile("sou", 1))
+    tile = Tile("sou", 4)
+    engine.state.players[0].hand.tiles.append(tile)
+    engine.discard_tile(0, tile)
+    assert RON not in engine.get_allowed_actions(1)
+
+
+def test_allowed_actions_exclude_ron_after_own_discard_was_claimed() -> None:
+    engine = MahjongEngine(ruleset=StandardRuleSet())
+    _set_waiting_hand(engine)
+    state = engine.state
+    own = Tile("sou", 4)
+    state.players[1].hand.tiles.append(own)
+    state.current_player = 1
+    engine.discard_tile(1, own)
+    claimer = state.players[2]
+    pair = [Tile("sou", 4), Tile("sou", 4)]
+    claimer.hand.tiles.extend(pair)
+    engine.call_pon(2, [*pair, own])
+    assert state.players[1].river == []
+    tile = Tile("sou", 1)
+    claimer.hand.tiles.append(tile)
+    engine.discard_tile(2, tile)
+    assert RON not in engine.get_allowed_actions(1)
@@ -1,4 +1,12 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core import api
 from core.engine_manager import EngineManager
+from core.session import GameSession
 
 
 def test_create_game_returns_id_and_state() -> None:
@@ -10,6 +18,44 @@ def test_create_game_returns_id_and_state() -> None:
     assert next_id == 2
 
 
+def test_explicit_ids_are_never_allocated_again() -> None:
+    mgr = EngineManager()
+    assert mgr.create_game(["A", "B", "C", "D"], game_id=2)[0] == 2
+    assert [mgr.create_game(["A", "B", "C", "D"])[0] for _ in range(2)] == [3, 4]
+    with pytest.raises(ValueError):
+        mgr.create_game(["A", "B", "C", "D"], game_id=3)
+
+
+def test_concurrent_creates_with_one_id_keep_the_first_game(monkeypatch) -> None:
+    start = GameSession.start
+
+    def slow_start(*args, **kwargs):
+        # widen the window between the first id check and the insert
+        time.sleep(0.01)
+        return start(*args, **kwargs)
+
+    monkeypatch.setattr(GameSession, "start", slow_start)
+    mgr = EngineManager()
+    barrier = threading.Barrier(8)
+    created: list[object] = []
+    rejected: list[ValueError] = []
+
+    def create() -> None:
+        barrier.wait()
+        try:
+            created.append(mgr.create_game(["A", "B", "C", "D"], game_id=7)[1])
+        except ValueError as err:
+            rejected.append(err)
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and len(rejected) == 7
+    assert mgr.get_engine(7).state is created[0]
+
+
 def test_record_next_actions_deduplicates() -> None:
     mgr = EngineManager()
     gid, _ = mgr.create_game(["A", "B", "C", "D"])
@@ -18,3 +64,135 @@ def test_record_next_actions_deduplicates() -> None:
     assert any(e.name == "next_actions" for e in engine.events)
     mgr.record_next_actions(gid, 0, ["draw"])
     assert sum(1 for e in engine.event_history if e.name == "next_actions") == 1
+
+
+def test_use_engine_binds_per_thread_without_swapping_global() -> None:
+    mgr = EngineManager()
+    first, _ = mgr.create_game(["A", "B", "C", "D"])
+    second, _ = mgr.create_game(["E", "F", "G", "H"])
+    default = api._engine
+    inside = threading.Event()
+    release = threading.Event()
+    seen: dict[str, str] = {}
+
+    def worker() -> None:
+        with mgr.use_engine(first):
+            inside.set()
+            release.wait(5)
+            seen["first"] = api.get_state().players[0].name
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert inside.wait(5)
+    with mgr.use_engine(second):
+        seen["second"] = api.get_state().players[0].name
+    release.set()
+    thread.join(5)
+
+    assert seen == {"first": "A", "second": "E"}
+    assert api._engine is default
+
+
+def test_managed_games_never_become_the_single_game_engine(monkeypatch) -> None:
+    monkeypatch.setattr(api, "_engine", None)
+    monkeypatch.setattr(api, "_default_session", None)
+    mgr = EngineManager()
+    gid, _ = mgr.create_game(["A", "B", "C", "D"])
+    assert api._engine is None
+    with pytest.raises(RuntimeError):
+        api.get_state()
+    with mgr.use_engine(gid):
+        assert api.get_state().players[0].name == "A"
+
+
+def test_use_engine_serializes_access_to_one_game() -> None:
+    mgr = EngineManager()
+    gid, _ = mgr.create_game(["A", "B", "C", "D"])
+    acquired = threading.Event()
+
+    def worker() -> None:
+        with mgr.use_engine(gid):
+            acquired.set()
+
+    with mgr.use_engine(gid):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.1)
+    thread.join(5)
+    assert acquired.is_set()
+
+
+def test_sweep_evicts_finished_idle_and_surplus_games(tmp_path) -> None:
+    mgr = EngineManager(idle_ttl=60, finished_ttl=10, archive_dir=tmp_path)
+    finished, _ = mgr.create_game(["A", "B", "C", "D"])
+    idle, _ = mgr.create_game(["E", "F", "G", "H"])
+    busy, _ = mgr.create_game(["I", "J", "K", "L"])
+    with mgr.use_engine(finished) as session:
+        session.end_game()
+    now = mgr._last_used[busy]
+
+    assert mgr.sweep(now + 5) == []
+    mgr._last_used[busy] = now + 50
+    assert mgr.sweep(now + 60) == [finished, idle]
+    assert list(mgr._engines) == [busy]
+    archives = sorted(p.name for p in tmp_path.iterdir())
+    assert [name.split("-")[1] for name in archives] == [str(finished), str(idle)]
+    assert "end_game" in (tmp_path / archives[0]).read_text()
+    with pytest.raises(KeyError):
+        mgr.get_engine(idle)
+
+    mgr.max_games = 1
+    newest, _ = mgr.create_game(["M", "N", "O", "P"])
+    assert list(mgr._engines) == [newest]
+    stats = mgr.stats()
+    assert stats["live"] == 1
+    assert stats["created"] == 4
+    assert stats["evicted_finished"] == 1
+    assert stats["evicted_idle"] == 1
+    assert stats["evicted_lru"] == 1
+    assert stats["archived"] == 3
+
+
+def test_remove_game_closes_subscriptions_and_stops_ai() -> None:
+    async def scenario() -> None:
+        mgr = EngineManager()
+        gid, _ = mgr.create_game(["A", "B", "C", "D"])
+        subscription = await mgr.subscribe(gid)
+        driver = mgr.start_ai(gid, [1], delay=1)
+        assert mgr.remove_game(gid)
+        assert not mgr.remove_game(gid)
+        while await subscription.get() is not None:
+            pass
+        await asyncio.wait_for(asyncio.gather(driver.task, return_exceptions=True), 1)
+        assert driver.task is not None and driver.task.done()
+        assert mgr.get_driver(gid) is None
+
+    asyncio.run(scenario())
+
+
+def test_lru_eviction_spares_watched_games_and_concurrent_creates() -> None:
+    async def scenario() -> None:
+        mgr = EngineManager(max_games=1)
+        watched, _ = mgr.create_game(["A", "B", "C", "D"])
+        subscription = await mgr.subscribe(watched)
+        mgr.create_game(["E", "F", "G", "H"])
+        third, _ = mgr.create_game(["I", "J", "K", "L"])
+        assert sorted(mgr._engines) == [watched, third]
+        assert mgr.stats()["evicted_lru"] == 1
+        subscription.close()
+
+        def churn() -> None:
+            for _ in range(50):
+                gid, _ = mgr.create_game(["A", "B", "C", "D"])
+                mgr.remove_game(gid)
+
+        threads = [threading.Thread(target=churn) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            mgr.sweep()
+        for thread in threads:
+            thread.join()
+        assert len(mgr._engines) <= 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from core.engine_manager import EngineManager
+from core.event_bus import Subscription
+from core.exceptions import InvalidActionError
+from core.models import Tile
+
+
+def _drain(subscription: Subscription) -> list[dict]:
+    messages = []
+    while not subscription._queue.empty():
+        messages.append(json.loads(subscription._queue.get_nowait()))
+    return messages
+
+
+def test_first_subscriber_receives_backlog_then_pushes() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, state = mgr.create_game(["A", "B", "C", "D"])
+        first = await mgr.subscribe(gid)
+        second = await mgr.subscribe(gid)
+        await asyncio.sleep(0)
+        names = [m["name"] for m in _drain(first)]
+        assert names == ["allowed_actions", "start_game", "start_kyoku"]
+        assert [m["name"] for m in _drain(second)] == ["allowed_actions"]
+
+        idx = state.current_player
+        with mgr.use_engine(gid) as session:
+            session.discard_tile(idx, state.players[idx].hand.tiles[0])
+        await asyncio.sleep(0)
+        for sub in (first, second):
+            names = [m["name"] for m in _drain(sub)]
+            assert names[:3] == ["discard", "claims", "allowed_actions"]
+
+    asyncio.run(run())
+
+
+def test_rolled_back_events_are_not_published() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, state = mgr.create_game(["A", "B", "C", "D"])
+        sub = await mgr.subscribe(gid)
+        await asyncio.sleep(0)
+        _drain(sub)
+        with pytest.raises(InvalidActionError):
+            with mgr.use_engine(gid) as session:
+                session.discard_tile(state.current_player, Tile("sou", 9))
+        mgr.record_error(gid, "bad discard")
+        await asyncio.sleep(0)
+        assert [m["name"] for m in _drain(sub)] == ["error"]
+
+        sub.close()
+        assert await sub.get() is None
+        assert len(mgr.get_bus(gid)) == 0
+
+    asyncio.run(run())
+
+
+def test_broadcast_encodes_once_and_stays_in_room() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, _ = mgr.create_game(["A", "B", "C", "D"])
+        other, _ = mgr.create_game(["E", "F", "G", "H"])
+        first = await mgr.subscribe(gid)
+        second = await mgr.subscribe(gid)
+        outsider = await mgr.subscribe(other)
+        await asyncio.sleep(0)
+        for sub in (first, second, outsider):
+            _drain(sub)
+        mgr.broadcast(gid, {"name": "ping", "payload": {}})
+        await asyncio.sleep(0)
+        text = first._queue.get_nowait()
+        assert text is second._queue.get_nowait()
+        assert json.loads(text) == {"name": "ping", "payload": {}}
+        assert outsider._queue.empty()
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_dropped() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, _ = mgr.create_game(["A", "B", "C", "D"])
+        bus = mgr.get_bus(gid)
+        bus.max_pending = 5
+        slow = await mgr.subscribe(gid)
+        fast = await mgr.subscribe(gid)
+        for _ in range(3):
+            mgr.broadcast(gid, {"name": "ping", "payload": {}})
+            await asyncio.sleep(0)
+            _drain(fast)
+        assert slow.closed
+        assert not fast.closed
+        assert len(bus) == 1
+
+    asyncio.run(run())
+
+
+def test_resume_replays_missed_events_or_sends_snapshot() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, state = mgr.create_game(["A", "B", "C", "D"])
+        live = await mgr.subscribe(gid)
+        await asyncio.sleep(0)
+        seen = [m["seq"] for m in _drain(live) if "seq" in m]
+        idx = state.current_player
+        with mgr.use_engine(gid) as session:
+            session.discard_tile(idx, state.players[idx].hand.tiles[0])
+
+        resumed = await mgr.subscribe(gid, last_seq=seen[-1])
+        await asyncio.sleep(0)
+        replay = _drain(resumed)
+        assert replay[0]["name"] == "allowed_actions"
+        assert replay[1]["name"] == "discard"
+        assert replay[1]["seq"] == seen[-1] + 1
+
+        mgr.get_bus(gid).max_replay = 0
+        stale = await mgr.subscribe(gid, last_seq=0)
+        await asyncio.sleep(0)
+        names = [m["name"] for m in _drain(stale)]
+        assert names == ["allowed_actions", "snapshot"]
+
+    asyncio.run(run())
+
+
+def test_subscribe_waits_for_the_lock_off_the_event_loop() -> None:
+    async def run() -> None:
+        mgr = EngineManager()
+        gid, _ = mgr.create_game(["A", "B", "C", "D"])
+        lock = mgr.get_lock(gid)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold() -> None:
+            with lock:
+                locked.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        locked.wait()
+        pending = asyncio.create_task(mgr.subscribe(gid))
+        # the loop keeps running while the subscriber waits for the lock
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+        assert not pending.done()
+        release.set()
+        sub = await asyncio.wait_for(pending, 1)
+        holder.join()
+        await asyncio.sleep(0)
+        assert [m["name"] for m in _drain(sub)][0] == "allowed_actions"
+
+    asyncio.run(run())
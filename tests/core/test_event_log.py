@@ -0,0 +1,71 @@
+from core.event_log import EventLog
+from core.mahjong_engine import MahjongEngine
+from core.models import GameEvent
+
+
+def _event(i: int) -> GameEvent:
+    return GameEvent(name="e", payload={"i": i})
+
+
+def test_cursors_read_independently() -> None:
+    log = EventLog()
+    first = log.cursor(0)
+    for i in range(3):
+        log.append(_event(i))
+    second = log.cursor(1)
+    assert [e.payload["i"] for e in first.read()] == [0, 1, 2]
+    assert [e.payload["i"] for e in second.read()] == [1, 2]
+    log.append(_event(3))
+    assert [e.payload["i"] for e in first.read()] == [3]
+    assert [e.payload["i"] for e in log.since(2)] == [2, 3]
+
+
+def test_truncate_never_reuses_sequence_numbers() -> None:
+    log = EventLog()
+    for i in range(3):
+        log.append(_event(i))
+    log.truncate(1)
+    assert log.append(_event(9)) == 4
+    assert [e.payload["i"] for e in log.since(0)] == [0, 9]
+
+
+def test_retention_is_bounded_by_slowest_cursor() -> None:
+    log = EventLog(retain=4)
+    for i in range(50):
+        log.append(_event(i))
+    assert len(log) < 8
+    assert log.first_seq > 1
+
+    cursor = log.cursor()
+    for i in range(50):
+        log.append(_event(i))
+    assert len(cursor.read()) == 50
+    cursor.close()
+    for i in range(10):
+        log.append(_event(i))
+    assert len(log) < 8
+
+
+def test_pop_events_does_not_consume_other_readers() -> None:
+    engine = MahjongEngine()
+    start = engine.event_log.last_seq
+    assert [e.name for e in engine.pop_events()] == ["start_game", "start_kyoku"]
+    tile = engine.state.players[0].hand.tiles[0]
+    engine.discard_tile(0, tile)
+    popped = [e.name for e in engine.pop_events()]
+    assert "discard" in popped
+    assert [e.name for e in engine.events_since(start)] == popped
+    assert engine.pop_events() == []
+
+
+def test_pop_events_does_not_hold_back_trimming() -> None:
+    engine = MahjongEngine()
+    log = engine.event_log
+    log.retain = 8
+    engine.pop_events()
+    for i in range(100):
+        engine.append_event(_event(i))
+    assert len(log) < 2 * log.retain
+    popped = engine.pop_events()
+    assert popped[-1].payload == {"i": 99}
+    assert len(popped) == len(log)
@@ -0,0 +1,68 @@
+import asyncio
+import random
+
+from core import serialization
+from core.engine_manager import EngineManager
+from core.game_store import GameStore
+from core.simple_ai import shanten_turn
+
+
+def _play(mgr: EngineManager, game_id: int, turns: int) -> None:
+    for _ in range(turns):
+        with mgr.use_engine(game_id) as session:
+            engine = session.engine
+            if engine.state.waiting_for_claims:
+                for seat in list(engine.state.waiting_for_claims):
+                    engine.skip(seat)
+            else:
+                shanten_turn(engine, engine.state.current_player)
+
+
+def test_recover_rebuilds_games_from_snapshot_and_journal(tmp_path) -> None:
+    path = tmp_path / "games.db"
+    random.seed(1)
+    store = GameStore(path, batch_size=1000, snapshot_every=25)
+    mgr = EngineManager(store=store)
+    first, _ = mgr.create_game(["A", "B", "C", "D"])
+    second, _ = mgr.create_game(["E", "F", "G", "H"], max_rounds=1)
+    gone, _ = mgr.create_game(["I", "J", "K", "L"])
+    _play(mgr, first, 60)
+    _play(mgr, second, 10)
+    with mgr.use_engine(second) as session:
+        session.undo()
+    mgr.remove_game(gone)
+    assert mgr._snapshot_seq[first] > 0
+    expected = {gid: serialization.dumps(mgr.get_state(gid)) for gid in (first, second)}
+    store.flush()
+    # writes queued after the last flush are lost in a crash
+    _play(mgr, first, 1)
+
+    recovered = EngineManager(store=GameStore(path))
+    assert recovered.recover() == [first, second]
+    for gid, text in expected.items():
+        assert serialization.dumps(recovered.get_state(gid)) == text
+    assert recovered.create_game(["M", "N", "O", "P"])[0] == gone + 1
+    _play(recovered, first, 5)
+    assert recovered.stats()["recovered"] == 2
+
+
+def test_recover_resumes_server_played_seats(tmp_path) -> None:
+    path = tmp_path / "games.db"
+    store = GameStore(path)
+    mgr = EngineManager(store=store)
+    gid, _ = mgr.create_game(["A", "B", "C", "D"])
+
+    async def start() -> None:
+        mgr.start_ai(gid, [3, 1], delay=5).stop()
+
+    asyncio.run(start())
+    store.close()
+
+    async def recover() -> None:
+        recovered = EngineManager(store=GameStore(path))
+        assert recovered.recover() == [gid]
+        driver = recovered.get_driver(gid)
+        assert driver is not None and driver.seats == {1, 3} and driver.delay == 5
+        driver.stop()
+
+    asyncio.run(recover())
@@ -0,0 +1,14 @@
+import pytest
+
+from core.id_allocator import IdAllocator, shard_of
+
+
+def test_allocator_hands_out_ids_of_each_shard(tmp_path) -> None:
+    first = IdAllocator(tmp_path / "ids.db", 3)
+    second = IdAllocator(tmp_path / "ids.db", 3)
+    assert [first.allocate(0), second.allocate(0), second.allocate(2), first.allocate(1)] == [1, 4, 3, 2]
+    with pytest.raises(ValueError):
+        IdAllocator(tmp_path / "ids.db", 2)
+    with pytest.raises(ValueError):
+        first.allocate(3)
+    assert [shard_of(n, 3) for n in (1, 2, 3, 4)] == [0, 1, 2, 0]
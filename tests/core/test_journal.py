@@ -0,0 +1,70 @@
+import pickle
+import random
+
+import pytest
+
+from core import journal, serialization
+from core.exceptions import InvalidActionError
+from core.mahjong_engine import MahjongEngine
+from core.models import Tile
+from core.simple_ai import shanten_turn
+
+
+def _play(engine: MahjongEngine, turns: int) -> None:
+    for _ in range(turns):
+        if engine.state.waiting_for_claims:
+            for seat in list(engine.state.waiting_for_claims):
+                engine.skip(seat)
+            continue
+        shanten_turn(engine, engine.state.current_player)
+
+
+def test_seeded_engines_deal_the_same_walls() -> None:
+    first = MahjongEngine(seed=7)
+    second = MahjongEngine(seed=7)
+    assert serialization.dumps(first.state) == serialization.dumps(second.state)
+    first.start_kyoku(1, 2)
+    second.fork().start_kyoku(0, 1)
+    second.start_kyoku(1, 2)
+    assert serialization.dumps(first.state) == serialization.dumps(second.state)
+
+
+def test_replaying_the_journal_rebuilds_the_game() -> None:
+    random.seed(5)
+    engine = MahjongEngine(seed=11)
+    engine.journal = []
+    _play(engine, 20)
+    engine.undo()
+    for seat in list(engine.state.waiting_for_claims):
+        engine.skip(seat)
+    # a tile equal to a hand tile but not the same object
+    player = engine.state.current_player
+    tile = engine.state.players[player].hand.tiles[0]
+    engine.discard_tile(player, Tile(tile.suit, tile.value))
+    with pytest.raises(InvalidActionError):
+        with engine.atomic():
+            for seat in list(engine.state.waiting_for_claims):
+                engine.skip(seat)
+            engine.discard_tile(player, Tile("man", 1))
+    _play(engine, 200)
+
+    replayed = MahjongEngine(seed=11)
+    assert journal.replay(replayed, engine.journal) == len(engine.journal)
+    assert serialization.dumps(replayed.state) == serialization.dumps(engine.state)
+    names = [e.name for e in engine.get_event_history()]
+    assert names.count("start_kyoku") > 1
+    assert [e.name for e in replayed.get_event_history()] == names
+
+
+def test_pickled_engine_continues_like_the_original() -> None:
+    random.seed(2)
+    engine = MahjongEngine(seed=3)
+    _play(engine, 15)
+    engine.journal = []
+    restored = pickle.loads(pickle.dumps(engine))
+    assert restored.journal is None and restored.event_bus is None
+    random.seed(4)
+    _play(engine, 30)
+    engine.undo()
+    journal.replay(restored, engine.journal)
+    assert serialization.dumps(restored.state) == serialization.dumps(engine.state)
@@ -1,5 +1,6 @@
 from core.actions import PON
 import pytest
+from dataclasses import asdict, fields
 from core.mahjong_engine import MahjongEngine
 from core.exceptions import InvalidActionError
 from core.models import Tile
@@ -349,6 +350,33 @@ def test_start_kyoku_resets_state_and_emits_event() -> None:
     assert events and events[0].name == "start_kyoku"
 
 
+def test_start_kyoku_snapshot_is_independent_of_live_state() -> None:
+    engine = MahjongEngine()
+    snapshot = engine.pop_events()[-1].payload["state"]
+    assert asdict(snapshot) == asdict(engine.state)
+    hand = list(engine.state.players[0].hand.tiles)
+    wall_size = len(engine.state.wall.tiles)
+    engine.discard_tile(0, engine.state.players[0].hand.tiles[-1])
+    for i in (1, 2, 3):
+        engine.skip(i)  # the last skip draws for seat 1
+    assert len(engine.state.wall.tiles) == wall_size - 1
+    assert snapshot.players[0].hand.tiles == hand
+    assert snapshot.players[0].river == []
+    assert len(snapshot.wall.tiles) == wall_size
+
+
+def test_state_snapshot_copies_every_field() -> None:
+    engine = MahjongEngine()
+    engine.discard_tile(0, engine.state.players[0].hand.tiles[-1])
+    state = engine.state
+    snapshot = state.snapshot()
+    for f in fields(state):
+        value = getattr(state, f.name)
+        assert getattr(snapshot, f.name) == value, f.name
+        if isinstance(value, list):
+            assert getattr(snapshot, f.name) is not value, f.name
+
+
 def test_start_kyoku_assigns_seat_winds() -> None:
     engine = MahjongEngine()
     engine.pop_events()
@@ -381,3 +409,26 @@ def test_start_kyoku_clears_previous_discard_state() -> None:
     assert engine.state.last_discard is None
     assert engine.state.last_discard_player is None
     assert engine.state.waiting_for_claims == []
+
+
+def test_fork_is_independent_of_parent() -> None:
+    engine = MahjongEngine()
+    fork = engine.fork()
+    assert asdict(fork.state) == asdict(engine.state)
+    assert fork.ruleset is engine.ruleset
+    assert len(fork.get_event_history()) == len(engine.get_event_history())
+    tile = fork.state.players[0].hand.tiles[-1]
+    fork.discard_tile(0, tile)
+    assert tile in fork.state.players[0].river
+    assert engine.state.players[0].river == []
+    assert len(engine.state.players[0].hand.tiles) == 14
+    assert len(fork.get_event_history()) > len(engine.get_event_history())
+
+
+def test_fork_without_events_records_nothing() -> None:
+    engine = MahjongEngine()
+    fork = engine.fork(with_events=False)
+    fork.discard_tile(0, fork.state.players[0].hand.tiles[-1])
+    assert fork.pop_events() == []
+    assert fork.get_event_history() == []
+    assert engine.pop_events()
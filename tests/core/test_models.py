@@ -1,4 +1,6 @@
-from core.models import Tile, Hand
+from dataclasses import asdict
+
+from core.models import Tile, Hand, tile_from_id
 
 
 def test_models_basic() -> None:
@@ -6,3 +8,19 @@ def test_models_basic() -> None:
     hand = Hand()
     hand.tiles.append(tile)
     assert hand.tiles[0] == tile
+
+
+def test_tile_kind_and_equality() -> None:
+    assert Tile("man", 1).kind == 0
+    assert Tile("sou", 9).kind == 26
+    assert Tile("dragon", 3).kind == 33
+    assert Tile("wind", 9).kind == -1
+    assert Tile("pin", 5) == Tile("pin", 5)
+    assert Tile("pin", 5) != Tile("sou", 5)
+
+
+def test_tile_views_exclude_internal_ids() -> None:
+    tile = tile_from_id(135)
+    assert tile.kind == 33 and tile.tile_id == 135
+    assert asdict(tile) == {"suit": "dragon", "value": 3}
+    assert tile.__dict__ == {"suit": "dragon", "value": 3}
@@ -2,6 +2,7 @@ from core.actions import PON
 from core.player import Player
 from core import models
 from core.models import Tile
+from core.rules import StandardRuleSet
 
 
 def test_player_draw_and_discard() -> None:
@@ -51,3 +52,59 @@ def test_has_open_melds() -> None:
         models.Meld(tiles=[models.Tile("man", 1)] * 3, type=PON)
     )
     assert player.has_open_melds()
+
+
+def test_hand_counts_follow_draw_discard_and_meld() -> None:
+    engine_tile = Tile("pin", 3)
+    player = Player(name="Test")
+    player.hand.tiles = [Tile("pin", 3), Tile("pin", 3), Tile("man", 1)]
+    assert player.hand.counts[11] == 2
+    assert player.hand.suit_mask("pin") == 0b100
+    player.draw(engine_tile)
+    assert player.hand.counts[11] == 3
+    player.discard(engine_tile)
+    player.hand.tiles.pop(0)
+    assert player.hand.counts[11] == 1
+    assert player.hand.counts[0] == 1
+    player.hand.tiles.remove(Tile("man", 1))
+    assert player.hand.suit_mask("man") == 0
+
+
+def test_waits_are_cached_until_hand_changes() -> None:
+    ruleset = StandardRuleSet()
+    player = Player(name="Test")
+    player.hand.tiles = [Tile("man", v) for v in range(1, 10)] + [
+        Tile("pin", 1), Tile("pin", 1), Tile("sou", 2), Tile("sou", 3),
+    ]
+    waits = player.waits(ruleset)
+    assert waits == {Tile("sou", 1).kind, Tile("sou", 4).kind}
+    assert player.waits(ruleset) is waits
+    player.draw(Tile("wind", 1))
+    player.discard(player.hand.tiles[0])
+    assert player.waits(ruleset) == frozenset()
+
+
+def test_furiten_uses_wait_set() -> None:
+    ruleset = StandardRuleSet()
+    player = Player(name="Test")
+    player.hand.tiles = [Tile("man", v) for v in range(1, 10)] + [
+        Tile("pin", 1), Tile("pin", 1), Tile("sou", 2), Tile("sou", 3),
+    ]
+    assert not player.is_furiten(ruleset)
+    player.discards.append(Tile("sou", 4))
+    assert player.is_furiten(ruleset)
+
+
+def test_claimed_discards_keep_furiten() -> None:
+    ruleset = StandardRuleSet()
+    player = Player(name="Test")
+    player.hand.tiles = [Tile("man", v) for v in range(1, 10)] + [
+        Tile("pin", 1), Tile("pin", 1), Tile("sou", 2), Tile("sou", 3),
+    ]
+    tile = Tile("sou", 4)
+    player.draw(tile)
+    player.discard(tile)
+    # another player claims the discard
+    player.river.pop()
+    assert player.discards == [tile]
+    assert player.is_furiten(ruleset)
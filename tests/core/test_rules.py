@@ -99,3 +99,35 @@ def test_riichi_and_ippatsu_scoring() -> None:
     yaku_names = [y.name for y in result.yaku]
     assert "Riichi" in yaku_names
     assert "Ippatsu" in yaku_names
+
+
+def test_standard_ruleset_winning_shape() -> None:
+    ruleset = StandardRuleSet()
+    complete = (
+        [Tile("man", v) for v in range(1, 10)]
+        + [Tile("pin", 1), Tile("pin", 2), Tile("pin", 3)]
+        + [Tile("wind", 1), Tile("wind", 1)]
+    )
+    assert ruleset.is_winning_shape(complete, [])
+    assert not ruleset.is_winning_shape(complete[:-1] + [Tile("sou", 5)], [])
+    assert RuleSet().is_winning_shape(complete[:-1], [])
+
+
+def test_allowed_actions_skip_scoring_for_non_winning_discard() -> None:
+    class CountingRuleSet(StandardRuleSet):
+        calls = 0
+
+        def calculate_score(self, *args: object, **kwargs: object) -> HandResponse:
+            CountingRuleSet.calls += 1
+            return super().calculate_score(*args, **kwargs)  # type: ignore[arg-type]
+
+    engine = MahjongEngine(ruleset=CountingRuleSet())
+    state = engine.state
+    for p in state.players:
+        p.hand.tiles = [Tile("man", 1), Tile("pin", 5), Tile("sou", 9), Tile("wind", 2)]
+    discard = Tile("dragon", 1)
+    state.players[0].hand.tiles.append(discard)
+    engine.discard_tile(0, discard)
+    for i in range(4):
+        engine.get_allowed_actions(i)
+    assert CountingRuleSet.calls == 0
@@ -0,0 +1,66 @@
+import json
+import random
+from dataclasses import asdict
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from mahjong.hand_calculating.hand_response import HandResponse
+from mahjong.hand_calculating.yaku_config import YakuConfig
+
+from core import serialization
+from core.mahjong_engine import MahjongEngine
+from core.models import Meld, Tile
+from core.simple_ai import shanten_turn
+
+
+def _reference(obj: object) -> str:
+    return json.dumps(asdict(obj), separators=(",", ":"), ensure_ascii=False)
+
+
+def test_dumps_matches_asdict_for_state_and_events() -> None:
+    random.seed(3)
+    engine = MahjongEngine()
+    engine.state.players[0].name = "東家"
+    for _ in range(12):
+        if engine.state.waiting_for_claims:
+            for seat in list(engine.state.waiting_for_claims):
+                engine.skip(seat)
+            continue
+        shanten_turn(engine, engine.state.current_player)
+    engine.state.players[1].hand.melds.append(
+        Meld(tiles=[Tile("pin", 5)] * 3, type="pon", called_from=2)
+    )
+
+    assert serialization.dumps(engine.state) == _reference(engine.state)
+    for event in engine.get_event_history():
+        assert serialization.dumps(event) == _reference(event)
+
+
+def test_objects_and_tile_codes() -> None:
+    result = HandResponse(
+        cost={"main": 1000, "additional": 0}, han=1, fu=30, yaku=[YakuConfig().riichi]
+    )
+    assert json.loads(serialization.dumps(result)) == jsonable_encoder(result)
+
+    tiles = [Tile("man", 1), Tile("wind", 4), Tile("dragon", 3)]
+    assert serialization.dumps(tiles, tile_format="code") == "[11,44,47]"
+    assert serialization.dumps({"tile": tiles[0]}) == '{"tile":{"suit":"man","value":1}}'
+    with pytest.raises(ValueError):
+        serialization.dumps(tiles, tile_format="binary")
+    with pytest.raises(ValueError):
+        serialization.dumps(float("nan"))
+
+
+def test_load_tile_reads_every_format() -> None:
+    tile = Tile("sou", 7)
+    tile.tile_id = 98
+    for tile_format in serialization.TILE_FORMATS:
+        value = json.loads(serialization.dumps(tile, tile_format=tile_format))
+        loaded = serialization.load_tile(value, tile_format)
+        assert loaded == tile
+    assert serialization.load_tile(98, "id").tile_id == 98
+    assert serialization.load_tile(53, "code") == Tile("sou", 5)
+    with pytest.raises(ValueError):
+        serialization.load_tile(136, "id")
+    with pytest.raises(ValueError):
+        serialization.load_tile(37, "object")
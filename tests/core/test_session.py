@@ -0,0 +1,76 @@
+import json
+from dataclasses import asdict, is_dataclass
+
+from core import api, models
+from core.actions import CHI
+from core.session import GameSession
+
+
+def test_sessions_drive_independent_engines() -> None:
+    first = GameSession.start(["A", "B", "C", "D"])
+    second = GameSession.start(["E", "F", "G", "H"])
+    assert first.engine is not second.engine
+    assert first.get_state().players[0].name == "A"
+    assert second.get_state().players[0].name == "E"
+
+    idx, actions = first.get_next_actions()
+    tile = first.state.players[idx].hand.tiles[-1]
+    first.discard_tile(idx, tile)
+    assert tile in first.state.players[idx].river
+    assert not any(second.state.players[i].river for i in range(4))
+
+
+def test_session_call_chi_inserts_discard() -> None:
+    session = GameSession.start(["A", "B", "C", "D"])
+    state = session.state
+    tile = models.Tile("man", 3)
+    state.players[0].hand.tiles.append(tile)
+    session.discard_tile(0, tile)
+    caller = state.players[1]
+    caller.hand.tiles.extend([models.Tile("man", 1), models.Tile("man", 2)])
+    session.call_chi(1, [models.Tile("man", 1), models.Tile("man", 2)])
+    assert caller.hand.melds[0].type == CHI
+    assert any(t is tile for t in caller.hand.melds[0].tiles)
+
+
+def test_api_functions_use_bound_session() -> None:
+    api.start_game(["A", "B", "C", "D"])
+    session = GameSession.start(["E", "F", "G", "H"])
+    with api.bind_session(session):
+        assert api.get_state() is session.state
+    assert api.get_state().players[0].name == "A"
+
+
+def test_snapshot_reports_pending_draw_without_drawing() -> None:
+    session = GameSession.start(["A", "B", "C", "D"])
+    state = session.state
+    nxt = state.current_player
+    state.players[nxt].hand.tiles.pop()
+    count = len(state.players[nxt].hand.tiles)
+    snapshot = session.get_snapshot(["next_actor", "allowed_actions"], player_index=nxt)
+    assert set(snapshot) == {"version", "last_seq", "next_actor", "allowed_actions"}
+    assert snapshot["next_actor"]["player_index"] == nxt
+    assert "draw" in snapshot["next_actor"]["actions"]
+    assert snapshot["allowed_actions"] == snapshot["next_actor"]["actions"]
+    assert len(state.players[nxt].hand.tiles) == count
+
+
+def test_mjai_log_keeps_default_json_separators() -> None:
+    session = GameSession.start(["東", "B", "C", "D"])
+    idx = session.state.current_player
+    session.discard_tile(idx, session.state.players[idx].hand.tiles[0])
+
+    def encode(obj):
+        if is_dataclass(obj) and not isinstance(obj, type):
+            return asdict(obj)
+        if isinstance(obj, dict):
+            return {k: encode(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [encode(v) for v in obj]
+        return obj
+
+    expected = "\n".join(
+        json.dumps({"type": e.name, **encode(e.payload)}, ensure_ascii=False)
+        for e in session.get_event_history()
+    )
+    assert session.get_mjai_log() == expected
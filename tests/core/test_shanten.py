@@ -0,0 +1,37 @@
+from core.models import Tile, tile_counts
+from core.shanten import ShantenService, library_shanten
+
+
+TENPAI = [Tile("man", v) for v in range(1, 10)] + [
+    Tile("pin", 1), Tile("pin", 1), Tile("sou", 2), Tile("sou", 3),
+]
+
+
+def test_service_caches_results_and_reports_stats() -> None:
+    calls: list[bytes] = []
+
+    def backend(counts: list[int]) -> int:
+        calls.append(bytes(counts))
+        return library_shanten(counts)
+
+    service = ShantenService(maxsize=8, backend=backend)
+    counts = tile_counts(TENPAI)
+    assert service.is_tenpai(counts)
+    assert service.calculate(counts) == 0
+    info = service.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert len(calls) == 1
+
+
+def test_service_evicts_least_recently_used() -> None:
+    service = ShantenService(maxsize=2)
+    hands = [tile_counts(TENPAI[:-i]) for i in (1, 2, 3)]
+    for counts in hands:
+        service.calculate(counts)
+    assert service.cache_info().currsize == 2
+    service.calculate(hands[0])
+    assert service.cache_info().misses == 4
+    service.resize(1)
+    assert service.cache_info().currsize == 1
+    service.clear()
+    assert service.cache_info().hits == 0
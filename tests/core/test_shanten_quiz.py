@@ -1,4 +1,4 @@
-from core import shanten_quiz, models
+from core import shanten, shanten_quiz, models
 
 
 def test_generate_hand(monkeypatch):
@@ -25,12 +25,11 @@ def test_generate_hand(monkeypatch):
 def test_calculate_shanten(monkeypatch):
     called = {}
 
-    class DummyShanten:
-        def calculate_shanten(self, counts: list[int]) -> int:
-            called["counts"] = counts
-            return 2
+    def fake_backend(counts: list[int]) -> int:
+        called["counts"] = counts
+        return 2
 
-    monkeypatch.setattr(shanten_quiz, "Shanten", DummyShanten)
+    monkeypatch.setattr(shanten, "service", shanten.ShantenService(backend=fake_backend))
     hand = [models.Tile("man", 1) for _ in range(13)]
     value = shanten_quiz.calculate_shanten(hand)
     assert value == 2
@@ -38,12 +37,11 @@ def test_calculate_shanten(monkeypatch):
 
 
 def test_is_tenpai_helper(monkeypatch) -> None:
-    class DummyShanten:
-        def calculate_shanten(self, counts: list[int]) -> int:
-            # Return 0 when a specific count is passed to simulate tenpai
-            return 0 if counts[0] == 14 else 1
+    def fake_backend(counts: list[int]) -> int:
+        # Return 0 when a specific count is passed to simulate tenpai
+        return 0 if counts[0] == 14 else 1
 
-    monkeypatch.setattr(shanten_quiz, "Shanten", DummyShanten)
+    monkeypatch.setattr(shanten, "service", shanten.ShantenService(backend=fake_backend))
     tiles = [models.Tile("man", 1) for _ in range(14)]
     assert shanten_quiz.is_tenpai(tiles, [])
     assert not shanten_quiz.is_tenpai(tiles[:-1], [])
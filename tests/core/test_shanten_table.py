@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from core import shanten, shanten_table
+from core.shanten import library_shanten
+
+
+def test_table_matches_library_on_random_hands() -> None:
+    rng = random.Random(7)
+    for _ in range(2000):
+        counts = [0] * 34
+        for tile_id in rng.sample(range(136), rng.choice([1, 4, 7, 10, 13, 14])):
+            counts[tile_id // 4] += 1
+        assert shanten_table.calculate_shanten(counts) == library_shanten(counts)
+
+
+@pytest.mark.parametrize(
+    "counts",
+    [
+        # kokushi tenpai and complete
+        [1, 0, 0, 0, 0, 0, 0, 0, 1] * 3 + [1] * 6 + [0],
+        [2, 0, 0, 0, 0, 0, 0, 0, 1] + [1, 0, 0, 0, 0, 0, 0, 0, 1] * 2 + [1] * 7,
+        # seven pairs with a quad, which the library does not count twice
+        [2, 2, 2, 2, 2, 0, 0, 0, 0] + [0] * 18 + [4, 0, 0, 0, 0, 0, 0],
+        # honor quads left isolated
+        [1, 1, 1, 0, 0, 0, 0, 0, 0] + [0] * 18 + [4, 4, 0, 0, 0, 1, 0],
+    ],
+)
+def test_table_matches_library_on_special_shapes(counts: list[int]) -> None:
+    assert shanten_table.calculate_shanten(counts) == library_shanten(counts)
+
+
+def test_set_backend_switches_and_validates() -> None:
+    try:
+        shanten.set_backend("library")
+        assert shanten.service.backend is library_shanten
+        with pytest.raises(ValueError):
+            shanten.set_backend("unknown")
+    finally:
+        shanten.set_backend(shanten.DEFAULT_BACKEND)
+    assert shanten.service.backend is shanten_table.calculate_shanten
+
+
+def _shapes(kinds: int, tiles: int = 14) -> int:
+    # ways to give each of ``kinds`` kinds 0-4 tiles, at most ``tiles`` in all
+    ways = [1] + [0] * tiles
+    for _ in range(kinds):
+        ways = [sum(ways[t - c] for c in range(5) if c <= t) for t in range(tiles + 1)]
+    return sum(ways)
+
+
+def test_table_sizes_are_pinned() -> None:
+    assert shanten_table.SUIT_SHAPES == _shapes(9)
+    assert shanten_table.HONOR_SHAPES == _shapes(7)
+    assert shanten_table.MAX_SUIT_ENTRIES < shanten_table.SUIT_SHAPES
+
+
+def test_suit_table_stays_within_its_cap(monkeypatch) -> None:
+    monkeypatch.setattr(shanten_table, "_suit_table", {})
+    monkeypatch.setattr(shanten_table, "MAX_SUIT_ENTRIES", 8)
+    rng = random.Random(11)
+    for _ in range(200):
+        counts = [0] * 34
+        for tile_id in rng.sample(range(136), 14):
+            counts[tile_id // 4] += 1
+        assert shanten_table.calculate_shanten(counts) == library_shanten(counts)
+        assert shanten_table.table_size() <= 8
@@ -0,0 +1,31 @@
+from dataclasses import asdict
+
+from core.mahjong_engine import MahjongEngine
+from core.state_delta import StateCache, apply, diff
+
+
+def test_diff_uses_list_tail_operations() -> None:
+    old = {"wall": [1, 2, 3], "river": [4], "name": "A"}
+    new = {"wall": [1, 2], "river": [4, 5], "name": "B"}
+    ops = diff(old, new)
+    assert {"op": "remove", "path": "/wall/2"} in ops
+    assert {"op": "add", "path": "/river/-", "value": 5} in ops
+    assert {"op": "replace", "path": "/name", "value": "B"} in ops
+    assert apply(old, ops) == new
+
+
+def test_state_cache_delta_reproduces_current_state() -> None:
+    engine = MahjongEngine()
+    cache = StateCache(engine)
+    version, before = cache.current()
+    assert cache.current()[1] is before
+    assert cache.delta(version) == []
+
+    player = engine.state.players[engine.state.current_player]
+    engine.discard_tile(engine.state.current_player, player.hand.tiles[0])
+    new_version, after = cache.current()
+    assert new_version > version
+    patch = cache.delta(version)
+    assert patch is not None
+    assert apply(before, patch) == after == asdict(engine.state)
+    assert cache.delta(-1) is None
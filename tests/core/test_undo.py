@@ -0,0 +1,85 @@
+from dataclasses import asdict
+
+import pytest
+
+from core.actions import PON
+from core.exceptions import InvalidActionError
+from core.mahjong_engine import MahjongEngine
+from core.models import Tile
+
+
+def test_undo_discard_and_draw_restores_state() -> None:
+    engine = MahjongEngine()
+    start = asdict(engine.state)
+    history = len(engine.get_event_history())
+    engine.discard_tile(0, engine.state.players[0].hand.tiles[3])
+    after_discard = asdict(engine.state)
+    for seat in (1, 2, 3):
+        engine.skip(seat)
+    assert len(engine.state.players[1].hand.tiles) == 14
+
+    for _ in range(3):
+        engine.undo()
+    assert asdict(engine.state) == after_discard
+    engine.undo()
+    assert asdict(engine.state) == start
+    assert [e.name for e in engine.get_event_history()[history:]] == ["undo"]
+    assert not engine.can_undo
+
+
+def test_undo_pon_restores_river_and_hand() -> None:
+    engine = MahjongEngine()
+    state = engine.state
+    tile = Tile("pin", 1)
+    state.players[0].hand.tiles.append(tile)
+    state.players[2].hand.tiles.extend([Tile("pin", 1), Tile("pin", 1)])
+    engine.discard_tile(0, tile)
+    before = asdict(state)
+    engine.call_pon(2, [Tile("pin", 1), Tile("pin", 1), tile])
+    assert state.players[2].hand.melds[0].type == PON
+    engine.undo()
+    assert asdict(state) == before
+    assert state.players[0].river[-1] is tile
+    assert state.last_discard is tile
+
+
+def test_failed_action_leaves_state_untouched() -> None:
+    engine = MahjongEngine()
+    state = engine.state
+    state.players[1].ippatsu_available = True
+    before = asdict(state)
+    with pytest.raises(InvalidActionError):
+        engine.call_chi(1, [Tile("man", 1), Tile("man", 2), Tile("man", 3)])
+    assert asdict(state) == before
+    assert not engine.can_undo
+
+
+def test_undo_log_cleared_on_new_hand() -> None:
+    engine = MahjongEngine()
+    engine.discard_tile(0, engine.state.players[0].hand.tiles[-1])
+    assert engine.can_undo
+    engine.start_kyoku(dealer=1, round_number=1)
+    assert not engine.can_undo
+    with pytest.raises(InvalidActionError):
+        engine.undo()
+
+
+def test_atomic_block_reverts_every_action_on_failure() -> None:
+    engine = MahjongEngine()
+    before = asdict(engine.state)
+    last_seq = engine.event_log.last_seq
+    with pytest.raises(InvalidActionError):
+        with engine.atomic() as transaction:
+            engine.discard_tile(0, engine.state.players[0].hand.tiles[3])
+            engine.skip(1)
+            engine.discard_tile(1, Tile("man", 1))
+    assert transaction.reverted
+    assert asdict(engine.state) == before
+    assert engine.event_log.since(last_seq) == []
+
+    with engine.atomic():
+        engine.discard_tile(0, engine.state.players[0].hand.tiles[3])
+        for seat in (1, 2, 3):
+            engine.skip(seat)
+    engine.undo()
+    assert asdict(engine.state) == before
@@ -44,3 +44,10 @@ def test_remaining_yama_tiles_excludes_wanpai() -> None:
     # Remove all drawable tiles
     wall.tiles = wall.tiles[-wall.wanpai_size:]
     assert wall.remaining_yama_tiles == 0
+
+
+def test_wall_assigns_unique_tile_ids() -> None:
+    wall = Wall()
+    ids = sorted(t.tile_id for t in wall.tiles + wall.dead_wall)
+    assert ids == list(range(136))
+    assert all(t.kind == t.tile_id // 4 for t in wall.tiles)
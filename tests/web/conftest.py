@@ -1,10 +1,13 @@
 import pytest
 from web.server import manager
-from core import api
 
 
 @pytest.fixture(autouse=True)
 def _reset_manager() -> None:
+    for driver in manager._drivers.values():
+        driver.stop()
+    manager._drivers.clear()
     manager._engines.clear()
+    manager._last_used.clear()
+    manager.counters.clear()
     manager._next_id = 1
-    api._engine = None  # type: ignore[assignment]
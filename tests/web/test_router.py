@@ -0,0 +1,57 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from core.id_allocator import IdAllocator
+from web import server
+from web.router import create_router
+
+
+class _Worker(httpx.ASGITransport):
+    """Transport to the local server app that remembers the requested paths."""
+
+    def __init__(self) -> None:
+        super().__init__(app=server.app)
+        self.paths: list[str] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        return await super().handle_async_request(request)
+
+
+def test_router_sends_each_game_to_its_shard(monkeypatch, tmp_path) -> None:
+    # the worker app stands in for both shards, so it accepts any routed id
+    monkeypatch.setattr(server, "allocator", IdAllocator(tmp_path / "worker-ids.db"))
+    workers = [_Worker(), _Worker()]
+    clients = [httpx.AsyncClient(transport=w, base_url=f"http://w{i}") for i, w in enumerate(workers)]
+    router = create_router(
+        ["http://w0", "http://w1"], IdAllocator(tmp_path / "ids.db", 2), clients=clients
+    )
+    with TestClient(router) as client:
+        ids = [
+            client.post("/games", json={"players": ["A", "B", "C", "D"]}).json()["id"]
+            for _ in range(3)
+        ]
+        assert ids == [1, 2, 3]
+        assert client.get("/games/2").json()["players"][0]["name"] == "A"
+        assert client.get("/games/3/next-actions").status_code == 200
+        assert client.get("/health").json() == {"status": "ok"}
+    assert workers[0].paths == ["/games", "/games", "/games/3/next-actions"]
+    assert workers[1].paths == ["/games", "/games/2", "/health"]
+
+
+def test_worker_without_id_database_ignores_client_ids() -> None:
+    client = TestClient(server.app)
+    body = {"players": ["A", "B", "C", "D"]}
+    assert client.post("/games", json=body, headers={"X-Game-Id": "2"}).status_code == 400
+    assert [client.post("/games", json=body).json()["id"] for _ in range(2)] == [1, 2]
+
+
+def test_worker_rejects_ids_of_other_shards(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(server, "allocator", IdAllocator(tmp_path / "ids.db", 2))
+    monkeypatch.setattr(server, "SHARD_INDEX", 1)
+    monkeypatch.setattr(server, "SHARD_COUNT", 2)
+    client = TestClient(server.app)
+    body = {"players": ["A", "B", "C", "D"]}
+    assert client.post("/games", json=body, headers={"X-Game-Id": "3"}).status_code == 421
+    assert client.post("/games", json=body, headers={"X-Game-Id": "4"}).json()["id"] == 4
+    assert client.post("/games", json=body, headers={"X-Game-Id": "4"}).status_code == 409
@@ -1,23 +1,29 @@
 from fastapi.testclient import TestClient
 import logging
+import time
 import pytest
 
-from web.server import app
+from web.server import app, manager
 from core.actions import DRAW, DISCARD, CHI, PON, KAN, RIICHI, TSUMO, RON, SKIP, AUTO
 from core import api, models
 from core import exceptions as core_exceptions
+from core.session import GameSession
+from core.state_delta import apply as apply_patch
+from core.tenhou_log import tile_to_code
 
 client = TestClient(app)
 
 
+def _session(game_id: int = 1) -> GameSession:
+    return manager.get_session(game_id)
+
+
 def test_get_game_returns_404_when_not_started() -> None:
-    api._engine = None  # type: ignore[assignment]
     response = client.get("/games/1")
     assert response.status_code == 404
 
 
 def test_websocket_connect_without_game() -> None:
-    api._engine = None  # type: ignore[assignment]
     with client.websocket_connect("/ws/1"):
         pass
 
@@ -28,6 +34,16 @@ def test_health_endpoint() -> None:
     assert response.json() == {"status": "ok"}
 
 
+def test_stats_endpoint_counts_removed_games() -> None:
+    game_id = client.post("/games", json={"players": ["A", "B", "C", "D"]}).json()["id"]
+    assert manager.remove_game(game_id)
+    assert client.get(f"/games/{game_id}").status_code == 404
+    stats = client.get("/stats").json()
+    assert stats["live"] == 0
+    assert stats["created"] == 1
+    assert stats["removed"] == 1
+
+
 def test_create_and_get_game() -> None:
     create = client.post("/games", json={"players": ["A", "B", "C", "D"]})
     assert create.status_code == 200
@@ -65,11 +81,46 @@ def test_get_events_endpoint() -> None:
     assert "events" in data and isinstance(data["events"], list)
 
 
+def test_events_since_returns_only_new_events() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    body = client.get("/games/1/events").json()
+    last_seq = body["last_seq"]
+    assert last_seq == len(body["events"])
+    state = _session().get_state()
+    tile = state.players[state.current_player].hand.tiles[0]
+    client.post(
+        "/games/1/action",
+        json={"player_index": state.current_player, "action": DISCARD, "tile": tile.__dict__},
+    )
+    delta = client.get(f"/games/1/events?since={last_seq}").json()
+    assert delta["events"][0]["name"] == "discard"
+    assert delta["first_seq"] == 1
+    assert delta["last_seq"] == last_seq + len(delta["events"])
+
+
+def test_get_game_etag_and_since_version() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    first = client.get("/games/1")
+    etag = first.headers["etag"]
+    assert client.get("/games/1", headers={"If-None-Match": etag}).status_code == 304
+
+    version = int(etag.strip('"').split(".")[1])
+    state = _session().get_state()
+    tile = state.players[state.current_player].hand.tiles[0]
+    client.post(
+        "/games/1/action",
+        json={"player_index": state.current_player, "action": DISCARD, "tile": tile.__dict__},
+    )
+    resp = client.get(f"/games/1?since_version={version}")
+    assert resp.headers["etag"] != etag
+    body = resp.json()
+    assert body["since_version"] == version
+    assert apply_patch(first.json(), body["patch"]) == client.get("/games/1").json()
+
+
 def test_draw_action_endpoint() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    from core import api
-    assert api._engine is not None
-    api._engine.state.players[0].hand.tiles.pop()
+    _session().engine.state.players[0].hand.tiles.pop()
     resp = client.post(
         "/games/1/action",
         json={"player_index": 0, "action": DRAW},
@@ -79,6 +130,45 @@ def test_draw_action_endpoint() -> None:
     assert "suit" in tile and "value" in tile
 
 
+def test_undo_endpoint_reverts_discard() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    before = client.get("/games/1").json()
+    tile = before["players"][0]["hand"]["tiles"][0]
+    resp = client.post(
+        "/games/1/action",
+        json={"player_index": 0, "action": DISCARD, "tile": tile},
+    )
+    assert resp.status_code == 200
+    resp = client.post("/games/1/undo")
+    assert resp.status_code == 200
+    assert resp.json() == before
+    assert client.post("/games/1/undo").status_code == 409
+
+
+def test_undo_and_start_kyoku_encode_under_the_game_lock(monkeypatch) -> None:
+    from web import server
+
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    lock = manager.get_lock(1)
+    held: list[bool] = []
+    encode = server._json
+
+    def checked(*args, **kwargs):
+        held.append(lock._is_owned())  # type: ignore[attr-defined]
+        return encode(*args, **kwargs)
+
+    monkeypatch.setattr(server, "_json", checked)
+    tile = _session().get_state().players[0].hand.tiles[0]
+    client.post(
+        "/games/1/action",
+        json={"player_index": 0, "action": DISCARD, "tile": tile.__dict__},
+    )
+    held.clear()
+    assert client.post("/games/1/undo").status_code == 200
+    assert client.post("/games/1/start-kyoku", json={"dealer": 1, "round": 2}).status_code == 200
+    assert held == [True, True]
+
+
 def test_draw_without_discard_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
     resp = client.post(
@@ -126,9 +216,8 @@ def test_invalid_action_handler(monkeypatch) -> None:
 
 def test_discard_action_endpoint() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
-    assert api._engine is not None
-    api._engine.state.players[state.current_player].hand.tiles = [
+    state = _session().get_state()
+    _session().engine.state.players[state.current_player].hand.tiles = [
         models.Tile("man", 1)
     ] * 13
     draw = client.post(
@@ -146,7 +235,7 @@ def test_discard_action_endpoint() -> None:
 
 def test_action_logging_includes_request(caplog: pytest.LogCaptureFixture) -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     tile = state.players[state.current_player].hand.tiles[0]
     with caplog.at_level(logging.INFO):
         resp = client.post(
@@ -159,7 +248,7 @@ def test_action_logging_includes_request(caplog: pytest.LogCaptureFixture) -> No
 
 def test_discard_invalid_tile_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     player = state.players[state.current_player]
     tile = {"suit": "man", "value": 1}
     while models.Tile(**tile) in player.hand.tiles:
@@ -186,7 +275,7 @@ def test_discard_without_tile_uses_auto() -> None:
 
 def test_chi_without_discard_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     chi_tile = {"suit": "man", "value": 3}
     state.players[0].hand.tiles = [models.Tile(**chi_tile)]
     state.players[1].hand.tiles = [models.Tile("man", 1), models.Tile("man", 2)]
@@ -194,11 +283,9 @@ def test_chi_without_discard_returns_409() -> None:
         "/games/1/action",
         json={"player_index": 0, "action": DISCARD, "tile": chi_tile},
     )
-    assert api._engine is not None
-    api.get_allowed_actions(1)  # cache chi as allowed
-    assert api._engine is not None
-    api._engine.state.last_discard = None
-    api._engine.state.last_discard_player = None
+    _session().get_allowed_actions(1)  # cache chi as allowed
+    _session().engine.state.last_discard = None
+    _session().engine.state.last_discard_player = None
     resp = client.post(
         "/games/1/action",
         json={
@@ -215,7 +302,7 @@ def test_chi_without_discard_returns_409() -> None:
 
 def test_additional_action_endpoints() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
 
     # Prepare chi on player 0 discard
     chi_tile = {"suit": "man", "value": 3}
@@ -293,9 +380,8 @@ def test_additional_action_endpoints() -> None:
     )
     assert resp.status_code == 409
 
-    state = api.get_state()
-    assert api._engine is not None
-    api._engine.state.players[state.current_player].hand.tiles = [
+    state = _session().get_state()
+    _session().engine.state.players[state.current_player].hand.tiles = [
         models.Tile("man", 1)
     ]
     draw = client.post(
@@ -319,10 +405,8 @@ def test_additional_action_endpoints() -> None:
 
 def test_draw_from_empty_wall_returns_error() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    from core import api
-    assert api._engine is not None
-    api._engine.state.wall.tiles = []  # type: ignore[list]
-    api._engine.state.players[0].hand.tiles.pop()
+    _session().engine.state.wall.tiles = []  # type: ignore[list]
+    _session().engine.state.players[0].hand.tiles.pop()
     resp = client.post(
         "/games/1/action",
         json={"player_index": 0, "action": DRAW},
@@ -340,9 +424,7 @@ def test_websocket_streams_events() -> None:
         assert data["name"] == "start_game"
         data = ws.receive_json()
         assert data["name"] == "start_kyoku"
-        from core import api
-        assert api._engine is not None
-        api._engine.state.players[0].hand.tiles.pop()
+        _session().engine.state.players[0].hand.tiles.pop()
         client.post(
             "/games/1/action",
             json={"player_index": 0, "action": DRAW},
@@ -351,13 +433,135 @@ def test_websocket_streams_events() -> None:
         assert data["name"] == "draw_tile"
 
 
+def test_websocket_subscribers_each_receive_events() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    with client.websocket_connect("/ws/1") as first, client.websocket_connect("/ws/1") as second:
+        for _ in range(3):
+            first.receive_json()  # allowed_actions, start_game, start_kyoku
+        second.receive_json()  # allowed_actions
+        state = _session().get_state()
+        tile = state.players[state.current_player].hand.tiles[0]
+        client.post(
+            "/games/1/action",
+            json={"player_index": state.current_player, "action": DISCARD, "tile": tile.__dict__},
+        )
+        assert first.receive_json()["name"] == "discard"
+        assert second.receive_json()["name"] == "discard"
+
+
+def test_websocket_resumes_from_last_seq() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    with client.websocket_connect("/ws/1") as ws:
+        ws.receive_json()  # allowed_actions
+        ws.receive_json()  # start_game
+        last_seq = ws.receive_json()["seq"]  # start_kyoku
+    state = _session().get_state()
+    tile = state.players[state.current_player].hand.tiles[0]
+    client.post(
+        "/games/1/action",
+        json={"player_index": state.current_player, "action": DISCARD, "tile": tile.__dict__},
+    )
+    with client.websocket_connect(f"/ws/1?last_seq={last_seq}") as ws:
+        assert ws.receive_json()["name"] == "allowed_actions"
+        missed = ws.receive_json()
+        assert missed["name"] == "discard"
+        assert missed["seq"] == last_seq + 1
+
+
+def test_compact_tile_formats_for_state_actions_and_ws() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    state = _session().get_state()
+    seat = state.current_player
+    tile = state.players[seat].hand.tiles[0]
+    by_id = client.get("/games/1?tile_format=id").json()
+    assert by_id["players"][seat]["hand"]["tiles"][0] == tile.tile_id
+    resp = client.get("/games/1?tile_format=code")
+    assert resp.json()["players"][seat]["hand"]["tiles"][0] == tile_to_code(tile)
+    assert resp.headers["ETag"].endswith('.code"')
+    with client.websocket_connect("/ws/1?tile_format=code") as ws:
+        for _ in range(3):
+            ws.receive_json()  # allowed_actions, start_game, start_kyoku
+        resp = client.post(
+            "/games/1/action",
+            json={
+                "player_index": seat,
+                "action": DISCARD,
+                "tile": tile_to_code(tile),
+                "tile_format": "code",
+            },
+        )
+        assert resp.status_code == 200
+        event = ws.receive_json()
+        assert event["name"] == "discard"
+        assert event["payload"]["tile"] == tile_to_code(tile)
+    resp = client.post(
+        "/games/1/action",
+        json={"player_index": seat, "action": DISCARD, "tile": 99, "tile_format": "code"},
+    )
+    assert resp.status_code == 409
+
+
+def test_server_plays_ai_seats() -> None:
+    assert client.post(
+        "/games", json={"players": ["A", "B", "C", "D"], "ai_type": "nope", "ai_players": [1]}
+    ).status_code == 400
+    with TestClient(app) as local:
+        resp = local.post(
+            "/games", json={"players": ["A", "B", "C", "D"], "ai_players": [3, 1, 2]}
+        )
+        assert resp.json()["ai_players"] == [1, 2, 3]
+        game_id = resp.json()["id"]
+        hand = resp.json()["players"][0]["hand"]["tiles"]
+        local.post(
+            f"/games/{game_id}/action",
+            json={"player_index": 0, "action": DISCARD, "tile": hand[0]},
+        )
+        for _ in range(500):
+            state = local.get(f"/games/{game_id}").json()
+            claims = state["waiting_for_claims"]
+            if (0 in claims) if claims else state["current_player"] == 0:
+                break
+            time.sleep(0.01)
+        else:
+            pytest.fail("AI seats did not hand the turn back")
+        assert any(state["players"][seat]["river"] for seat in (1, 2, 3))
+
+
+def test_batch_actions_stop_or_roll_back() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    state = _session().get_state()
+    tile = state.players[0].hand.tiles[0].__dict__
+    batch = [{"player_index": 0, "action": DISCARD, "tile": tile}]
+    batch += [{"player_index": seat, "action": SKIP} for seat in (1, 2, 3)]
+    data = client.post("/games/1/actions", json={"actions": batch}).json()
+    assert [r["status"] for r in data["results"]] == [200] * 4
+    assert data["applied"] == 4 and not data["rolled_back"]
+    assert state.current_player == 1
+
+    before = client.get("/games/1").json()
+    hand = state.players[1].hand.tiles
+    batch = [
+        {"player_index": 1, "action": DISCARD, "tile": hand[0].__dict__},
+        {"player_index": 1, "action": DISCARD, "tile": hand[1].__dict__},
+    ]
+    data = client.post("/games/1/actions", json={"actions": batch, "atomic": True}).json()
+    assert [r["status"] for r in data["results"]] == [200, 409]
+    assert data["applied"] == 0 and data["rolled_back"]
+    assert client.get("/games/1").json() == before
+    assert _session().get_event_history()[-1].name == "error"
+
+    data = client.post("/games/1/actions", json={"actions": batch}).json()
+    assert data["applied"] == 1 and not data["rolled_back"]
+    assert len(state.players[1].river) == 1
+
+
 def test_claims_endpoint_and_ws_event() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
     with client.websocket_connect("/ws/1") as ws:
         ws.receive_json()  # allowed_actions
         ws.receive_json()  # start_game
         ws.receive_json()  # start_kyoku
-        state = api.get_state()
+        state = _session().get_state()
         tile = state.players[state.current_player].hand.tiles[0]
         client.post(
             "/games/1/action",
@@ -423,7 +627,7 @@ def test_auto_action_endpoint() -> None:
 
 def test_auto_action_wrong_turn_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     wrong = (state.current_player + 1) % 4
     resp = client.post(
         "/games/1/action",
@@ -436,7 +640,7 @@ def test_auto_action_wrong_turn_returns_409() -> None:
 
 def test_auto_action_claim_phase_checks_player() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     start = state.current_player
     tile = state.players[start].hand.tiles[0]
     client.post(
@@ -460,7 +664,7 @@ def test_shanten_endpoint() -> None:
 
 def test_allowed_actions_endpoint() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     for p in state.players:
         p.hand.tiles = []
     tile = {"suit": "man", "value": 2}
@@ -478,7 +682,7 @@ def test_allowed_actions_endpoint() -> None:
 
 def test_all_allowed_actions_endpoint() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     for p in state.players:
         p.hand.tiles = []
     tile = {"suit": "man", "value": 2}
@@ -494,6 +698,37 @@ def test_all_allowed_actions_endpoint() -> None:
     assert isinstance(actions, list) and CHI in actions[1]
 
 
+def test_snapshot_endpoint_aggregates_reads() -> None:
+    client.post("/games", json={"players": ["A", "B", "C", "D"]})
+    state = _session().get_state()
+    for p in state.players:
+        p.hand.tiles = []
+    tile = {"suit": "man", "value": 2}
+    state.players[0].hand.tiles = [models.Tile(**tile)]
+    client.post(
+        "/games/1/action",
+        json={"player_index": 0, "action": DISCARD, "tile": tile},
+    )
+    state.players[1].hand.tiles = [models.Tile("man", 1), models.Tile("man", 3)]
+    resp = client.get("/games/1/snapshot")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["state"]["players"][1]["hand"]["tiles"] == [
+        {"suit": "man", "value": 1},
+        {"suit": "man", "value": 3},
+    ]
+    assert CHI in data["allowed_actions"][1] and CHI in data["claims"][1]
+    assert len(data["chi_options"][1]) == 1
+    assert data["next_actor"] == {"player_index": state.current_player, "actions": []}
+
+    resp = client.get("/games/1/snapshot?player=1&fields=claims,chi_options&tile_format=code")
+    data = resp.json()
+    assert set(data) == {"version", "last_seq", "claims", "chi_options"}
+    assert data["chi_options"] == [[11, 13]]
+    assert client.get("/games/1/snapshot?fields=hands").status_code == 400
+    assert client.get("/games/1/snapshot?player=7").status_code == 404
+
+
 def test_unknown_action_returns_400() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
     resp = client.post(
@@ -505,7 +740,7 @@ def test_unknown_action_returns_400() -> None:
 
 def test_next_actions_endpoint_autodraw() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     state.current_player = 1
     state.players[1].hand.tiles = [models.Tile("man", i + 1) for i in range(9)] + [
         models.Tile("pin", i + 1) for i in range(4)
@@ -519,29 +754,29 @@ def test_next_actions_endpoint_autodraw() -> None:
 
 def test_next_actions_endpoint_logs_event() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    api.pop_events()  # clear initial events
+    _session().pop_events()  # clear initial events
     resp = client.get("/games/1/next-actions")
     assert resp.status_code == 200
-    events = api.pop_events()
+    events = _session().pop_events()
     assert any(e.name == "next_actions" for e in events)
 
 
 def test_next_actions_endpoint_deduplicates_events() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    api.pop_events()
+    _session().pop_events()
     resp1 = client.get("/games/1/next-actions")
     assert resp1.status_code == 200
-    events = api.pop_events()
+    events = _session().pop_events()
     assert sum(1 for e in events if e.name == "next_actions") == 1
     resp2 = client.get("/games/1/next-actions")
     assert resp2.status_code == 200
-    events = api.pop_events()
+    events = _session().pop_events()
     assert not any(e.name == "next_actions" for e in events)
 
 
 def test_next_actions_after_claims() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     tile = state.players[state.current_player].hand.tiles[0]
     client.post(
         "/games/1/action",
@@ -582,7 +817,7 @@ def test_action_rejected_when_not_allowed(caplog: pytest.LogCaptureFixture) -> N
 
 def test_action_succeeds_when_allowed() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     for p in state.players:
         p.hand.tiles = []
     tile = {"suit": "man", "value": 2}
@@ -609,7 +844,7 @@ def test_action_succeeds_when_allowed() -> None:
 
 def test_discard_wrong_player_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     tile = state.players[1].hand.tiles[0]
     resp = client.post(
         "/games/1/action",
@@ -620,7 +855,7 @@ def test_discard_wrong_player_returns_409() -> None:
 
 def test_chi_wrong_player_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     disc_tile = state.players[0].hand.tiles[0]
     client.post(
         "/games/1/action",
@@ -643,7 +878,7 @@ def test_chi_wrong_player_returns_409() -> None:
 
 def test_pon_invalid_tiles_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     disc_tile = state.players[0].hand.tiles[0]
     client.post(
         "/games/1/action",
@@ -666,7 +901,7 @@ def test_pon_invalid_tiles_returns_409() -> None:
 
 def test_kan_invalid_tiles_returns_409() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     disc_tile = state.players[0].hand.tiles[0]
     client.post(
         "/games/1/action",
@@ -689,7 +924,7 @@ def test_kan_invalid_tiles_returns_409() -> None:
 
 def test_riichi_action_discards_and_flags_player() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     tiles = [
         models.Tile("man", 1), models.Tile("man", 1),
         models.Tile("man", 2), models.Tile("man", 2),
@@ -721,18 +956,26 @@ def test_start_kyoku_endpoint_and_ws() -> None:
             json={"dealer": 1, "round": 2},
         )
         assert resp.status_code == 200
-        state = api.get_state()
+        state = _session().get_state()
         assert state.dealer == 1
         assert state.round_number == 2
         data = ws.receive_json()
         assert data["name"] == "start_kyoku"
         assert data["payload"]["dealer"] == 1
         assert data["payload"]["round"] == 2
+        # the hand is announced once; the next event is the dealer's discard
+        assert ws.receive_json()["name"] == "allowed_actions"
+        tile = state.players[1].hand.tiles[0]
+        client.post(
+            "/games/1/action",
+            json={"player_index": 1, "action": DISCARD, "tile": tile.__dict__},
+        )
+        assert ws.receive_json()["name"] == "discard"
 
 
 def test_skip_after_claims_window_is_ignored() -> None:
     client.post("/games", json={"players": ["A", "B", "C", "D"]})
-    state = api.get_state()
+    state = _session().get_state()
     tile = state.players[state.current_player].hand.tiles[0]
     client.post(
         "/games/1/action",
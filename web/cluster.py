@@ -0,0 +1,81 @@
+"""Run several server workers behind the game-id router on one machine.
+
+Usage: python -m web.cluster [--workers N] [--host HOST] [--port PORT]
+                             [--data-dir DIR] [--routers N]
+
+Worker ``i`` listens on ``127.0.0.1:<port + 1 + i>`` with
+``MYMAHJONG_SHARD=i/N`` and journals its games to ``DIR/games-i.db``. The
+workers and the router share the id database ``DIR/ids.db``; the router
+listens on ``HOST:PORT``. The number of workers is fixed by the id database,
+so start later runs with the same ``--workers``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--routers", type=int, default=1, help="router processes")
+    args = parser.parse_args()
+
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    id_db = str(args.data_dir / "ids.db")
+    uvicorn = [sys.executable, "-m", "uvicorn"]
+    processes: list[subprocess.Popen] = []
+    urls = []
+    for i in range(args.workers):
+        port = args.port + 1 + i
+        urls.append(f"http://127.0.0.1:{port}")
+        env = {
+            **os.environ,
+            "MYMAHJONG_SHARD": f"{i}/{args.workers}",
+            "MYMAHJONG_ID_DB": id_db,
+            "MYMAHJONG_DB": str(args.data_dir / f"games-{i}.db"),
+        }
+        processes.append(
+            subprocess.Popen(
+                [*uvicorn, "web.server:app", "--host", "127.0.0.1", "--port", str(port)],
+                env=env,
+            )
+        )
+    env = {**os.environ, "MYMAHJONG_WORKERS": ",".join(urls), "MYMAHJONG_ID_DB": id_db}
+    processes.append(
+        subprocess.Popen(
+            [
+                *uvicorn,
+                "--factory",
+                "web.router:from_env",
+                "--host",
+                args.host,
+                "--port",
+                str(args.port),
+                "--workers",
+                str(args.routers),
+            ],
+            env=env,
+        )
+    )
+    try:
+        while all(p.poll() is None for p in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
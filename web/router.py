@@ -0,0 +1,190 @@
+"""Route REST and WebSocket traffic to the worker process owning each game.
+
+Games live in the memory of one ``web.server`` process, so a single server
+uses a single core. To use more, run N workers, each started with
+``MYMAHJONG_SHARD=<index>/<N>`` and the same ``MYMAHJONG_ID_DB``, and put
+this router in front of them. Worker ``i`` owns the games whose id ``n``
+has :func:`core.id_allocator.shard_of` ``(n, N) == i``, so requests for a
+game are forwarded by looking at the id alone:
+
+* ``POST /games`` picks the workers in turn, allocates the next id of that
+  worker's shard from the shared id database and passes it to the worker in
+  the ``X-Game-Id`` header.
+* ``/games/{id}/...`` and ``/ws/{id}`` go to the owner of ``id``.
+* Everything else, such as the practice endpoints, goes to the workers in
+  turn.
+
+The router keeps no state besides the id database, so it can itself run as
+several processes. ``python -m web.cluster`` starts the workers and the
+router. Start the router alone with::
+
+    MYMAHJONG_WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 \\
+    MYMAHJONG_ID_DB=ids.db uvicorn --factory web.router:from_env
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Sequence
+
+import httpx
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import Response
+
+from core.id_allocator import IdAllocator, shard_of
+
+# headers describing one connection rather than the message
+_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "content-encoding",
+        "content-length",
+        "host",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"]
+
+
+def create_router(
+    workers: Sequence[str],
+    allocator: IdAllocator,
+    *,
+    clients: Sequence[httpx.AsyncClient] | None = None,
+) -> FastAPI:
+    """Return an app forwarding requests to ``workers``, listed in shard order.
+
+    ``workers`` are base URLs such as ``http://127.0.0.1:8001``.
+    ``clients`` replaces the HTTP client of each worker, for example with
+    one bound to an ASGI app.
+    """
+    if allocator.shards != len(workers):
+        raise ValueError(f"{len(workers)} workers for {allocator.shards} shards")
+    http = (
+        list(clients)
+        if clients is not None
+        else [httpx.AsyncClient(base_url=url, timeout=None) for url in workers]
+    )
+    turns = itertools.cycle(range(len(workers)))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            for client in http:
+                await client.aclose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    async def forward(
+        shard: int, request: Request, headers: dict[str, str] | None = None
+    ) -> Response:
+        """Send ``request`` to the worker of ``shard`` and relay its answer."""
+        url = request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        upstream = await http[shard].request(
+            request.method,
+            url,
+            headers=[
+                (k, v) for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS
+            ]
+            + list((headers or {}).items()),
+            content=await request.body(),
+        )
+        return Response(
+            upstream.content,
+            status_code=upstream.status_code,
+            headers={
+                k: v for k, v in upstream.headers.items() if k.lower() not in _HOP_HEADERS
+            },
+        )
+
+    @app.post("/games")
+    async def create_game(request: Request) -> Response:
+        """Create the game on the next worker with an id of its shard."""
+        shard = next(turns)
+        game_id = await asyncio.to_thread(allocator.allocate, shard)
+        return await forward(shard, request, {"x-game-id": str(game_id)})
+
+    @app.api_route("/games/{game_id}", methods=_METHODS)
+    @app.api_route("/games/{game_id}/{rest:path}", methods=_METHODS)
+    async def game_request(game_id: int, request: Request) -> Response:
+        """Forward a request about ``game_id`` to its owner."""
+        return await forward(shard_of(game_id, len(workers)), request)
+
+    @app.websocket("/ws/{game_id}")
+    async def game_events(websocket: WebSocket, game_id: int) -> None:
+        """Relay the event stream of ``game_id`` from its owner."""
+        # installed with uvicorn[standard], which serves the WebSockets
+        import websockets
+
+        base = workers[shard_of(game_id, len(workers))]
+        url = "ws" + base.removeprefix("http") + websocket.url.path
+        if websocket.url.query:
+            url += "?" + websocket.url.query
+        await websocket.accept()
+        try:
+            upstream = await websockets.connect(url)
+        except (OSError, websockets.WebSocketException):
+            await websocket.close(code=1011)
+            return
+        async with upstream:
+            tasks = {
+                asyncio.create_task(_to_client(upstream, websocket)),
+                asyncio.create_task(_to_worker(websocket, upstream)),
+            }
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+        try:
+            await websocket.close()
+        except RuntimeError:
+            # the client already disconnected
+            pass
+
+    @app.api_route("/{path:path}", methods=_METHODS)
+    async def other_request(path: str, request: Request) -> Response:
+        """Forward requests that concern no game to the workers in turn."""
+        return await forward(next(turns), request)
+
+    return app
+
+
+async def _to_client(upstream: Any, websocket: WebSocket) -> None:
+    async for message in upstream:
+        if isinstance(message, str):
+            await websocket.send_text(message)
+        else:
+            await websocket.send_bytes(message)
+
+
+async def _to_worker(websocket: WebSocket, upstream: Any) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        data = message.get("text")
+        if data is None:
+            data = message.get("bytes")
+        if data is not None:
+            await upstream.send(data)
+
+
+def from_env() -> FastAPI:
+    """Return the router configured by ``MYMAHJONG_WORKERS`` and ``MYMAHJONG_ID_DB``."""
+    workers = [url.strip() for url in os.environ.get("MYMAHJONG_WORKERS", "").split(",")]
+    workers = [url for url in workers if url]
+    id_db = os.environ.get("MYMAHJONG_ID_DB")
+    if not workers or not id_db:
+        raise RuntimeError("MYMAHJONG_WORKERS and MYMAHJONG_ID_DB must be set")
+    return create_router(workers, IdAllocator(id_db, len(workers)))
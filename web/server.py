@@ -1,23 +1,101 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from contextlib import asynccontextmanager, nullcontext
+from functools import partial
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect, Request
 import asyncio
 import logging
+import os
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 
-from core import api, models, shanten_quiz
+from core import api, models, serialization, shanten_quiz
+from core.ai import AI_REGISTRY
 from core.actions import (CHI, PON, KAN, RIICHI, TSUMO, RON, SKIP, DRAW, DISCARD, AUTO)
 from core.engine_manager import EngineManager
+from core.event_bus import Subscription
+from core.game_store import DEFAULT_BATCH_SIZE, DEFAULT_SNAPSHOT_EVERY, GameStore
+from core.id_allocator import IdAllocator, shard_of
 from core.exceptions import InvalidActionError, NotYourTurnError
 from core.models import GameEvent
-
-app = FastAPI()
-manager = EngineManager()
-_ws_connections: set[WebSocket] = set()
+from core.serialization import TileFormat
+
+
+def _env_number(name: str, default: float | None) -> float | None:
+    """Return environment variable ``name`` as a number; empty means no limit."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return float(value) if value.strip() else None
+
+
+def _env_shard(name: str) -> tuple[int, int]:
+    """Return environment variable ``name``, ``"<index>/<count>"``, as a pair."""
+    value = os.environ.get(name) or "0/1"
+    index, _, count = value.partition("/")
+    shard = (int(index), int(count or 1))
+    if not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"{name} must be <index>/<count> with 0 <= index < count: {value}")
+    return shard
+
+
+# limits on the games kept in memory, see ``EngineManager.sweep``
+MAX_GAMES = _env_number("MYMAHJONG_MAX_GAMES", 1000)
+IDLE_TTL = _env_number("MYMAHJONG_IDLE_TTL", 3600.0)
+FINISHED_TTL = _env_number("MYMAHJONG_FINISHED_TTL", 600.0)
+SWEEP_INTERVAL = _env_number("MYMAHJONG_SWEEP_INTERVAL", 60.0)
+ARCHIVE_DIR = os.environ.get("MYMAHJONG_ARCHIVE_DIR") or None
+# durable storage of the games, see ``core.game_store``
+DB_PATH = os.environ.get("MYMAHJONG_DB") or None
+JOURNAL_BATCH = _env_number("MYMAHJONG_JOURNAL_BATCH", DEFAULT_BATCH_SIZE)
+JOURNAL_FLUSH_INTERVAL = _env_number("MYMAHJONG_JOURNAL_FLUSH_INTERVAL", 0.2)
+SNAPSHOT_EVERY = _env_number("MYMAHJONG_SNAPSHOT_EVERY", DEFAULT_SNAPSHOT_EVERY)
+# shard of the game ids this worker owns behind ``web.router`` and the id
+# database it shares with the router and the other workers
+SHARD_INDEX, SHARD_COUNT = _env_shard("MYMAHJONG_SHARD")
+ID_DB = os.environ.get("MYMAHJONG_ID_DB") or None
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Recover stored games, then run the sweeper while the server is up."""
+    tasks: list[asyncio.Task[None]] = []
+    if manager.store is not None:
+        recovered = manager.recover()
+        if recovered:
+            logger.info("recovered %d games", len(recovered))
+        if JOURNAL_FLUSH_INTERVAL:
+            tasks.append(asyncio.create_task(manager.run_store_flusher(JOURNAL_FLUSH_INTERVAL)))
+    if SWEEP_INTERVAL:
+        tasks.append(asyncio.create_task(manager.run_sweeper(SWEEP_INTERVAL)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        if manager.store is not None:
+            manager.store.flush()
+
+
+app = FastAPI(lifespan=_lifespan)
+allocator = IdAllocator(ID_DB, SHARD_COUNT) if ID_DB is not None else None
+manager = EngineManager(
+    max_games=int(MAX_GAMES) if MAX_GAMES is not None else None,
+    idle_ttl=IDLE_TTL,
+    finished_ttl=FINISHED_TTL,
+    archive_dir=ARCHIVE_DIR,
+    store=GameStore(
+        DB_PATH,
+        batch_size=int(JOURNAL_BATCH or 1),
+        snapshot_every=int(SNAPSHOT_EVERY or DEFAULT_SNAPSHOT_EVERY),
+    )
+    if DB_PATH is not None
+    else None,
+    allocate_id=partial(allocator.allocate, SHARD_INDEX) if allocator is not None else None,
+)
 logger = logging.getLogger(__name__)
 
 
@@ -47,20 +125,17 @@ def handle_conflict(func):
     return wrapper
 
 
-def _raise_conflict(game_id: int, player_index: int, action: str, detail: str) -> None:
-    """Log a conflict, record the error and raise an HTTP 409 error."""
-    logger.info(
-        "409 conflict: player %s attempted %s -> %s",
-        player_index,
-        action,
-        detail,
+def _json(
+    obj: Any, headers: dict[str, str] | None = None, tile_format: str = "object"
+) -> Response:
+    """Return a JSON response with ``obj`` encoded by the core serializer."""
+    return Response(
+        serialization.dumps(obj, tile_format=tile_format),
+        media_type="application/json",
+        headers=headers,
     )
-    try:
-        manager.record_error(game_id, detail)
-    except Exception:
-        # engine might not exist yet
-        pass
-    raise HTTPException(status_code=409, detail=detail)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -71,10 +146,17 @@ app.add_middleware(
 
 
 class CreateGameRequest(BaseModel):
-    """Request body for creating a new game."""
+    """Request body for creating a new game.
+
+    Seats listed in ``ai_players`` are played by the server with ``ai_type``,
+    waiting ``ai_delay`` seconds after each of their moves.
+    """
 
     players: list[str]
     max_rounds: int | None = None
+    ai_players: list[int] = []
+    ai_type: str = "simple"
+    ai_delay: float = 0.0
 
 
 class SuggestRequest(BaseModel):
@@ -96,22 +178,94 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/stats")
+def stats() -> dict[str, int | float | None]:
+    """Return the number of live games, their limits and eviction counters."""
+    return manager.stats()
+
+
 @app.post("/games")
-def create_game(req: CreateGameRequest) -> dict:
-    """Create a new game and return its id and state."""
+async def create_game(
+    req: CreateGameRequest,
+    tile_format: TileFormat = "object",
+    x_game_id: int | None = Header(default=None),
+) -> Response:
+    """Create a new game and return its id and state.
+
+    AI seats start playing in the background as soon as the game exists.
+    ``web.router`` passes the id it allocated for the game in the
+    ``X-Game-Id`` header. It is only accepted by workers sharing the id
+    database and must belong to this worker's shard.
+    """
+    if x_game_id is not None and allocator is None:
+        # only a worker sharing the router's id database takes ids from outside
+        raise HTTPException(status_code=400, detail="X-Game-Id requires MYMAHJONG_ID_DB")
+    if x_game_id is not None and shard_of(x_game_id, SHARD_COUNT) != SHARD_INDEX:
+        raise HTTPException(
+            status_code=421, detail=f"Game {x_game_id} is not owned by shard {SHARD_INDEX}"
+        )
+    if req.ai_type not in AI_REGISTRY:
+        raise HTTPException(status_code=400, detail=f"Unknown ai_type: {req.ai_type}")
+    if any(not 0 <= seat < len(req.players) for seat in req.ai_players):
+        raise HTTPException(status_code=400, detail="AI seat out of range")
+    if req.ai_delay < 0:
+        raise HTTPException(status_code=400, detail="ai_delay must not be negative")
     rounds = req.max_rounds if req.max_rounds is not None else 8
-    game_id, state = manager.create_game(req.players, max_rounds=rounds)
-    return {"id": game_id, **asdict(state)}
+    try:
+        # allocating an id may wait for the shared id database
+        game_id, state = await asyncio.to_thread(
+            manager.create_game, req.players, max_rounds=rounds, game_id=x_game_id
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=409, detail=str(err))
+    body = {"id": game_id, **serialization.fields_of(state)}
+    if req.ai_players:
+        body["ai_players"] = sorted(set(req.ai_players))
+    # encode before the AI seats get a chance to move
+    response = _json(body, tile_format=tile_format)
+    if req.ai_players:
+        manager.start_ai(
+            game_id, req.ai_players, ai_type=req.ai_type, delay=req.ai_delay
+        )
+    return response
 
 
 @app.get("/games/{game_id}")
-def get_game(game_id: int) -> dict:
-    """Return basic game state for the given game id."""
+def get_game(
+    game_id: int,
+    request: Request,
+    since_version: int | None = None,
+    tile_format: TileFormat = "object",
+) -> Response:
+    """Return basic game state for the given game id.
+
+    The ``ETag`` header identifies the state version. A matching
+    ``If-None-Match`` request header is answered with ``304 Not Modified``.
+    With ``since_version`` the response is ``{"version", "since_version",
+    "patch"}`` holding JSON-patch operations from that version, unless the
+    version is too old, in which case the full state is returned.
+    ``tile_format`` selects how tiles are encoded.
+    """
     try:
         with manager.use_engine(game_id):
-            return asdict(api.get_state())
+            cache = manager.get_state_cache(game_id)
+            version, text = cache.current_json(tile_format)
+            if since_version is None:
+                patch = None
+            else:
+                patch = cache.delta(since_version, tile_format)
     except KeyError:
         raise HTTPException(status_code=404, detail="Game not started")
+    tag = f"{game_id}.{version}"
+    if tile_format != "object":
+        tag += f".{tile_format}"
+    headers = {"ETag": f'"{tag}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    if patch is not None:
+        body = {"version": version, "since_version": since_version, "patch": patch}
+        return _json(body, headers, tile_format)
+    return Response(text, media_type="application/json", headers=headers)
 
 
 @app.get("/games/{game_id}/log")
@@ -138,32 +292,47 @@ def get_mjai_log(game_id: int) -> dict:
 
 
 @app.get("/games/{game_id}/events")
-def get_events(game_id: int) -> dict:
-    """Return raw event history."""
+def get_events(
+    game_id: int, since: int | None = None, tile_format: TileFormat = "object"
+) -> Response:
+    """Return raw event history, or only the events after sequence ``since``.
+
+    ``last_seq`` is the sequence number to pass as ``since`` next time. When
+    ``since`` is older than ``first_seq - 1`` some events were no longer
+    retained and the client should reload the game state.
+    """
 
     try:
         with manager.use_engine(game_id):
-            events = [asdict(e) for e in api.get_event_history()]
+            if since is None:
+                events = api.get_event_history()
+            else:
+                events = api.get_events_since(since)
+            log = manager.get_engine(game_id).event_log
+            first_seq, last_seq = log.first_seq, log.last_seq
     except KeyError:
         raise HTTPException(status_code=404, detail="Game not started")
-    return {"events": events}
+    body: dict[str, Any] = {"events": events, "last_seq": last_seq}
+    if since is not None:
+        body["first_seq"] = first_seq
+    return _json(body, tile_format=tile_format)
 
 
 @app.get("/practice")
-def practice_problem() -> dict:
+def practice_problem() -> Response:
     """Return a random practice problem."""
 
     problem = api.generate_practice_problem()
-    return asdict(problem)
+    return _json(problem)
 
 
 @app.post("/practice/suggest")
-def practice_suggest(req: SuggestRequest, ai: bool = False) -> dict:
+def practice_suggest(req: SuggestRequest, ai: bool = False) -> Response:
     """Return AI discard suggestion for the provided hand."""
 
     hand = [models.Tile(**t) for t in req.hand]
     tile = api.suggest_practice_discard(hand, use_ai=ai)
-    return asdict(tile)
+    return _json(tile)
 
 
 class QuizRequest(BaseModel):
@@ -173,11 +342,11 @@ class QuizRequest(BaseModel):
 
 
 @app.get("/shanten-quiz")
-def shanten_quiz_hand() -> list[dict]:
+def shanten_quiz_hand() -> Response:
     """Return a random hand for the shanten quiz."""
 
     hand = shanten_quiz.generate_hand()
-    return [asdict(t) for t in hand]
+    return _json(hand)
 
 
 @app.post("/shanten-quiz/check")
@@ -195,14 +364,12 @@ def shanten_number(game_id: int, player_index: int) -> dict:
 
     try:
         with manager.use_engine(game_id):
-            state = api.get_state()
+            players = api.get_state().players
+            if not 0 <= player_index < len(players):
+                raise HTTPException(status_code=404, detail="Player not found")
+            value = api.calculate_shanten(players[player_index].hand.tiles)
     except KeyError:
         raise HTTPException(status_code=404, detail="Game not started")
-    try:
-        tiles = state.players[player_index].hand.tiles
-    except IndexError:
-        raise HTTPException(status_code=404, detail="Player not found")
-    value = api.calculate_shanten(tiles)
     return {"shanten": value}
 
 
@@ -221,7 +388,9 @@ def allowed_actions(game_id: int, player_index: int) -> dict:
 
 
 @app.get("/games/{game_id}/chi-options/{player_index}")
-def chi_options(game_id: int, player_index: int) -> dict:
+def chi_options(
+    game_id: int, player_index: int, tile_format: TileFormat = "object"
+) -> Response:
     """Return chi tile pairs for ``player_index``."""
 
     try:
@@ -231,11 +400,7 @@ def chi_options(game_id: int, player_index: int) -> dict:
         raise HTTPException(status_code=404, detail="Game not started")
     except IndexError:
         raise HTTPException(status_code=404, detail="Player not found")
-
-    def dump(pair: list[models.Tile]) -> list[dict]:
-        return [asdict(t) for t in pair]
-
-    return {"options": [dump(o) for o in options]}
+    return _json({"options": options}, tile_format=tile_format)
 
 
 @app.get("/games/{game_id}/claims")
@@ -275,48 +440,102 @@ def next_actions(game_id: int) -> dict:
     return {"player_index": idx, "actions": actions}
 
 
+@app.get("/games/{game_id}/snapshot")
+def game_snapshot(
+    game_id: int,
+    fields: str | None = None,
+    player: int | None = None,
+    tile_format: TileFormat = "object",
+) -> Response:
+    """Return the state, allowed actions, claims, chi options and next actor.
+
+    Everything is read and encoded in one visit to the engine, so the parts
+    agree with each other. Unlike ``/next-actions`` nothing is drawn; a
+    pending draw is reported as ``["draw"]``. ``fields`` is a comma
+    separated subset of the sections and ``player`` limits the per-seat
+    sections to that seat.
+    """
+    names = None if fields is None else [f for f in fields.split(",") if f]
+    try:
+        with manager.use_engine(game_id):
+            snapshot = api.get_snapshot(names, player)
+            body = serialization.dumps(snapshot, tile_format=tile_format)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Game not started")
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Player not found")
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    return Response(body, media_type="application/json")
+
+
+@app.post("/games/{game_id}/undo")
+def undo_action(game_id: int, tile_format: TileFormat = "object") -> Response:
+    """Take back the most recent action of the current hand."""
+    try:
+        with manager.use_engine(game_id):
+            # encode under the lock; the state is the live engine state
+            return _json(api.undo(), tile_format=tile_format)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Game not started")
+
+
 @app.post("/games/{game_id}/start-kyoku")
-async def start_kyoku_route(game_id: int, req: StartKyokuRequest) -> dict:
-    """Start a new hand and notify connected clients."""
+def start_kyoku_route(
+    game_id: int, req: StartKyokuRequest, tile_format: TileFormat = "object"
+) -> Response:
+    """Start a new hand.
+
+    Connected clients receive the engine's ``start_kyoku`` event through the
+    game's event bus like any other event.
+    """
     try:
         with manager.use_engine(game_id):
             state = api.start_kyoku(req.dealer, req.round)
+            event = {
+                "name": "start_kyoku",
+                "payload": {
+                    "dealer": req.dealer,
+                    "round": req.round,
+                    "state": state,
+                },
+            }
+            return _json(event, tile_format=tile_format)
     except KeyError:
         raise HTTPException(status_code=404, detail="Game not started")
 
-    event = {
-        "name": "start_kyoku",
-        "payload": {
-            "dealer": req.dealer,
-            "round": req.round,
-            "state": asdict(state),
-        },
-    }
-    for ws in list(_ws_connections):
-        try:
-            await ws.send_json(event)
-        except Exception:
-            pass
-    return event
-
 
 class ActionRequest(BaseModel):
-    """Request body for game actions."""
+    """Request body for game actions.
+
+    Tiles are ``{"suit", "value"}`` objects, or integers in ``tile_format``,
+    which also selects how tiles in the response are encoded.
+    """
 
     player_index: int
     action: str
-    tile: dict | None = None
-    tiles: list[dict] | None = None
+    tile: dict | int | None = None
+    tiles: list[dict | int] | None = None
     ai_type: str | None = None
+    tile_format: TileFormat = "object"
+
+
+def _load_tile(req: "ActionRequest", value: dict | int) -> models.Tile:
+    try:
+        return serialization.load_tile(value, req.tile_format)
+    except ValueError as err:
+        raise InvalidActionError(
+            f"Player {req.player_index} attempted {req.action} with {err}"
+        ) from None
 
 
 def _require_tile(req: "ActionRequest") -> models.Tile:
     """Return the requested tile or raise a detailed error."""
-    if not req.tile:
+    if req.tile is None or req.tile == {}:
         raise InvalidActionError(
             f"Player {req.player_index} attempted {req.action} without specifying a tile"
         )
-    return models.Tile(**req.tile)
+    return _load_tile(req, req.tile)
 
 
 def _require_tiles(req: "ActionRequest") -> list[models.Tile]:
@@ -325,18 +544,18 @@ def _require_tiles(req: "ActionRequest") -> list[models.Tile]:
         raise InvalidActionError(
             f"Player {req.player_index} attempted {req.action} without specifying tiles"
         )
-    return [models.Tile(**t) for t in req.tiles]
+    return [_load_tile(req, t) for t in req.tiles]
 
 
 @handle_conflict
-def _draw(req: ActionRequest) -> dict:
+def _draw(req: ActionRequest) -> models.Tile:
     try:
         tile = api.draw_tile(req.player_index)
     except IndexError:
         raise InvalidActionError("Wall is empty")
     except (InvalidActionError, NotYourTurnError):
         raise
-    return asdict(tile)
+    return tile
 
 
 @handle_conflict
@@ -400,23 +619,23 @@ def _riichi(req: ActionRequest) -> dict:
 
 
 @handle_conflict
-def _tsumo(req: ActionRequest) -> dict:
+def _tsumo(req: ActionRequest) -> Any:
     tile = _require_tile(req)
     try:
         result = api.declare_tsumo(req.player_index, tile)
     except (InvalidActionError, NotYourTurnError):
         raise
-    return result.__dict__
+    return result
 
 
 @handle_conflict
-def _ron(req: ActionRequest) -> dict:
+def _ron(req: ActionRequest) -> Any:
     tile = _require_tile(req)
     try:
         result = api.declare_ron(req.player_index, tile)
     except (InvalidActionError, NotYourTurnError):
         raise
-    return result.__dict__
+    return result
 
 
 @handle_conflict
@@ -429,7 +648,7 @@ def _skip(req: ActionRequest) -> dict:
 
 
 @handle_conflict
-def _auto(req: ActionRequest) -> dict:
+def _auto(req: ActionRequest) -> models.Tile:
     ai_type = req.ai_type or "simple"
     state = api.get_state()
     allowed_players = (
@@ -449,7 +668,7 @@ def _auto(req: ActionRequest) -> dict:
         )
     except (InvalidActionError, NotYourTurnError):
         raise
-    return asdict(tile)
+    return tile
 
 
 ACTION_HANDLERS = {
@@ -466,8 +685,35 @@ ACTION_HANDLERS = {
 }
 
 
+def _perform(req: ActionRequest) -> Any:
+    """Check ``req`` against the allowed actions and run its handler.
+
+    Call with the game's session bound. Failures are raised, not recorded,
+    so callers decide when to record them.
+    """
+    allowed = api.get_allowed_actions(req.player_index)
+    if req.action in {CHI, PON, KAN, RIICHI, SKIP} and req.action not in allowed:
+        if req.action == SKIP and not allowed:
+            logger.info("Ignoring redundant skip from player %s", req.player_index)
+        else:
+            logger.info(
+                "Player %s attempted disallowed action %s (allowed=%s)",
+                req.player_index,
+                req.action,
+                allowed,
+            )
+            raise InvalidActionError(
+                f"Action not allowed: player {req.player_index} attempted {req.action}. allowed={allowed}"
+            )
+
+    handler = ACTION_HANDLERS.get(req.action)
+    if not handler:
+        raise HTTPException(status_code=400, detail="Unknown action")
+    return handler(req)
+
+
 @app.post("/games/{game_id}/action")
-def game_action(game_id: int, req: ActionRequest) -> dict:
+def game_action(game_id: int, req: ActionRequest) -> Response:
     """Perform a simple game action and return its result."""
     logger.info(
         "POST /games/%s/action %s",
@@ -476,115 +722,129 @@ def game_action(game_id: int, req: ActionRequest) -> dict:
     )
     try:
         with manager.use_engine(game_id):
-            allowed = api.get_allowed_actions(req.player_index)
-            if req.action in {"chi", "pon", "kan", "riichi", "skip"} and req.action not in allowed:
-                if req.action == SKIP and not allowed:
-                    logger.info(
-                        "Ignoring redundant skip from player %s", req.player_index
-                    )
-                else:
-                    logger.info(
-                        "Player %s attempted disallowed action %s (allowed=%s)",
-                        req.player_index,
-                        req.action,
-                        allowed,
-                    )
-                    _raise_conflict(
-                        game_id,
-                        req.player_index,
-                        req.action,
-                        f"Action not allowed: player {req.player_index} attempted {req.action}. allowed={allowed}",
-                    )
-
-            handler = ACTION_HANDLERS.get(req.action)
-            if not handler:
-                raise HTTPException(status_code=400, detail="Unknown action")
             try:
-                return handler(req)
+                result = _perform(req)
             except (InvalidActionError, NotYourTurnError) as err:
                 manager.record_error(game_id, str(err))
                 raise
+            return _json(result, tile_format=req.tile_format)
     except KeyError:
         raise HTTPException(status_code=404, detail="Game not started")
     except IndexError:
         raise HTTPException(status_code=404, detail="Player not found")
-    if req.action in {CHI, PON, KAN, RIICHI, SKIP} and req.action not in allowed:
-        if req.action == SKIP and not allowed:
-            logger.info("Ignoring redundant skip from player %s", req.player_index)
-        else:
-            logger.info(
-                "Player %s attempted disallowed action %s (allowed=%s)",
-                req.player_index,
-                req.action,
-                allowed,
-            )
-            _raise_conflict(
-                game_id,
-                req.player_index,
-                req.action,
-                f"Action not allowed: player {req.player_index} attempted {req.action}. allowed={allowed}",
-            )
 
-    handler = ACTION_HANDLERS.get(req.action)
-    if not handler:
-        raise HTTPException(status_code=400, detail="Unknown action")
-    return handler(req)
+
+class BatchActionRequest(BaseModel):
+    """Request body for applying several actions in one engine visit.
+
+    With ``atomic`` either all actions are applied or none are; otherwise
+    the batch stops at the first failing action and keeps the ones before
+    it.
+    """
+
+    actions: list[ActionRequest]
+    atomic: bool = False
+
+
+# failures reported per action by the batch endpoint
+_ACTION_ERRORS = (InvalidActionError, NotYourTurnError, HTTPException, IndexError)
+
+
+def _action_failure(err: Exception) -> dict[str, Any]:
+    if isinstance(err, HTTPException):
+        return {"status": err.status_code, "detail": err.detail}
+    if isinstance(err, IndexError):
+        return {"status": 404, "detail": "Player not found"}
+    return {"status": 409, "detail": str(err)}
+
+
+@app.post("/games/{game_id}/actions")
+def game_actions(
+    game_id: int, req: BatchActionRequest, tile_format: TileFormat = "object"
+) -> Response:
+    """Apply ``req.actions`` in order during a single visit to the engine.
+
+    ``results`` holds ``{"status": 200, "result": ...}`` for each action
+    that succeeded and ``{"status": <code>, "detail": ...}`` for the one
+    that failed; the actions after it are not attempted. ``applied`` counts
+    the actions whose effects remain and ``rolled_back`` tells whether an
+    atomic batch was undone. An atomic batch that finishes a hand can no
+    longer be undone and keeps its effects.
+    """
+    logger.info("POST /games/%s/actions %d actions", game_id, len(req.actions))
+    results: list[dict[str, Any]] = []
+    failure: Exception | None = None
+    rolled_back = False
+    try:
+        with manager.use_engine(game_id) as session:
+            scope = session.engine.atomic() if req.atomic else nullcontext()
+            try:
+                with scope as transaction:
+                    for action in req.actions:
+                        try:
+                            results.append({"status": 200, "result": _perform(action)})
+                        except _ACTION_ERRORS as err:
+                            failure = err
+                            results.append(_action_failure(err))
+                            raise
+            except _ACTION_ERRORS:
+                rolled_back = transaction is not None and transaction.reverted
+            if isinstance(failure, (InvalidActionError, NotYourTurnError)):
+                # recorded after any rollback so the error event survives it
+                manager.record_error(game_id, str(failure))
+            applied = 0 if rolled_back else len(results) - (failure is not None)
+            body = {"results": results, "applied": applied, "rolled_back": rolled_back}
+            text = serialization.dumps(body, tile_format=tile_format)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Game not started")
+    return Response(text, media_type="application/json")
+
 
 @app.websocket("/ws/{game_id}")
-async def game_events(websocket: WebSocket, game_id: int) -> None:
-    """Stream game events to the client."""
+async def game_events(
+    websocket: WebSocket,
+    game_id: int,
+    last_seq: int | None = None,
+    tile_format: TileFormat = "object",
+) -> None:
+    """Stream game events to the client.
+
+    The socket joins the game's room on its event bus and sleeps until the
+    next batch of messages arrives. Messages are already encoded, so the same
+    text is sent to every socket in the room. A reconnecting client passes
+    the ``seq`` of the last event it received as ``last_seq`` and is sent
+    only the events it missed, or a ``snapshot`` of the state if too many
+    were missed. ``tile_format`` selects how tiles in the messages are
+    encoded.
+    """
     await websocket.accept()
-    _ws_connections.add(websocket)
-    prev_actions: list[list[str]] | None = None
+    subscription: Subscription | None = None
     try:
-        # send initial allowed actions if a game is running
         try:
-            with manager.use_engine(game_id):
-                prev_actions = api.get_all_allowed_actions()
-            await websocket.send_json(
-                {"name": "allowed_actions", "payload": {"actions": prev_actions}}
-            )
+            subscription = await manager.subscribe(game_id, last_seq, tile_format=tile_format)
         except KeyError:
-            prev_actions = None
-        while True:
-            try:
-                with manager.use_engine(game_id):
-                    events = api.pop_events()
-            except KeyError:
-                events = []
-            for event in events:
-                await websocket.send_json(asdict(event))
-                if event.name == "round_end":
-                    prev_actions = None
-                if event.name == "discard":
-                    try:
-                        with manager.use_engine(game_id):
-                            claims = api.get_claim_options()
-                            updated = api.get_all_allowed_actions()
-                    except KeyError:
-                        claims = None
-                        updated = None
-                    if claims is not None:
-                        await websocket.send_json(
-                            {"name": "claims", "payload": {"claims": claims}}
-                        )
-                    if updated is not None:
-                        prev_actions = updated
-                        await websocket.send_json(
-                            {"name": "allowed_actions", "payload": {"actions": updated}}
-                        )
-            try:
-                with manager.use_engine(game_id):
-                    actions = api.get_all_allowed_actions()
-            except KeyError:
-                actions = None
-            if actions is not None and actions != prev_actions:
-                prev_actions = actions
-                await websocket.send_json(
-                    {"name": "allowed_actions", "payload": {"actions": actions}}
-                )
-            await asyncio.sleep(0.1)
+            await _wait_disconnect(websocket)
+            return
+        reader = asyncio.create_task(_wait_disconnect(websocket, subscription))
+        try:
+            while (message := await subscription.get()) is not None:
+                await websocket.send_text(message)
+        finally:
+            reader.cancel()
     except WebSocketDisconnect:
         pass
     finally:
-        _ws_connections.discard(websocket)
+        if subscription is not None:
+            subscription.close()
+
+
+async def _wait_disconnect(
+    websocket: WebSocket, subscription: Subscription | None = None
+) -> None:
+    """Ignore client messages until ``websocket`` disconnects."""
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        if subscription is not None:
+            subscription.close()
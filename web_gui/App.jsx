@@ -13,6 +13,7 @@ import {
 } from './allowedActions.js';
 import { getClaims } from './claims.js';
 import { cleanupNextActions, getNextActions } from './nextActions.js';
+import { getSnapshot } from './snapshot.js';
 import './style.css';
 import { FiRefreshCw, FiEye, FiEyeOff, FiCheck, FiShuffle, FiSettings, FiCopy } from "react-icons/fi";
 
@@ -45,6 +46,9 @@ export default function App() {
   const [showSettings, setShowSettings] = useState(false);
   const [showLog, setShowLog] = useState(false);
   const wsRef = useRef(null);
+  // game id and last event sequence number seen on the socket, for resuming
+  const wsGameRef = useRef(null);
+  const lastSeqRef = useRef(null);
 
   useEffect(() => {
     localStorage.setItem('serverUrl', server);
@@ -107,17 +111,18 @@ export default function App() {
   }
 
   async function fetchGameState(id = gameId) {
-    try {
-      if (!id) return;
-      log('debug', `GET /games/${id} - restoring game state`);
-        const resp = await fetch(`${server.replace(/\/$/, '')}/games/${id}`);
-        if (resp.ok) {
-          const data = await resp.json();
-          setGameData((d) => ({ ...d, state: data }));
-        }
-    } catch {
-      // ignore
-    }
+    if (!id) return;
+    // one consistent read of the state and what each seat may do
+    const snap = await getSnapshot(server, id, log, {
+      fields: ['state', 'allowed_actions', 'claims'],
+    });
+    if (!snap || snap.error || snap.aborted || !snap.state) return;
+    setGameData((d) => ({
+      ...d,
+      state: snap.state,
+      allowed: snap.allowed_actions || d.allowed,
+      claims: snap.claims || d.claims,
+    }));
   }
 
   async function refreshState() {
@@ -165,6 +170,12 @@ export default function App() {
   function handleMessage(e) {
     try {
       const evt = JSON.parse(e.data);
+      if (evt.name === 'snapshot') {
+        lastSeqRef.current = evt.payload?.seq ?? lastSeqRef.current;
+        setGameData((d) => ({ ...d, state: applyEvent(d.state, evt) }));
+        return;
+      }
+      if (typeof evt.seq === 'number' && evt.seq > 0) lastSeqRef.current = evt.seq;
       log('info', formatEvent(evt));
       if (evt.name === 'allowed_actions') {
         setGameData((d) => ({ ...d, allowed: evt.payload?.actions || [[], [], [], []] }));
@@ -292,9 +303,21 @@ export default function App() {
     );
   }
 
-  function openWebSocket(id = gameId) {
+  function canResume(id = gameId) {
+    return wsGameRef.current === String(id) && lastSeqRef.current != null;
+  }
+
+  function openWebSocket(id = gameId, { resume = false } = {}) {
     if (!id) return;
-    const url = `${server.replace(/\/$/, '').replace('http', 'ws')}/ws/${id}`;
+    let url = `${server.replace(/\/$/, '').replace('http', 'ws')}/ws/${id}`;
+    if (resume && canResume(id)) {
+      // the server replays only the events after last_seq
+      url += `?last_seq=${lastSeqRef.current}`;
+      wsRef.current?.close();
+    } else {
+      lastSeqRef.current = null;
+    }
+    wsGameRef.current = String(id);
     const ws = new WebSocket(url);
     ws.onopen = () => setStatus('WebSocket connected');
     ws.onmessage = handleMessage;
@@ -432,8 +455,9 @@ export default function App() {
           <div className="control">
             <Button
               onClick={() => {
-                fetchGameState();
-                openWebSocket();
+                const resume = canResume();
+                if (!resume) fetchGameState();
+                openWebSocket(gameId, { resume });
               }}
             >
               Join Game
@@ -117,6 +117,10 @@ describe('App reload', () => {
     expect(screen.getByLabelText('Server:').value).toBe('http://localhost:5678');
     await userEvent.click(screen.getByLabelText('Options'));
     expect(screen.getByLabelText('Game ID:').value).toBe('1');
+    expect(global.fetch).toHaveBeenCalledWith(
+      'http://localhost:5678/games/1/snapshot?fields=state%2Callowed_actions%2Cclaims',
+      expect.anything(),
+    );
     server.stop();
   });
 });
@@ -1,4 +1,5 @@
 export function applyEvent(state, event) {
+  if (event.name === 'snapshot') return event.payload.state;
   if (!state) return state;
   const newState = JSON.parse(JSON.stringify(state));
   if (!Array.isArray(newState.waiting_for_claims)) newState.waiting_for_claims = [];
@@ -0,0 +1,11 @@
+import { describe, it, expect } from 'vitest';
+import { applyEvent } from './applyEvent.js';
+
+describe('applyEvent snapshot', () => {
+  it('replaces the state even before any state is known', () => {
+    const snapshot = { players: [], current_player: 3, waiting_for_claims: [] };
+    const evt = { name: 'snapshot', payload: { seq: 42, state: snapshot } };
+    expect(applyEvent(null, evt)).toBe(snapshot);
+    expect(applyEvent({ players: [], current_player: 0 }, evt)).toBe(snapshot);
+  });
+});
@@ -0,0 +1,21 @@
+export async function getSnapshot(
+  server,
+  gameId,
+  log = () => {},
+  { playerIndex, fields, signal } = {},
+) {
+  try {
+    const params = new URLSearchParams();
+    if (playerIndex !== undefined) params.set('player', playerIndex);
+    if (fields?.length) params.set('fields', fields.join(','));
+    const query = params.toString();
+    const url = `${server.replace(/\/$/, '')}/games/${gameId}/snapshot${query ? `?${query}` : ''}`;
+    log('debug', `GET ${url} - fetch snapshot`);
+    const resp = await fetch(url, { signal });
+    if (!resp.ok) return { error: `HTTP ${resp.status}` };
+    return await resp.json();
+  } catch (err) {
+    if (err.name === 'AbortError') return { aborted: true };
+    return { error: err.message };
+  }
+}
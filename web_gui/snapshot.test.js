@@ -0,0 +1,24 @@
+import { describe, it, expect, vi } from 'vitest';
+import { getSnapshot } from './snapshot.js';
+
+describe('getSnapshot', () => {
+  it('requests the selected fields for one player', async () => {
+    const fetchMock = vi.fn(() =>
+      Promise.resolve({ ok: true, json: () => Promise.resolve({ version: 3, claims: [] }) })
+    );
+    global.fetch = fetchMock;
+    const data = await getSnapshot('http://s/', '1', undefined, {
+      playerIndex: 0,
+      fields: ['claims', 'chi_options'],
+    });
+    expect(fetchMock.mock.calls[0][0]).toBe(
+      'http://s/games/1/snapshot?player=0&fields=claims%2Cchi_options',
+    );
+    expect(data.version).toBe(3);
+  });
+
+  it('reports HTTP errors', async () => {
+    global.fetch = vi.fn(() => Promise.resolve({ ok: false, status: 404 }));
+    expect(await getSnapshot('http://s', '1')).toEqual({ error: 'HTTP 404' });
+  });
+});